@@ -143,8 +143,9 @@ def handle_command(
   [prompt]/model[/prompt]    Change AI model
   [prompt]/output[/prompt]   Set output mode (auto, observation, query)
   [prompt]/session[/prompt]  Session management (new, save, load, list, clear)
-  [prompt]/rag[/prompt]      RAG memory (index, stats, clear)
+  [prompt]/rag[/prompt]      RAG memory (index, sync, stats, clear)
   [prompt]/status[/prompt]   Show current settings and session info
+  [prompt]/stream[/prompt]   Toggle streaming responses
   [prompt]/help[/prompt]     Show slash command help
         """)
         return True
@@ -240,11 +241,19 @@ def start_repl():
 
     # --- RAG: Show stats only, don't block startup ---
     try:
-        from .memory import MemoryStore
-        store = MemoryStore()
+        from .memory import get_memory_store
+        store = get_memory_store()
         stats = store.get_stats()
         if stats['schema'] > 0:
             console.print(f"[dim]RAG: {stats['schema']} schema, {stats['queries']} queries, {stats['observations']} obs[/dim]")
+            # --- Warehouse changed since last index: re-embed only what changed ---
+            if store.is_schema_stale():
+                from .config import get_setting
+                if get_setting("rag_auto_sync", False):
+                    changes = store.sync_schema_from_db()
+                    console.print(f"[dim]RAG: schema synced ({changes['added'] + changes['updated']} changed, {changes['deleted']} removed)[/dim]")
+                else:
+                    console.print("[dim]RAG: warehouse changed since last index (run /rag sync)[/dim]")
         else:
             console.print("[dim]RAG: not indexed (run /rag index)[/dim]")
     except Exception:
@@ -283,8 +292,15 @@ def start_repl():
             if command_result is True:
                 continue
 
-            # Process as a data question
-            orchestrator.process_question(user_input)
+            # Process as a data question; Ctrl+C cancels the question
+            # (and any running queries) instead of exiting the REPL
+            try:
+                orchestrator.process_question(user_input)
+            except KeyboardInterrupt:
+                from .sandbox import get_pool
+                get_pool().interrupt_all()
+                console.print()
+                print_warning("Cancelled. Running queries were interrupted.")
 
         except KeyboardInterrupt:
             console.print()
@@ -1,28 +1,70 @@
 import json
+import threading
 from pathlib import Path
 
 CONFIG_DIR = Path.home() / ".astroagent"
 CONFIG_FILE = CONFIG_DIR / "config.json"
 
+# Parsed config.json, re-read only when the file changes (see _read_config)
+_UNREAD = object()
+_config: dict = {}
+_config_version = _UNREAD
+_config_lock = threading.Lock()
+
 
 def ensure_config_dir():
     CONFIG_DIR.mkdir(exist_ok=True)
 
 
+def _read_config() -> dict:
+    """
+    Cached parse of config.json.
+
+    get_setting runs on per-query and per-tool paths, so the file is only
+    re-read when its mtime, size or inode changed. Callers must not modify
+    the returned dict.
+    """
+    global _config, _config_version
+    try:
+        stat = CONFIG_FILE.stat()
+        version = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    except FileNotFoundError:
+        version = None
+
+    with _config_lock:
+        if version != _config_version:
+            try:
+                _config = json.loads(CONFIG_FILE.read_text()) if version else {}
+            except FileNotFoundError:
+                _config = {}
+            _config_version = version
+        return _config
+
+
+def _invalidate_config():
+    global _config_version
+    with _config_lock:
+        _config_version = _UNREAD
+
+
 def load_config() -> dict:
     ensure_config_dir()
-    if CONFIG_FILE.exists():
-        return json.loads(CONFIG_FILE.read_text())
-    return {}
+    return dict(_read_config())
 
 
 def save_config(config: dict):
     ensure_config_dir()
     CONFIG_FILE.write_text(json.dumps(config, indent=2))
+    _invalidate_config()
+
+
+def get_setting(key: str, default=None):
+    """Read an optional tuning setting from config.json."""
+    return _read_config().get(key, default)
 
 
 def get_api_key() -> str | None:
-    return load_config().get("openai_api_key")
+    return _read_config().get("openai_api_key")
 
 
 def set_api_key(key: str):
@@ -34,3 +76,4 @@ def set_api_key(key: str):
 def clear_config():
     if CONFIG_FILE.exists():
         CONFIG_FILE.unlink()
+    _invalidate_config()
@@ -51,7 +51,7 @@ class ResultDisplay:
         self.console.print()
 
         # Show what SQL inputs were used
-        self._show_inputs_summary(output.inputs_used, output.sql_queries)
+        self._show_inputs_summary(output.inputs_used, output.sql_queries, output.input_timings)
 
         # Show the function that was applied
         self._show_function_code(output.function_code)
@@ -71,11 +71,18 @@ class ResultDisplay:
         if output.function_code:
             self._show_function_code(output.function_code)
 
-    def _show_inputs_summary(self, inputs_used: dict[str, pd.DataFrame], sql_queries: dict[str, str] = None) -> None:
+    def _show_inputs_summary(
+        self,
+        inputs_used: dict[str, pd.DataFrame],
+        sql_queries: dict[str, str] = None,
+        input_timings: dict[str, float] = None
+    ) -> None:
         """Show a summary of the SQL inputs that were used."""
         self.console.print("[title]SQL Inputs:[/title]")
         for name, df in inputs_used.items():
             rows_info = f"{len(df):,} rows"
+            if input_timings and name in input_timings:
+                rows_info += f", {input_timings[name]:.2f}s"
             if sql_queries and name in sql_queries:
                 self.console.print(f"  [prompt]{name}[/prompt] ({rows_info}):")
                 self.console.print(f"    [dim]{sql_queries[name]}[/dim]")
@@ -0,0 +1,291 @@
+"""
+history.py
+
+Conversation history compaction for AstroAgent.
+
+Every LLM call resends the whole conversation, and raw tool output
+(run_sql returns up to 500 rows) from questions answered long ago ends up
+dominating the prompt, which grows with every question. HistoryCompactor
+builds the message list that is actually sent; the stored history (and
+saved sessions) keep everything.
+
+Older questions are compacted:
+- Answered questions collapse to the question, the submitting call and
+  its result, plus a one-line note of the exploration that was dropped
+- Other tool results over their budget become summaries (columns, row
+  count, head/tail rows, simple column stats)
+- Long assistant text is truncated
+
+If that is still over the total budget, the oldest questions are dropped
+whole. Older questions are budgeted against what is left after the recent
+ones, measured once when a question starts, so drops are only decided
+between questions. Compaction depends only on which questions are
+complete, so the sent history stays byte-identical while a question is
+being worked on.
+"""
+
+from collections import Counter
+from typing import Optional
+
+from .config import get_setting
+
+
+CHARS_PER_TOKEN = 4  # Rough estimate, same as the retriever's
+
+# --- Defaults for the budgets (all configurable, see notes.md) ---
+DEFAULT_KEEP_RECENT_QUESTIONS = 1
+DEFAULT_TOOL_RESULT_TOKENS = 300
+DEFAULT_ASSISTANT_TOKENS = 400
+DEFAULT_MAX_HISTORY_TOKENS = 32000
+
+# --- Table summaries ---
+HEAD_ROWS = 5
+TAIL_ROWS = 2
+MAX_STAT_COLUMNS = 12
+
+OUTPUT_TOOLS = frozenset({"submit_result", "submit_observation"})
+TABULAR_TOOLS = frozenset({"run_sql", "run_python"})
+
+
+def estimate_tokens(messages: list[dict]) -> int:
+    """Rough token count of messages (content plus tool call arguments)."""
+    chars = 0
+    for message in messages:
+        chars += len(message.get("content") or "")
+        for tool_call in message.get("tool_calls") or []:
+            function = tool_call.get("function", {})
+            chars += len(function.get("name", "")) + len(function.get("arguments", ""))
+    return chars // CHARS_PER_TOKEN
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """Keep the start and end of text within a token budget."""
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    head = limit * 2 // 3
+    tail = limit - head
+    omitted = len(text) - head - tail
+    return f"{text[:head]}\n... [compacted: {omitted:,} chars omitted]\n{text[-tail:]}"
+
+
+def summarize_table(text: str, tool_name: str) -> Optional[str]:
+    """
+    Summarize a DataFrame rendered with to_string.
+
+    Returns:
+        Columns, row count, simple column stats and head/tail rows, or
+        None if text doesn't look like a table
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    note = None
+    if lines and lines[-1].startswith("[TRUNCATED"):
+        note = lines.pop()
+    if len(lines) < 2:
+        return None
+
+    # --- to_string pads every line to the same width ---
+    header, rows = lines[0], lines[1:]
+    aligned = sum(1 for row in rows if len(row) == len(header))
+    if aligned < len(rows) * 0.8:
+        return None
+
+    columns = header.split()
+    parts = [f"[{tool_name} result compacted: {len(rows):,} rows, {len(columns)} columns: {', '.join(columns)}]"]
+    if note:
+        parts.append(note)
+
+    stats = _column_stats(columns, rows)
+    if stats:
+        parts.append("Stats: " + "; ".join(stats))
+
+    parts.append(header)
+    if len(rows) <= HEAD_ROWS + TAIL_ROWS:
+        parts.extend(rows)
+    else:
+        parts.extend(rows[:HEAD_ROWS])
+        parts.append(f"... ({len(rows) - HEAD_ROWS - TAIL_ROWS:,} rows omitted)")
+        parts.extend(rows[-TAIL_ROWS:])
+    return "\n".join(parts)
+
+
+def _column_stats(columns: list[str], rows: list[str]) -> list[str]:
+    """Min..max for numeric columns, distinct counts otherwise. Empty if values contain spaces."""
+    split_rows = [row.split() for row in rows]
+    if any(len(values) != len(columns) for values in split_rows):
+        return []
+
+    stats = []
+    for i, column in enumerate(columns[:MAX_STAT_COLUMNS]):
+        values = [values[i] for values in split_rows]
+        try:
+            numbers = [float(v.replace(",", "")) for v in values if v not in ("NaN", "None", "<NA>")]
+        except ValueError:
+            stats.append(f"{column} {len(set(values)):,} distinct")
+            continue
+        if numbers:
+            stats.append(f"{column} {min(numbers):g}..{max(numbers):g}")
+    return stats
+
+
+class HistoryCompactor:
+    """
+    Builds a bounded message list from the conversation history.
+
+    Usage:
+        compactor = HistoryCompactor()
+        messages = compactor.compact(conversation_history)
+
+    Attributes:
+        enabled: Compaction on/off (config: history_compaction)
+        keep_recent: Most recent questions sent unchanged
+        tool_result_tokens: Budget per older tool result
+        assistant_tokens: Budget per older assistant text
+        max_tokens: Budget for the whole history
+        last_stats: Sizes from the last compact() call
+    """
+
+    def __init__(
+        self,
+        keep_recent: int = None,
+        tool_result_tokens: int = None,
+        assistant_tokens: int = None,
+        max_tokens: int = None,
+    ):
+        self.enabled = get_setting("history_compaction", True)
+        self.keep_recent = max(1, keep_recent or get_setting("history_keep_recent_questions", DEFAULT_KEEP_RECENT_QUESTIONS))
+        self.tool_result_tokens = tool_result_tokens or get_setting("history_tool_result_tokens", DEFAULT_TOOL_RESULT_TOKENS)
+        self.assistant_tokens = assistant_tokens or get_setting("history_assistant_tokens", DEFAULT_ASSISTANT_TOKENS)
+        self.max_tokens = max_tokens or get_setting("history_max_tokens", DEFAULT_MAX_HISTORY_TOKENS)
+        self.last_stats: dict = {}
+        self._question_key: Optional[tuple] = None  # Question the older budget was fixed for
+        self._older_budget = 0
+
+    def compact(self, history: list[dict]) -> list[dict]:
+        """
+        Compacted copy of history, valid to send to the API.
+
+        Args:
+            history: Full conversation history (not modified)
+
+        Returns:
+            Message list with older questions compacted
+        """
+        if not self.enabled:
+            return list(history)
+
+        questions = self._split_questions(history)
+        recent = questions[-self.keep_recent:]
+        older = [self._compact_question(q) for q in questions[:len(questions) - len(recent)]]
+
+        # --- Fix the budget for older questions when a new question starts ---
+        question_key = (len(questions), questions[-1][0].get("content") if questions else None)
+        if question_key != self._question_key:
+            self._question_key = question_key
+            self._older_budget = self.max_tokens - sum(estimate_tokens(q) for q in recent)
+
+        # --- Still over budget: drop the oldest questions whole ---
+        sizes = [estimate_tokens(q) for q in older]
+        older_total = sum(sizes)
+        dropped = 0
+        while dropped < len(older) and older_total > self._older_budget:
+            older_total -= sizes[dropped]
+            dropped += 1
+        total = older_total + sum(estimate_tokens(q) for q in recent)
+
+        messages = [m for question in older[dropped:] + recent for m in question]
+        self.last_stats = {
+            "original_tokens": estimate_tokens(history),
+            "compacted_tokens": total,
+            "messages": len(messages),
+            "dropped_questions": dropped,
+        }
+        return messages
+
+    # =========================================================================
+    # INTERNAL HELPERS
+    # =========================================================================
+
+    @staticmethod
+    def _split_questions(history: list[dict]) -> list[list[dict]]:
+        """Group messages by question; each group starts at a user message."""
+        questions = []
+        for message in history:
+            if message.get("role") == "user" or not questions:
+                questions.append([])
+            questions[-1].append(message)
+        return questions
+
+    def _compact_question(self, messages: list[dict]) -> list[dict]:
+        """Compact one finished question."""
+        names = {
+            tool_call["id"]: tool_call["function"]["name"]
+            for m in messages if m.get("role") == "assistant"
+            for tool_call in m.get("tool_calls") or []
+        }
+
+        collapsed = self._collapse_answered(messages, names)
+        if collapsed is not None:
+            return collapsed
+
+        compacted = []
+        for message in messages:
+            role = message.get("role")
+            if role == "tool":
+                name = names.get(message.get("tool_call_id"), "tool")
+                message = {**message, "content": self._compact_tool_result(name, message.get("content") or "")}
+            elif role == "assistant" and message.get("content"):
+                message = {**message, "content": truncate_text(message["content"], self.assistant_tokens)}
+            compacted.append(message)
+        return compacted
+
+    def _collapse_answered(self, messages: list[dict], names: dict[str, str]) -> Optional[list[dict]]:
+        """
+        Reduce an answered question to: question, submitting call, its result.
+
+        Returns None if the question wasn't answered by an output tool.
+        """
+        for message in reversed(messages):
+            if message.get("role") != "assistant":
+                continue
+            answer = next(
+                (tc for tc in message.get("tool_calls") or [] if tc["function"]["name"] in OUTPUT_TOOLS),
+                None,
+            )
+            if answer is not None:
+                break
+        else:
+            return None
+
+        result = next(
+            (m for m in messages if m.get("role") == "tool" and m.get("tool_call_id") == answer["id"]),
+            None,
+        )
+        if result is None:
+            return None
+
+        explored = Counter(name for call_id, name in names.items() if call_id != answer["id"])
+        note = ""
+        if explored:
+            calls = ", ".join(f"{name} x{count}" for name, count in explored.items())
+            note = f"[Exploration compacted: {calls}]"
+        content = truncate_text(message.get("content") or "", self.assistant_tokens)
+
+        collapsed = [m for m in messages[:1] if m.get("role") == "user"]
+        collapsed.append({
+            "role": "assistant",
+            "content": "\n".join(part for part in (note, content) if part) or None,
+            "tool_calls": [answer],
+        })
+        collapsed.append(result)
+        return collapsed
+
+    def _compact_tool_result(self, tool_name: str, content: str) -> str:
+        """Summary of an older tool result that is over budget."""
+        if len(content) // CHARS_PER_TOKEN <= self.tool_result_tokens:
+            return content
+        if tool_name in TABULAR_TOOLS:
+            summary = summarize_table(content, tool_name)
+            if summary is not None:
+                return truncate_text(summary, self.tool_result_tokens)
+        return truncate_text(content, self.tool_result_tokens)
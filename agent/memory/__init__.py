@@ -10,10 +10,15 @@ Architecture:
     embedder.py  → Generate embeddings via OpenAI
     store.py     → ChromaDB vector storage
     retriever.py → Query-time context retrieval
+    indexer.py   → Background indexing of answers (persistent outbox)
 """
 
 from .embedder import Embedder
-from .store import MemoryStore
-from .retriever import ContextRetriever, RetrievalResult
+from .store import MemoryStore, get_memory_store
+from .retriever import ContextRetriever, RetrievalCache, RetrievalResult
+from .indexer import BackgroundIndexer, get_background_indexer
 
-__all__ = ["Embedder", "MemoryStore", "ContextRetriever", "RetrievalResult"]
+__all__ = [
+    "Embedder", "MemoryStore", "get_memory_store", "ContextRetriever", "RetrievalCache", "RetrievalResult",
+    "BackgroundIndexer", "get_background_indexer",
+]
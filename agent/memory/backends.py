@@ -0,0 +1,200 @@
+"""
+backends.py - Pluggable embedding backends for the memory subsystem
+
+Embedder delegates the actual vector computation to one of these:
+
+    openai   - text-embedding-3-small over the API (default, 1536 dims)
+    local    - sentence-transformers model on the CPU (optional dependency,
+               downloads the model once)
+    hashing  - hashed word/trigram features with a signed random projection;
+               pure NumPy, no download, no network
+
+Selected with the `embedding_backend` config key. Each backend reports a
+model name and dimension, which the store records per collection so
+vectors from different backends are never mixed.
+"""
+
+import math
+import re
+import zlib
+from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from ..config import get_api_key, get_setting
+
+
+# --- Backend names (config: embedding_backend) ---
+BACKENDS = ("openai", "local", "hashing")
+DEFAULT_BACKEND = "openai"
+
+# --- OpenAI model ---
+OPENAI_MODEL = "text-embedding-3-small"
+OPENAI_DIMENSIONS = 1536
+
+# --- sentence-transformers model (config: embedding_model) ---
+DEFAULT_LOCAL_MODEL = "all-MiniLM-L6-v2"
+
+# --- Hashing backend output size (config: embedding_dimensions) ---
+DEFAULT_HASHING_DIMENSIONS = 384
+
+
+class EmbeddingBackend(ABC):
+    """
+    Computes embedding vectors for batches of text.
+
+    Attributes:
+        model: Identifier recorded with stored vectors (cache key, collection metadata)
+        dimensions: Length of every vector
+        max_inputs_per_request: Texts per embed_texts call
+        max_tokens_per_request: Estimated tokens per embed_texts call
+        concurrency: embed_texts calls run at once
+    """
+
+    model: str = ""
+    dimensions: int = 0
+    max_inputs_per_request: int = 256
+    max_tokens_per_request: int = 250_000
+    concurrency: int = 1
+
+    @abstractmethod
+    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        """Embed one request-sized batch, in input order."""
+
+
+class OpenAIBackend(EmbeddingBackend):
+    """OpenAI embedding API (network)."""
+
+    model = OPENAI_MODEL
+    dimensions = OPENAI_DIMENSIONS
+    # --- API caps are 2048 inputs and ~300k tokens per request ---
+    max_inputs_per_request = 2048
+    max_tokens_per_request = 250_000
+
+    def __init__(self):
+        # --- Import here so local backends work without the SDK configured ---
+        from openai import OpenAI
+
+        api_key = get_api_key()
+        if not api_key:
+            raise ValueError("OpenAI API key required for embeddings")
+        self.client = OpenAI(api_key=api_key)
+        self.concurrency = get_setting("embedding_concurrency", 4)
+
+    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        response = self.client.embeddings.create(
+            model=OPENAI_MODEL,
+            input=texts,
+        )
+
+        # --- Response may not be in order, so sort by index ---
+        sorted_data = sorted(response.data, key=lambda x: x.index)
+        return [item.embedding for item in sorted_data]
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """Small sentence-transformers model on the CPU (needs `sentence-transformers`)."""
+
+    max_inputs_per_request = 64
+
+    def __init__(self, model_name: str = None):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ValueError(
+                "embedding_backend 'local' needs sentence-transformers: uv pip install sentence-transformers"
+            )
+
+        model_name = model_name or get_setting("embedding_model", DEFAULT_LOCAL_MODEL)
+        self._model = SentenceTransformer(model_name, device="cpu")
+        self.model = f"st-{model_name.replace('/', '_')}"
+        self.dimensions = self._model.get_sentence_embedding_dimension()
+        # --- Inference releases the GIL, so batches can overlap ---
+        self.concurrency = get_setting("embedding_concurrency", 4)
+
+    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        vectors = self._model.encode(texts, batch_size=len(texts), normalize_embeddings=True)
+        return vectors.tolist()
+
+
+class HashingBackend(EmbeddingBackend):
+    """
+    Hashed bag-of-features with a signed random projection.
+
+    Features are words, word bigrams and character trigrams, weighted
+    with sublinear TF. Each feature hashes to a dimension and a sign, which
+    is a sparse random projection of the feature space. Good at shared
+    identifiers and vocabulary (table/column names), weaker on paraphrase.
+    Deterministic across processes and machines.
+    """
+
+    max_inputs_per_request = 512
+
+    WORD = re.compile(r"[a-z0-9]+")
+
+    def __init__(self, dimensions: int = None):
+        self.dimensions = int(dimensions or get_setting("embedding_dimensions", DEFAULT_HASHING_DIMENSIONS))
+        self.model = f"hashing-{self.dimensions}"
+        self.concurrency = 1  # Pure Python hashing holds the GIL
+
+    def _features(self, text: str) -> Counter:
+        words = self.WORD.findall(text.lower())
+        features = Counter(f"w:{w}" for w in words)
+        features.update(f"b:{a}_{b}" for a, b in zip(words, words[1:]))
+        for word in words:
+            padded = f"^{word}$"
+            features.update(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return features
+
+    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, count in self._features(text).items():
+                h = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if h & 0x80000000 else -1.0
+                matrix[row, h % self.dimensions] += sign * (1.0 + math.log(count))
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1.0, norms)
+        return matrix.tolist()
+
+
+def get_backend(name: str = None) -> EmbeddingBackend:
+    """
+    Create the configured embedding backend.
+
+    Args:
+        name: Backend name; defaults to the `embedding_backend` config key
+
+    Raises:
+        ValueError: Unknown backend, or a backend that can't be initialized
+    """
+    name = (name or get_setting("embedding_backend", DEFAULT_BACKEND)).lower()
+    if name == "openai":
+        return OpenAIBackend()
+    if name == "local":
+        return SentenceTransformerBackend()
+    if name == "hashing":
+        return HashingBackend()
+    raise ValueError(f"Unknown embedding backend: {name}. Use one of: {', '.join(BACKENDS)}")
+
+
+def run_batches(backend: EmbeddingBackend, chunks: list[list[str]]):
+    """
+    Embed request-sized chunks on a thread pool.
+
+    Yields:
+        (chunk, vectors) as each chunk finishes
+    """
+    workers = max(1, min(backend.concurrency, len(chunks)))
+    if workers == 1:
+        for chunk in chunks:
+            yield chunk, backend.embed_texts(chunk)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed") as pool:
+        futures = [(chunk, pool.submit(backend.embed_texts, chunk)) for chunk in chunks]
+        for chunk, future in futures:
+            yield chunk, future.result()
@@ -1,36 +1,47 @@
 """
-embedder.py - Generate embeddings using OpenAI's API
+embedder.py - Generate embeddings for the RAG system
 
-Handles all embedding generation for the RAG system.
-Uses text-embedding-3-small for cost efficiency.
+Delegates vector computation to a pluggable backend (see backends.py):
+OpenAI's text-embedding-3-small by default, or a local CPU backend
+selected with the `embedding_backend` config key.
+
+Vectors are cached locally (see embedding_cache.py), so only text that
+has never been embedded before reaches the backend.
 """
 
-from openai import OpenAI
-from typing import Union
+from typing import Callable, Optional
 
-from ..config import get_api_key
+from .backends import EmbeddingBackend, OPENAI_DIMENSIONS, OPENAI_MODEL, get_backend, run_batches
+from .embedding_cache import get_embedding_cache
 
 
-# --- Configuration ---
+# --- Configuration (default backend) ---
 # Using OpenAI's small embedding model - good balance of quality and cost
-EMBEDDING_MODEL = "text-embedding-3-small"
-EMBEDDING_DIMENSIONS = 1536  # Output dimensions for this model
+EMBEDDING_MODEL = OPENAI_MODEL
+EMBEDDING_DIMENSIONS = OPENAI_DIMENSIONS  # Output dimensions for this model
+
+CHARS_PER_TOKEN = 4  # Rough estimate, same as the retriever's
 
 
 class Embedder:
     """
-    Generates embeddings for text using OpenAI's embedding API.
+    Generates embeddings for text through the configured backend.
 
-    Offloads embedding computation to OpenAI for simplicity.
     Supports both single texts and batches.
+
+    Attributes:
+        backend: The EmbeddingBackend doing the work
+        model: Backend model identifier (recorded with stored vectors)
+        dimensions: Vector length
     """
 
-    def __init__(self):
-        # --- Initialize OpenAI client ---
-        api_key = get_api_key()
-        if not api_key:
-            raise ValueError("OpenAI API key required for embeddings")
-        self.client = OpenAI(api_key=api_key)
+    def __init__(self, backend: Optional[EmbeddingBackend] = None):
+        self.backend = backend or get_backend()
+        self.model = self.backend.model
+        self.dimensions = self.backend.dimensions
+
+        # --- Local vector cache keyed by (model, sha256(text)) ---
+        self.cache = get_embedding_cache(self.model, self.dimensions)
 
     def embed(self, text: str) -> list[float]:
         """
@@ -42,21 +53,23 @@ class Embedder:
         Returns:
             List of floats representing the embedding vector
         """
-        # --- Call OpenAI embedding API ---
-        response = self.client.embeddings.create(
-            model=EMBEDDING_MODEL,
-            input=text,
-        )
-        return response.data[0].embedding
-
-    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_batch([text])[0]
+
+    def embed_batch(
+        self,
+        texts: list[str],
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> list[list[float]]:
         """
-        Generate embeddings for multiple texts in one API call.
+        Generate embeddings for multiple texts with as few backend calls as possible.
 
-        More efficient than calling embed() multiple times.
+        More efficient than calling embed() multiple times. Cache misses
+        are split into requests under the backend's input and token
+        limits, and several requests run concurrently on a thread pool.
 
         Args:
             texts: List of texts to embed
+            progress: Optional callback(done, total) over the texts sent upstream
 
         Returns:
             List of embedding vectors (same order as input)
@@ -64,17 +77,43 @@ class Embedder:
         if not texts:
             return []
 
-        # --- Batch embed via OpenAI ---
-        # OpenAI handles batching internally, more efficient than multiple calls
-        response = self.client.embeddings.create(
-            model=EMBEDDING_MODEL,
-            input=texts,
-        )
-
-        # --- Return embeddings in original order ---
-        # Response may not be in order, so sort by index
-        sorted_data = sorted(response.data, key=lambda x: x.index)
-        return [item.embedding for item in sorted_data]
+        # --- Serve what we can from the local cache ---
+        embeddings = self.cache.get_many(texts) if self.cache else [None] * len(texts)
+        misses = list(dict.fromkeys(t for t, e in zip(texts, embeddings) if e is None))
+        if not misses:
+            return embeddings
+
+        # --- Batch embed the misses via the backend ---
+        by_text = {}
+        done = 0
+        for chunk, fresh in run_batches(self.backend, self._chunk(misses)):
+            if self.cache:
+                self.cache.put_many(chunk, fresh)
+            by_text.update(zip(chunk, fresh))
+            done += len(chunk)
+            if progress:
+                progress(done, len(misses))
+
+        return [e if e is not None else by_text[t] for t, e in zip(texts, embeddings)]
+
+    def _chunk(self, texts: list[str]) -> list[list[str]]:
+        """Split texts into request-sized chunks by input count and estimated tokens."""
+        chunks = []
+        current = []
+        current_tokens = 0
+        for text in texts:
+            tokens = len(text) // CHARS_PER_TOKEN + 1
+            if current and (
+                len(current) >= self.backend.max_inputs_per_request
+                or current_tokens + tokens > self.backend.max_tokens_per_request
+            ):
+                chunks.append(current)
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            chunks.append(current)
+        return chunks
 
     def embed_with_metadata(self, text: str, metadata: dict) -> dict:
         """
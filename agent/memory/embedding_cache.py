@@ -0,0 +1,268 @@
+"""
+embedding_cache.py - Persistent local cache of embedding vectors
+
+Re-indexing the schema, repeated questions and re-submitted observations
+embed the same text over and over. Vectors are cached on disk keyed by
+(model, sha256(text)) so only unseen text goes to the embedding API.
+
+Layout (one directory per model):
+    ~/.astroagent/memory/embeddings/<model>/
+        vectors.f32   - memory-mapped float32 matrix, one row per entry
+        keys.bin      - sha256 of each row's text (all zeros = free row)
+        used.f64      - last-use time of each row, for LRU eviction
+        meta.json     - model and dimensions
+
+Rows describe themselves, so there is no index file to rewrite: the
+in-memory hash -> row index is rebuilt from keys.bin at startup, and a
+row's key is checked on every read. Several CLI processes can share a
+cache: writers serialize on an flock, and a row overwritten by another
+process reads as a miss rather than as the wrong vector.
+
+When full, the least recently used entry's row is reused.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+from ..config import get_setting
+
+
+# --- Storage location ---
+EMBEDDING_CACHE_DIR = Path.home() / ".astroagent" / "memory" / "embeddings"
+
+# --- Size budget for the vector matrix (config: embedding_cache_mb) ---
+DEFAULT_CACHE_MB = 256
+
+KEY_BYTES = 32  # sha256 digest
+
+
+def text_hash(text: str) -> bytes:
+    """Content hash used as the cache key."""
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    Memory-mapped LRU cache of embedding vectors for one model.
+
+    Thread-safe, and safe to share between processes.
+    """
+
+    def __init__(self, model: str, dimensions: int, max_mb: int = None):
+        self.model = model
+        self.dimensions = dimensions
+        max_mb = max_mb or get_setting("embedding_cache_mb", DEFAULT_CACHE_MB)
+        self.capacity = max(1, int(max_mb * 1024 * 1024 // (dimensions * 4)))
+
+        self.directory = EMBEDDING_CACHE_DIR / model.replace("/", "_")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock_path = self.directory / "lock"
+
+        self._lock = threading.Lock()
+        with self._lock, self._file_lock():
+            self._check_meta()
+            self._vectors = self._open("vectors.f32", np.float32, (self.capacity, self.dimensions))
+            self._keys = self._open("keys.bin", np.uint8, (self.capacity, KEY_BYTES))
+            self._used = self._open("used.f64", np.float64, (self.capacity,))
+            self._index, self._free_rows = self._build_index()
+
+        # --- Stats ---
+        self.hits = 0
+        self.misses = 0
+
+    # =========================================================================
+    # PUBLIC API
+    # =========================================================================
+
+    def get_many(self, texts: list[str]) -> list[Optional[list[float]]]:
+        """
+        Look up cached vectors.
+
+        Returns:
+            One entry per text: the vector, or None on a miss
+        """
+        out = []
+        now = time.time()
+        with self._lock:
+            for text in texts:
+                key = text_hash(text)
+                row = self._index.get(key)
+                vector = self._read_row(row, key) if row is not None else None
+                if vector is None:
+                    if row is not None:
+                        # --- Row was reused by another process ---
+                        del self._index[key]
+                        self._reclaim_row(row)
+                    self.misses += 1
+                    out.append(None)
+                else:
+                    self._index.move_to_end(key)
+                    self._used[row] = now
+                    self.hits += 1
+                    out.append(vector)
+        return out
+
+    def get(self, text: str) -> Optional[list[float]]:
+        return self.get_many([text])[0]
+
+    def put_many(self, texts: list[str], vectors: list[list[float]]) -> None:
+        """Store vectors for texts, evicting least recently used entries when full."""
+        if not texts:
+            return
+
+        now = time.time()
+        with self._lock, self._file_lock():
+            for text, vector in zip(texts, vectors):
+                if len(vector) != self.dimensions:
+                    continue
+                key = text_hash(text)
+                row = self._index.get(key)
+                if row is not None and bytes(self._keys[row]) != key:
+                    del self._index[key]
+                    self._reclaim_row(row)
+                    row = None
+                if row is None:
+                    row = self._allocate_row()
+
+                # --- Key last: a half-written row never matches its key ---
+                self._keys[row] = 0
+                self._vectors[row] = np.asarray(vector, dtype=np.float32)
+                self._keys[row] = np.frombuffer(key, dtype=np.uint8)
+                self._used[row] = now
+                self._index[key] = row
+                self._index.move_to_end(key)
+
+    def put(self, text: str, vector: list[float]) -> None:
+        self.put_many([text], [vector])
+
+    def clear(self) -> None:
+        """Drop every cached vector for this model."""
+        with self._lock, self._file_lock():
+            self._keys[:] = 0
+            self._keys.flush()
+            self._index.clear()
+            self._free_rows = list(range(self.capacity - 1, -1, -1))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._index),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    # =========================================================================
+    # INTERNAL HELPERS
+    # =========================================================================
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive flock shared with other processes using this cache."""
+        with open(self._lock_path, "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_row(self, row: int, key: bytes) -> Optional[list[float]]:
+        """A row's vector if it still holds this key (checked before and after the copy)."""
+        if bytes(self._keys[row]) != key:
+            return None
+        vector = self._vectors[row].tolist()
+        if bytes(self._keys[row]) != key:
+            return None
+        return vector
+
+    def _allocate_row(self) -> int:
+        """A free row, or the least recently used entry's row. Caller holds both locks."""
+        while self._free_rows:
+            row = self._free_rows.pop()
+            existing = bytes(self._keys[row])
+            if not any(existing):
+                return row
+            # --- Filled by another process since we looked; adopt it as oldest ---
+            self._index[existing] = row
+            self._index.move_to_end(existing, last=False)
+        _, row = self._index.popitem(last=False)
+        return row
+
+    def _reclaim_row(self, row: int) -> None:
+        """Track a row whose key no longer matches our index: adopt its new key as oldest, or free it."""
+        existing = bytes(self._keys[row])
+        if not any(existing):
+            self._free_rows.append(row)
+        elif existing not in self._index:
+            self._index[existing] = row
+            self._index.move_to_end(existing, last=False)
+
+    def _build_index(self) -> tuple[OrderedDict, list[int]]:
+        """Hash -> row in least-recently-used order, plus free rows (lowest popped first)."""
+        occupied = np.flatnonzero(self._keys.any(axis=1))
+        order = occupied[np.argsort(self._used[occupied], kind="stable")]
+        index = OrderedDict((bytes(self._keys[row]), int(row)) for row in order)
+        taken = set(int(row) for row in occupied)
+        free = [row for row in range(self.capacity - 1, -1, -1) if row not in taken]
+        return index, free
+
+    def _open(self, name: str, dtype, shape: tuple) -> np.memmap:
+        """Open (or create/resize) one of the row files."""
+        path = self.directory / name
+        expected = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if not path.exists() or path.stat().st_size != expected:
+            # --- Sparse file; rows beyond a shrunken capacity are gone ---
+            with open(path, "ab") as f:
+                f.truncate(expected)
+        return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+    def _check_meta(self) -> None:
+        """Start empty if the files were written for another vector size. Caller holds both locks."""
+        meta_path = self.directory / "meta.json"
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            meta = {}
+        if meta.get("dimensions") != self.dimensions:
+            for name in ("vectors.f32", "keys.bin", "used.f64"):
+                (self.directory / name).unlink(missing_ok=True)
+            meta_path.write_text(json.dumps({"model": self.model, "dimensions": self.dimensions}))
+
+
+# --- One cache per model, shared across the process ---
+_caches: dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(model: str, dimensions: int) -> Optional[EmbeddingCache]:
+    """
+    Get the process-wide cache for a model.
+
+    Returns:
+        The cache, or None if disabled via the `embedding_cache` config key
+    """
+    if not get_setting("embedding_cache", True):
+        return None
+
+    with _caches_lock:
+        if model not in _caches:
+            try:
+                _caches[model] = EmbeddingCache(model, dimensions)
+            except OSError:
+                return None
+        return _caches[model]
@@ -0,0 +1,309 @@
+"""
+indexer.py - Background indexing of learned queries and observations
+
+Indexing a submitted answer costs an embedding call and a store write.
+Doing that inline kept the REPL prompt waiting after every answer.
+Instead the orchestrator enqueues the item and a worker thread indexes
+it, batching whatever is pending into one embed_batch call.
+
+Every item is first appended to an on-disk outbox
+(~/.astroagent/memory/outbox.jsonl), and a "done" record is appended once
+it is stored, so items still pending at exit (or after a crash) are
+indexed next run. The outbox is only appended to while running; at
+startup it is rewritten without finished items, under a file lock shared
+by all CLI processes. Each entry records the process that owns it, and
+a process only replays leftovers whose owner has exited.
+
+A failing batch is retried one entry at a time, so one bad entry can't
+hold the others back. Failed entries are retried with exponential
+backoff and moved to outbox_failed.jsonl after MAX_ATTEMPTS.
+"""
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+from .store import MEMORY_DIR, MemoryStore
+
+
+OUTBOX_PATH = MEMORY_DIR / "outbox.jsonl"
+
+# --- Batching: max items per embedding call, and how long to wait for more ---
+MAX_BATCH_SIZE = 64
+BATCH_LINGER_SECONDS = 0.2
+
+# --- Retries: delay doubles per failed attempt; quarantined after MAX_ATTEMPTS ---
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 2
+RETRY_MAX_SECONDS = 300
+
+# --- How long exit waits for the current batch before leaving it to the outbox ---
+SHUTDOWN_TIMEOUT_SECONDS = 5
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    """Whether a process with this id is running."""
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+class BackgroundIndexer:
+    """
+    Worker thread that indexes outbox entries into a MemoryStore.
+
+    Usage:
+        indexer = get_background_indexer(store)
+        indexer.enqueue_query(question, sql, result_summary, session_id)
+    """
+
+    def __init__(self, store: MemoryStore, outbox_path: Path = OUTBOX_PATH):
+        self.store = store
+        self.outbox_path = Path(outbox_path)
+        self.lock_path = self.outbox_path.with_suffix(".lock")
+        self.failed_path = self.outbox_path.with_name(f"{self.outbox_path.stem}_failed.jsonl")
+        self._queue: queue.Queue = queue.Queue()
+        self._outbox_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._retries: list[tuple[float, dict]] = []  # (due, entry), worker thread only
+
+        # --- Stats ---
+        self.indexed = 0
+        self.failed_attempts = 0
+        self.quarantined = 0
+        self.last_error: Optional[str] = None
+
+        # --- Take over anything left by previous (exited) runs ---
+        for entry in self._claim_leftovers():
+            self._queue.put(entry)
+
+        self._thread = threading.Thread(target=self._run, name="rag-indexer", daemon=True)
+        self._thread.start()
+
+    # =========================================================================
+    # PUBLIC API
+    # =========================================================================
+
+    def enqueue_query(self, question: str, sql: str, result_summary: str, session_id: str = None):
+        """Queue a successful question/SQL/result triplet for indexing."""
+        self._enqueue("query", {
+            "question": question,
+            "sql": sql,
+            "result_summary": result_summary,
+            "session_id": session_id,
+        })
+
+    def enqueue_observation(self, observation: str, topic: str = None, session_id: str = None):
+        """Queue an observation for indexing."""
+        self._enqueue("observation", {
+            "observation": observation,
+            "topic": topic,
+            "session_id": session_id,
+        })
+
+    @property
+    def pending(self) -> int:
+        """Items waiting to be indexed (including ones waiting to retry)."""
+        return self._queue.qsize() + len(self._retries)
+
+    def shutdown(self, timeout: float = SHUTDOWN_TIMEOUT_SECONDS):
+        """Stop the worker; unindexed items stay in the outbox for next run."""
+        self._stop.set()
+        self._queue.put(None)
+        self._thread.join(timeout=timeout)
+
+    # =========================================================================
+    # WORKER
+    # =========================================================================
+
+    def _enqueue(self, kind: str, args: dict):
+        entry = {"id": uuid.uuid4().hex, "kind": kind, "args": args, "pid": os.getpid()}
+        self._append([entry])
+        self._queue.put(entry)
+
+    def _run(self):
+        while not self._stop.is_set():
+            # --- Wake up for new entries, or when the next retry is due ---
+            timeout = None
+            if self._retries:
+                timeout = max(0.0, min(due for due, _ in self._retries) - time.monotonic())
+
+            batch = []
+            try:
+                entry = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                entry = False
+            if entry is None:
+                return
+            if entry:
+                batch.append(entry)
+                # --- Gather whatever else arrives shortly into the same batch ---
+                while len(batch) < MAX_BATCH_SIZE:
+                    try:
+                        entry = self._queue.get(timeout=BATCH_LINGER_SECONDS)
+                    except queue.Empty:
+                        break
+                    if entry is None:
+                        self._stop.set()
+                        break
+                    batch.append(entry)
+
+            batch.extend(self._due_retries(MAX_BATCH_SIZE - len(batch)))
+            if batch:
+                self._index(batch)
+
+    def _index(self, batch: list[dict]):
+        """Index a batch; if it fails, index entries one by one to isolate the bad ones."""
+        try:
+            self.store.index_learned_batch(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                self._failed(batch[0], e)
+                return
+            for entry in batch:
+                try:
+                    self.store.index_learned_batch([entry])
+                except Exception as entry_error:
+                    self._failed(entry, entry_error)
+                else:
+                    self._done([entry])
+            return
+        self._done(batch)
+
+    def _done(self, entries: list[dict]):
+        self.indexed += len(entries)
+        self._append([{"done": [e["id"] for e in entries]}])
+
+    def _failed(self, entry: dict, error: Exception):
+        """Schedule a retry with backoff, or quarantine after MAX_ATTEMPTS."""
+        self.failed_attempts += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+        attempts = entry.get("attempts", 0) + 1
+        entry["attempts"] = attempts
+
+        if attempts >= MAX_ATTEMPTS:
+            self.quarantined += 1
+            with self._locked_outbox():
+                with open(self.failed_path, "a") as f:
+                    f.write(json.dumps({
+                        **entry,
+                        "error": self.last_error,
+                        "failed_at": datetime.now().isoformat(),
+                    }) + "\n")
+                self._write_lines([{"done": [entry["id"]]}])
+            return
+
+        delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+        self._retries.append((time.monotonic() + delay, entry))
+
+    def _due_retries(self, limit: int) -> list[dict]:
+        now = time.monotonic()
+        due = [entry for when, entry in self._retries if when <= now][:max(0, limit)]
+        if due:
+            taken = {id(entry) for entry in due}
+            self._retries = [(when, entry) for when, entry in self._retries if id(entry) not in taken]
+        return due
+
+    # =========================================================================
+    # OUTBOX
+    # =========================================================================
+
+    @contextmanager
+    def _locked_outbox(self):
+        """Thread lock plus an flock shared with other CLI processes."""
+        with self._outbox_lock:
+            self.outbox_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, "a") as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _append(self, records: list[dict]):
+        with self._locked_outbox():
+            self._write_lines(records)
+
+    def _write_lines(self, records: list[dict]):
+        """Append records to the outbox. Caller holds the outbox lock."""
+        with open(self.outbox_path, "a") as f:
+            f.write("".join(json.dumps(record) + "\n" for record in records))
+
+    def _read_outbox(self) -> tuple[dict[str, dict], set[str]]:
+        """Entries by id and finished ids, skipping lines torn by a crash. Caller holds the outbox lock."""
+        entries, done = {}, set()
+        try:
+            with open(self.outbox_path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if "done" in record:
+                        done.update(record["done"])
+                    elif "id" in record:
+                        entries[record["id"]] = record
+        except FileNotFoundError:
+            pass
+        return entries, done
+
+    def _claim_leftovers(self) -> list[dict]:
+        """
+        Rewrite the outbox with only unfinished entries, taking over those
+        whose owning process has exited.
+
+        Returns:
+            Entries this process should index
+        """
+        with self._locked_outbox():
+            entries, done = self._read_outbox()
+            pending = [entry for entry_id, entry in entries.items() if entry_id not in done]
+
+            claimed = []
+            for entry in pending:
+                if not _pid_alive(entry.get("pid")) or entry.get("pid") == os.getpid():
+                    entry["pid"] = os.getpid()
+                    claimed.append(entry)
+
+            tmp_path = self.outbox_path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                for entry in pending:
+                    f.write(json.dumps(entry) + "\n")
+            tmp_path.replace(self.outbox_path)
+        return claimed
+
+
+# Module-level indexer shared across the process
+_indexer: Optional[BackgroundIndexer] = None
+_indexer_lock = threading.Lock()
+
+
+def get_background_indexer(store: MemoryStore) -> BackgroundIndexer:
+    """Get the process-wide background indexer, starting it on first use."""
+    global _indexer
+    with _indexer_lock:
+        if _indexer is None:
+            _indexer = BackgroundIndexer(store)
+            atexit.register(_indexer.shutdown)
+        return _indexer
@@ -0,0 +1,220 @@
+"""
+lexical.py - BM25 inverted index alongside the vector store
+
+Cosine similarity is fuzzy about exact identifiers: a question naming
+`campaign_spend` or `fct_orders` can rank those items below loosely
+related ones. This index scores the same documents (schema items, past
+SQL, observations) with BM25 over identifier-aware tokens, so the
+retriever can fuse both rankings and answer identifier-only questions
+without an embedding call.
+
+The index lives in memory; MemoryStore builds it from its collections on
+first use and keeps it current on every write.
+"""
+
+import math
+import re
+import threading
+from collections import Counter
+
+
+# --- BM25 parameters ---
+K1 = 1.5
+B = 0.75
+
+# --- Identifier-shaped words: snake_case or schema-qualified ---
+TOKEN = re.compile(r"[a-z0-9_]+(?:\.[a-z0-9_]+)*")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split text into search tokens.
+
+    Identifiers are kept whole and also split into parts, so
+    "marts.fct_orders" matches "marts.fct_orders", "fct_orders", "fct"
+    and "orders".
+    """
+    tokens = []
+    for word in TOKEN.findall(text.lower()):
+        tokens.append(word)
+        if "." in word:
+            parts = word.split(".")
+            tokens.extend(parts)
+        else:
+            parts = [word]
+        for part in parts:
+            if "_" in part:
+                tokens.extend(p for p in part.split("_") if p)
+    return tokens
+
+
+def identifiers(text: str) -> set[str]:
+    """Identifier-shaped words in text (contain '_' or '.'), lowercased."""
+    return {w.strip("._") for w in TOKEN.findall(text.lower()) if "_" in w.strip("._") or "." in w}
+
+
+class _Collection:
+    """Postings and document stats for one collection."""
+
+    def __init__(self):
+        self.docs: dict[str, tuple[str, dict, int]] = {}     # id -> (text, metadata, length)
+        self.terms: dict[str, Counter] = {}                  # id -> term frequencies
+        self.postings: dict[str, dict[str, int]] = {}        # term -> {id: tf}
+        self.total_length = 0
+
+    def add(self, item_id: str, text: str, metadata: dict):
+        self.remove(item_id)
+        tf = Counter(tokenize(text))
+        length = sum(tf.values())
+        self.docs[item_id] = (text, metadata or {}, length)
+        self.terms[item_id] = tf
+        self.total_length += length
+        for term, count in tf.items():
+            self.postings.setdefault(term, {})[item_id] = count
+
+    def remove(self, item_id: str):
+        if item_id not in self.docs:
+            return
+        self.total_length -= self.docs.pop(item_id)[2]
+        for term in self.terms.pop(item_id):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(item_id, None)
+                if not posting:
+                    del self.postings[term]
+
+    def search(self, query_terms: list[str], n_results: int) -> list[tuple[str, float]]:
+        """BM25 top-n as (id, score)."""
+        n_docs = len(self.docs)
+        if not n_docs:
+            return []
+        avg_length = self.total_length / n_docs or 1.0
+
+        scores: dict[str, float] = {}
+        for term in set(query_terms):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for item_id, tf in posting.items():
+                length = self.docs[item_id][2]
+                norm = tf + K1 * (1 - B + B * length / avg_length)
+                scores[item_id] = scores.get(item_id, 0.0) + idf * tf * (K1 + 1) / norm
+
+        return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:n_results]
+
+
+class LexicalIndex:
+    """
+    In-memory BM25 index over the memory collections.
+
+    Thread-safe. Search results use the same shape as MemoryStore.search,
+    with a 'score' (BM25) instead of a 'distance'.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._collections: dict[str, _Collection] = {}
+        # --- Exact schema names -> schema item ids (and back) ---
+        self._names: dict[str, set[str]] = {}
+        self._item_names: dict[str, set[str]] = {}
+
+    def add(self, collection: str, ids: list[str], texts: list[str], metadatas: list[dict]):
+        """Add or replace documents."""
+        with self._lock:
+            coll = self._collections.setdefault(collection, _Collection())
+            for item_id, text, metadata in zip(ids, texts, metadatas):
+                if collection == "schema":
+                    self._forget_names(item_id)
+                coll.add(item_id, text, metadata)
+                if collection == "schema":
+                    names = self._schema_names(metadata or {})
+                    self._item_names[item_id] = names
+                    for name in names:
+                        self._names.setdefault(name, set()).add(item_id)
+
+    def remove(self, collection: str, ids: list[str]):
+        with self._lock:
+            coll = self._collections.get(collection)
+            if coll is None:
+                return
+            for item_id in ids:
+                coll.remove(item_id)
+                if collection == "schema":
+                    self._forget_names(item_id)
+
+    def clear(self, collection: str):
+        with self._lock:
+            self._collections.pop(collection, None)
+            if collection == "schema":
+                self._names.clear()
+                self._item_names.clear()
+
+    def search(self, query: str, collection: str, n_results: int = 5) -> list[dict]:
+        """
+        BM25 search of one collection.
+
+        Returns:
+            List of dicts with 'id', 'text', 'metadata' and 'score' keys
+        """
+        with self._lock:
+            coll = self._collections.get(collection)
+            if coll is None:
+                return []
+            hits = coll.search(tokenize(query), n_results)
+            return [
+                {"id": item_id, "text": coll.docs[item_id][0], "metadata": coll.docs[item_id][1], "score": score}
+                for item_id, score in hits
+            ]
+
+    def get(self, collection: str, ids: set[str]) -> list[dict]:
+        """Documents by id, in the same shape as search() with a score of 0."""
+        with self._lock:
+            coll = self._collections.get(collection)
+            if coll is None:
+                return []
+            return [
+                {"id": item_id, "text": coll.docs[item_id][0], "metadata": coll.docs[item_id][1], "score": 0.0}
+                for item_id in ids if item_id in coll.docs
+            ]
+
+    def exact_schema_matches(self, query: str) -> set[str]:
+        """
+        Schema item ids named exactly by the question.
+
+        Returns a non-empty set only when the question contains at least
+        one identifier and every identifier in it is a known table or
+        column name - the high-confidence case where no embedding is needed.
+        """
+        names = identifiers(query)
+        if not names:
+            return set()
+        with self._lock:
+            if any(name not in self._names for name in names):
+                return set()
+            return set().union(*(self._names[name] for name in names))
+
+    # =========================================================================
+    # INTERNAL HELPERS
+    # =========================================================================
+
+    @staticmethod
+    def _schema_names(metadata: dict) -> set[str]:
+        """Names a schema item answers to: a table (qualified or bare) or a column."""
+        table = (metadata.get("table_name") or "").lower()
+        column = (metadata.get("column_name") or "").lower()
+        bare_table = table.split(".")[-1]
+        if column:
+            return {column, f"{bare_table}.{column}", f"{table}.{column}"}
+        if table:
+            return {table, bare_table}
+        return set()
+
+    def _forget_names(self, item_id: str):
+        """Drop an item from the name map. Caller holds the lock."""
+        for name in self._item_names.pop(item_id, ()):
+            ids = self._names.get(name)
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del self._names[name]
@@ -0,0 +1,492 @@
+"""
+numpy_store.py - In-process vector store on memory-mapped NumPy matrices
+
+A drop-in alternative to ChromaDB for MemoryStore (config: vector_store =
+"numpy"). Our collections hold thousands of vectors, where exact
+brute-force search - one matrix-vector product - beats HNSW and needs no
+SQLite, index files or heavy import.
+
+Layout (one directory per collection):
+    ~/.astroagent/memory/vectors/<collection>/
+        vectors.bin  - row-normalized vectors in the storage dtype,
+                       append-only, opened with np.memmap
+        items.jsonl  - append-only log: a header line (collection metadata,
+                       dtype, dimension), then one record per stored item
+                       (id, row, document, metadata, int8 scale) or deletion
+        lock         - flock target; writers hold it exclusively
+
+Writes append a row and a log record instead of rewriting the matrix; a
+replaced or deleted item leaves a dead row behind, and the files are
+rewritten once dead rows outnumber live ones. Every operation first
+applies records other instances (or processes) appended since, so a
+stale instance never writes an old snapshot back.
+
+Storage dtype (config: vector_dtype): float16 (default), float32 or int8.
+
+Only the subset of the Chroma client/collection API that MemoryStore uses
+is implemented: get/create/delete_collection and count, query, upsert,
+get, delete.
+"""
+
+import json
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+from ..config import get_setting
+
+
+# --- Storage location ---
+VECTORS_DIR = Path.home() / ".astroagent" / "memory" / "vectors"
+
+VECTOR_DTYPES = ("float16", "float32", "int8")
+DEFAULT_VECTOR_DTYPE = "float16"
+
+# --- Rewrite a collection's files once dead rows outnumber live ones (and at least this many) ---
+COMPACT_MIN_DEAD_ROWS = 256
+
+
+def _matches(metadata: dict, where: Optional[dict]) -> bool:
+    """Chroma-style equality filter: {"key": value}, {"key": {"$eq": value}}, {"$and": [...]}."""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(_matches(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            if "$eq" in condition and metadata.get(key) != condition["$eq"]:
+                return False
+            if "$ne" in condition and metadata.get(key) == condition["$ne"]:
+                return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+def _collection_exists(directory: Path) -> bool:
+    return (directory / "items.jsonl").exists()
+
+
+class NumpyCollection:
+    """One collection: an append-only vector file plus its item log."""
+
+    def __init__(self, directory: Path, name: str, metadata: dict = None, dtype: str = None):
+        self.name = name
+        self.directory = directory
+        self._vectors_path = directory / "vectors.bin"
+        self._log_path = directory / "items.jsonl"
+        self._lock_path = directory / "lock"
+        self._lock = threading.RLock()
+
+        # --- Header used if the files have to be (re)created ---
+        self.metadata = metadata or {}
+        self.dtype = dtype or DEFAULT_VECTOR_DTYPE
+        self.dim = 0
+        self._reset()
+
+        with self._lock, self._file_lock(exclusive=True):
+            self._catch_up(create=True)
+
+    # =========================================================================
+    # CHROMA-COMPATIBLE API
+    # =========================================================================
+
+    def count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._rows)
+
+    def query(
+        self,
+        query_embeddings: list[list[float]],
+        n_results: int = 10,
+        where: dict = None,
+        include: list[str] = None,
+    ) -> dict:
+        """Exact top-k by cosine similarity. Distances are 1 - cosine, like Chroma's cosine space."""
+        with self._lock:
+            self._refresh()
+            ids, rows, documents, metadatas = self._live_items()
+            vectors, scales = self._vectors, self._scales_array()
+
+        out = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for embedding in query_embeddings:
+            if vectors is None or not ids:
+                for key in out:
+                    out[key].append([])
+                continue
+
+            query = np.asarray(embedding, dtype=np.float32)
+            query /= np.linalg.norm(query) or 1.0
+
+            # --- One matmul over every row, then keep the live ones ---
+            similarities = self._similarities(vectors, query)
+            if self.dtype == "int8":
+                similarities = similarities * scales
+            similarities = similarities[rows]
+
+            if where:
+                mask = np.array([_matches(meta, where) for meta in metadatas], dtype=bool)
+                similarities = np.where(mask, similarities, -np.inf)
+
+            k = min(n_results, int(np.isfinite(similarities).sum()))
+            if k <= 0:
+                top = np.array([], dtype=int)
+            elif k < len(similarities):
+                top = np.argpartition(-similarities, k - 1)[:k]
+                top = top[np.argsort(-similarities[top])]
+            else:
+                top = np.argsort(-similarities)[:k]
+
+            out["ids"].append([ids[i] for i in top])
+            out["documents"].append([documents[i] for i in top])
+            out["metadatas"].append([metadatas[i] for i in top])
+            out["distances"].append([float(1 - similarities[i]) for i in top])
+        return out
+
+    def upsert(self, ids: list[str], embeddings: list[list[float]], documents: list[str], metadatas: list[dict]):
+        """Add or replace items by appending rows and log records."""
+        new = self._normalize(np.asarray(embeddings, dtype=np.float32))
+        with self._lock, self._file_lock(exclusive=True):
+            self._catch_up(create=True)
+            if self.dim == 0:
+                # --- First vectors fix the dimension; the collection is empty here ---
+                self.dim = int(new.shape[1])
+                self._write_files([], np.zeros((0, self.dim), dtype=self.dtype))
+                self._reset()
+                self._catch_up()
+            elif new.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {new.shape[1]} does not match collection ({self.dim})")
+
+            stored, scales = self._quantize(new)
+            start = self._n_rows
+            row_bytes = self.dim * np.dtype(self.dtype).itemsize
+
+            # --- Drop any partial rows a crashed writer left, then append ---
+            if self._vectors_path.exists() and self._vectors_path.stat().st_size != start * row_bytes:
+                os.truncate(self._vectors_path, start * row_bytes)
+            with open(self._vectors_path, "ab") as f:
+                f.write(np.ascontiguousarray(stored).tobytes())
+
+            self._append_log([
+                {"id": item_id, "row": start + i, "document": document, "metadata": metadata or {}, "scale": float(scale)}
+                for i, (item_id, document, metadata, scale) in enumerate(zip(ids, documents, metadatas, scales))
+            ])
+            self._maybe_compact()
+
+    def get(self, ids: list[str] = None, where: dict = None, include: list[str] = None) -> dict:
+        """Items by id and/or metadata filter (all items by default)."""
+        include = include or ["documents", "metadatas"]
+        with self._lock:
+            self._refresh()
+            if ids is not None:
+                selected = [i for i in ids if i in self._rows]
+            else:
+                selected = list(self._rows)
+            if where:
+                selected = [i for i in selected if _matches(self._metadatas[i], where)]
+
+            out = {"ids": selected}
+            if "documents" in include:
+                out["documents"] = [self._documents[i] for i in selected]
+            if "metadatas" in include:
+                out["metadatas"] = [self._metadatas[i] for i in selected]
+            if "embeddings" in include:
+                rows = [self._rows[i] for i in selected]
+                out["embeddings"] = self._dense(rows).tolist()
+            return out
+
+    def delete(self, ids: list[str] = None, where: dict = None):
+        with self._lock, self._file_lock(exclusive=True):
+            self._catch_up(create=True)
+            drop = [i for i in dict.fromkeys(ids or []) if i in self._rows]
+            if where:
+                drop_set = set(drop)
+                drop += [i for i, meta in self._metadatas.items() if i not in drop_set and _matches(meta, where)]
+            if not drop:
+                return
+            self._append_log([{"delete": drop}])
+            self._maybe_compact()
+
+    # =========================================================================
+    # LOG AND FILES
+    # =========================================================================
+
+    def _reset(self):
+        """Forget the in-memory view (the header fields are kept)."""
+        self._rows: dict[str, int] = {}        # id -> row in vectors.bin
+        self._documents: dict[str, str] = {}
+        self._metadatas: dict[str, dict] = {}
+        self._scales: list[float] = []         # per row, int8 only
+        self._n_rows = 0                       # rows referenced so far (live + dead)
+        self._vectors = None
+        self._log_ino: Optional[int] = None
+        self._generation: Optional[str] = None  # Random per file write; catches a recreated log reusing an inode
+        self._log_offset = 0
+        self._live = None                      # cached (ids, rows, documents, metadatas)
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """flock across processes; each call opens its own descriptor."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self._lock_path, "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Apply records appended elsewhere, if any. Caller holds self._lock (not the file lock)."""
+        try:
+            st = os.stat(self._log_path)
+        except FileNotFoundError:
+            # --- Collection deleted under us ---
+            if self._log_ino is not None:
+                self._reset()
+            return
+        if st.st_ino == self._log_ino and st.st_size == self._log_offset:
+            return
+        with self._file_lock(exclusive=False):
+            self._catch_up()
+
+    def _catch_up(self, create: bool = False):
+        """Read new log records (or everything, if the log was replaced). Caller holds the file lock."""
+        try:
+            f = open(self._log_path, "rb")
+        except FileNotFoundError:
+            self._reset()
+            if create:
+                self._write_files([], np.zeros((0, self.dim), dtype=self.dtype))
+                f = open(self._log_path, "rb")
+            else:
+                return
+
+        with f:
+            ino = os.fstat(f.fileno()).st_ino
+            generation = json.loads(f.readline() or "{}").get("header", {}).get("generation")
+            if ino != self._log_ino or generation != self._generation:
+                self._reset()
+                self._log_ino, self._generation = ino, generation
+            f.seek(self._log_offset)
+            data = f.read()
+
+        # --- Only complete lines; a torn last line is re-read once finished ---
+        end = data.rfind(b"\n") + 1
+        if end:
+            for line in data[:end].splitlines():
+                if line.strip():
+                    self._apply(json.loads(line))
+            self._log_offset += end
+            self._map_vectors()
+
+    def _apply(self, record: dict):
+        if "header" in record:
+            header = record["header"]
+            self.metadata = header.get("metadata") or {}
+            self.dtype = header.get("dtype", DEFAULT_VECTOR_DTYPE)
+            self.dim = int(header.get("dim", 0))
+        elif "delete" in record:
+            for item_id in record["delete"]:
+                self._rows.pop(item_id, None)
+                self._documents.pop(item_id, None)
+                self._metadatas.pop(item_id, None)
+        else:
+            item_id, row = record["id"], record["row"]
+            self._rows[item_id] = row
+            self._documents[item_id] = record.get("document", "")
+            self._metadatas[item_id] = record.get("metadata") or {}
+            if row >= len(self._scales):
+                self._scales.extend([1.0] * (row + 1 - len(self._scales)))
+            self._scales[row] = record.get("scale", 1.0)
+            self._n_rows = max(self._n_rows, row + 1)
+        self._live = None
+
+    def _append_log(self, records: list[dict]):
+        """Append records and apply them. Caller holds the exclusive file lock and is caught up."""
+        data = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+        with open(self._log_path, "ab") as f:
+            f.write(data)
+        for record in records:
+            self._apply(record)
+        self._log_offset += len(data)
+        self._map_vectors()
+
+    def _map_vectors(self):
+        if self.dim and self._n_rows:
+            self._vectors = np.memmap(self._vectors_path, dtype=self.dtype, mode="r", shape=(self._n_rows, self.dim))
+        else:
+            self._vectors = None
+
+    def _maybe_compact(self):
+        """Rewrite the files without dead rows once they dominate. Caller holds the exclusive file lock."""
+        dead = self._n_rows - len(self._rows)
+        if dead < COMPACT_MIN_DEAD_ROWS or dead <= len(self._rows):
+            return
+        ids = list(self._rows)
+        rows = [self._rows[i] for i in ids]
+        stored = np.asarray(self._vectors[rows]) if rows else np.zeros((0, self.dim), dtype=self.dtype)
+        records = [
+            {"id": item_id, "row": new_row, "document": self._documents[item_id],
+             "metadata": self._metadatas[item_id], "scale": self._scales[old_row]}
+            for new_row, (item_id, old_row) in enumerate(zip(ids, rows))
+        ]
+        self._write_files(records, stored)
+        self._reset()
+        self._catch_up()
+
+    def _write_files(self, records: list[dict], stored: np.ndarray):
+        """Replace both files atomically: vectors first, so a new log never points at old rows."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        header = {"header": {
+            "metadata": self.metadata,
+            "dtype": self.dtype,
+            "dim": self.dim,
+            "generation": uuid.uuid4().hex,
+        }}
+
+        tmp_vectors = self.directory / "vectors.bin.tmp"
+        with open(tmp_vectors, "wb") as f:
+            f.write(np.ascontiguousarray(stored.astype(self.dtype, copy=False)).tobytes())
+        os.replace(tmp_vectors, self._vectors_path)
+
+        tmp_log = self.directory / "items.jsonl.tmp"
+        with open(tmp_log, "w") as f:
+            for record in [header, *records]:
+                f.write(json.dumps(record) + "\n")
+        os.replace(tmp_log, self._log_path)
+
+    # =========================================================================
+    # INTERNAL HELPERS
+    # =========================================================================
+
+    def _live_items(self) -> tuple[list[str], np.ndarray, list[str], list[dict]]:
+        """Live ids with their rows, documents and metadata, aligned. Caller holds self._lock."""
+        if self._live is None:
+            ids = list(self._rows)
+            self._live = (
+                ids,
+                np.asarray([self._rows[i] for i in ids], dtype=np.int64),
+                [self._documents[i] for i in ids],
+                [self._metadatas[i] for i in ids],
+            )
+        return self._live
+
+    def _scales_array(self) -> np.ndarray:
+        return np.asarray(self._scales[:self._n_rows], dtype=np.float32)
+
+    def _quantize(self, vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Vectors in the storage dtype, plus per-row scales (1.0 unless int8)."""
+        if self.dtype == "int8":
+            # --- Symmetric per-row quantization: v ~= q * scale ---
+            peaks = np.abs(vectors).max(axis=1)
+            scales = (np.where(peaks == 0, 1.0, peaks) / 127).astype(np.float32)
+            return np.round(vectors / scales[:, None]).astype(np.int8), scales
+        return vectors.astype(self.dtype), np.ones(len(vectors), dtype=np.float32)
+
+    def _dense(self, rows: list[int]) -> np.ndarray:
+        """Rows as float32 (dequantized). Caller holds self._lock."""
+        if self._vectors is None or not rows:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        dense = np.asarray(self._vectors[rows], dtype=np.float32)
+        if self.dtype == "int8":
+            dense = dense * self._scales_array()[rows][:, None]
+        return dense
+
+    @staticmethod
+    def _similarities(vectors: np.ndarray, query: np.ndarray, block_rows: int = 8192) -> np.ndarray:
+        """vectors @ query in float32; float16/int8 rows are widened block by block for BLAS."""
+        if vectors.dtype == np.float32:
+            return vectors @ query
+        return np.concatenate([
+            np.asarray(vectors[start:start + block_rows], dtype=np.float32) @ query
+            for start in range(0, vectors.shape[0], block_rows)
+        ])
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1.0, norms)
+
+
+class NumpyClient:
+    """Chroma-client lookalike managing NumpyCollections under one directory."""
+
+    def __init__(self, path: Path = VECTORS_DIR, dtype: str = None):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.dtype = dtype or get_setting("vector_dtype", DEFAULT_VECTOR_DTYPE)
+        if self.dtype not in VECTOR_DTYPES:
+            raise ValueError(f"Unknown vector_dtype: {self.dtype}. Use one of: {', '.join(VECTOR_DTYPES)}")
+
+    def get_collection(self, name: str) -> NumpyCollection:
+        directory = self.path / name
+        if not _collection_exists(directory):
+            raise ValueError(f"Collection {name} does not exist.")
+        return NumpyCollection(directory, name)
+
+    def create_collection(self, name: str, metadata: dict = None) -> NumpyCollection:
+        directory = self.path / name
+        if _collection_exists(directory):
+            raise ValueError(f"Collection {name} already exists.")
+        return NumpyCollection(directory, name, metadata=metadata, dtype=self.dtype)
+
+    def get_or_create_collection(self, name: str, metadata: dict = None) -> NumpyCollection:
+        try:
+            return self.get_collection(name)
+        except ValueError:
+            return self.create_collection(name, metadata)
+
+    def delete_collection(self, name: str):
+        shutil.rmtree(self.path / name, ignore_errors=True)
+
+
+def migrate_from_chroma(chroma_path: Path, collection_names: list[str], target: NumpyClient = None) -> dict[str, int]:
+    """
+    Copy collections (vectors, documents, metadata) from a Chroma store.
+
+    Existing NumPy collections of the same name are replaced.
+
+    Returns:
+        Dict mapping collection name to items copied
+    """
+    # --- Import here: only migration needs chromadb in numpy mode ---
+    import chromadb
+    from chromadb.config import Settings
+
+    source = chromadb.PersistentClient(path=str(chroma_path), settings=Settings(anonymized_telemetry=False))
+    target = target or NumpyClient()
+
+    copied = {}
+    for name in collection_names:
+        try:
+            coll = source.get_collection(name=name)
+        except Exception:
+            continue
+        data = coll.get(include=["embeddings", "documents", "metadatas"])
+
+        target.delete_collection(name)
+        dest = target.create_collection(name, metadata=dict(coll.metadata or {}))
+        if data["ids"]:
+            dest.upsert(
+                ids=list(data["ids"]),
+                embeddings=[list(e) for e in data["embeddings"]],
+                documents=list(data["documents"]),
+                metadatas=list(data["metadatas"]),
+            )
+        copied[name] = len(data["ids"])
+    return copied
@@ -3,13 +3,22 @@ retriever.py - Query-time context retrieval for RAG
 
 Retrieves and formats relevant context to inject into LLM prompts.
 Handles ranking, deduplication, and token budget management.
+
+Ranking is hybrid: vector similarity and BM25 (lexical.py) results are
+merged with reciprocal rank fusion, so exact identifiers in a question
+are not outranked by fuzzy matches. A question whose identifiers all name
+known tables/columns is answered from the lexical index alone, without
+an embedding call. Refreshes after the agent touched new tables always
+run the vector search too, so past queries and observations about those
+tables are found.
 """
 
+import re
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional
 
-from .store import MemoryStore
+from .store import MemoryStore, get_memory_store
 
 
 # --- Token budget for retrieved context ---
@@ -22,6 +31,22 @@ TOKEN_BUDGET = {
 # --- Approximate tokens per character ---
 CHARS_PER_TOKEN = 4
 
+# --- Results kept per collection ---
+RESULT_LIMITS = {"schema": 5, "queries": 5, "observations": 3}
+
+# --- Hybrid ranking: candidates fetched per ranker, and the RRF constant ---
+CANDIDATE_MULTIPLIER = 3
+RRF_K = 60
+
+
+def distance_to_score(distance: float) -> float:
+    """
+    Convert a Chroma cosine distance to a 0-1 similarity.
+
+    Cosine distance: 0 = identical, 2 = opposite.
+    """
+    return max(0, 1 - (distance / 2))
+
 
 @dataclass
 class RetrievalResult:
@@ -33,6 +58,7 @@ class RetrievalResult:
     schema_items: list = field(default_factory=list)      # [{text, metadata, score}, ...]
     query_items: list = field(default_factory=list)
     observation_items: list = field(default_factory=list)
+    lexical_only: bool = False  # Answered by the exact-identifier fast path
 
     @property
     def total_items(self) -> int:
@@ -55,9 +81,111 @@ class RetrievalResult:
             parts.append(f"{len(self.query_items)} queries (best: {self.best_query_score:.2f})")
         if self.observation_items:
             parts.append(f"{len(self.observation_items)} obs")
+        if parts and self.lexical_only:
+            parts.append("lexical")
         return ", ".join(parts) if parts else "no matches"
 
 
+# --- SQL tokens for finding tables: string literals and comments (skipped),
+#     parentheses, SELECT, and FROM/JOIN targets (optionally schema-qualified) ---
+SQL_TOKENS = re.compile(
+    r"'(?:[^']|'')*'|--[^\n]*|/\*.*?\*/"
+    r"|(?P<open>\()|(?P<close>\))|(?P<select>\bselect\b)"
+    r"|\b(?:from|join)\s+(?P<table>(?:[a-z_]\w*\.)?[a-z_]\w*)",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def extract_tables(sql: str) -> set[str]:
+    """
+    Lowercased table names referenced by FROM/JOIN clauses.
+
+    Inside parentheses FROM only counts after a SELECT (a subquery), so
+    function arguments like EXTRACT(year FROM order_date) are skipped.
+    """
+    tables = set()
+    subquery = []  # One entry per open parenthesis: whether a SELECT started in it
+    for match in SQL_TOKENS.finditer(sql or ""):
+        if match.group("open"):
+            subquery.append(False)
+        elif match.group("close"):
+            if subquery:
+                subquery.pop()
+        elif match.group("select"):
+            if subquery:
+                subquery[-1] = True
+        elif match.group("table") and (not subquery or subquery[-1]):
+            tables.add(match.group("table").lower())
+    return tables
+
+
+class RetrievalCache:
+    """
+    Per-question memo of retrieval results.
+
+    The agent loop calls the LLM several times per question; retrieval
+    runs once when the question starts and again only when the loop
+    touches tables it had not touched before (the topic moved), instead
+    of on every round-trip.
+    """
+
+    def __init__(self):
+        self.question: str = ""
+        self.tables: set[str] = set()
+        self.result: Optional[RetrievalResult] = None
+        self._stale = True
+
+        # --- Counters (lifetime of the orchestrator) ---
+        self.hits = 0
+        self.misses = 0
+
+    def reset(self, question: str) -> None:
+        """Start a new question; the next lookup retrieves."""
+        self.question = question
+        self.tables = set()
+        self.result = None
+        self._stale = True
+
+    def note_tables(self, tables: set[str]) -> bool:
+        """
+        Record tables touched by a tool call.
+
+        Returns:
+            True if any table is new, which invalidates the cached result
+        """
+        new = tables - self.tables
+        if new:
+            self.tables |= new
+            self._stale = True
+        return bool(new)
+
+    def search_text(self) -> str:
+        """Text to retrieve with: the question plus every table touched so far."""
+        if not self.tables:
+            return self.question
+        return f"{self.question}\nTables: {', '.join(sorted(self.tables))}"
+
+    def get(self) -> Optional[RetrievalResult]:
+        """Cached result, or None if retrieval must run."""
+        if self._stale or self.result is None:
+            return None
+        self.hits += 1
+        return self.result
+
+    def put(self, result: RetrievalResult) -> None:
+        self.misses += 1
+        self.result = result
+        self._stale = False
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups * 100) if lookups else 0.0,
+        }
+
+
 class ContextRetriever:
     """
     Retrieves relevant context for a user question.
@@ -67,8 +195,8 @@ class ContextRetriever:
     """
 
     def __init__(self, store: Optional[MemoryStore] = None):
-        # --- Use provided store or create new one ---
-        self.store = store or MemoryStore()
+        # --- Use provided store or the shared one (also used by /rag and the indexer) ---
+        self.store = store or get_memory_store()
 
     def retrieve(self, question: str) -> str:
         """
@@ -85,7 +213,7 @@ class ContextRetriever:
         result = self.retrieve_with_scores(question)
         return self.format_for_prompt(result)
 
-    def retrieve_with_scores(self, question: str) -> RetrievalResult:
+    def retrieve_with_scores(self, question: str, search_text: str = None) -> RetrievalResult:
         """
         Retrieve relevant context with similarity scores.
 
@@ -93,53 +221,87 @@ class ContextRetriever:
 
         Args:
             question: The user's question
+            search_text: Text to search with instead of the question
+                (RetrievalCache.search_text, which adds touched tables)
 
         Returns:
             RetrievalResult with scored items from each collection
         """
         result = RetrievalResult()
+        search_text = search_text or question
 
         # --- Skip if nothing is indexed ---
         stats = self.store.get_stats()
         if sum(stats.values()) == 0:
             return result
 
-        # --- Search all collections ---
-        raw_results = self.store.search_all(
-            query=question,
-            limits={"schema": 5, "queries": 5, "observations": 3},
+        # --- Lexical candidates (local, no embedding call) ---
+        lexical = {
+            collection: self.store.search_lexical(search_text, collection, n_results=limit * CANDIDATE_MULTIPLIER)
+            for collection, limit in RESULT_LIMITS.items()
+        }
+
+        # --- Fast path: every identifier in the user's question is a known table/column ---
+        # (not on refreshes: touched tables always match, and would skip the vector search)
+        exact = self.store.lexical.exact_schema_matches(question) if search_text == question else set()
+        if exact:
+            result.lexical_only = True
+            ranked = [item for item in lexical["schema"] if item["id"] in exact]
+            seen = {item["id"] for item in ranked}
+            ranked += self.store.lexical.get("schema", exact - seen)
+            result.schema_items = self._fuse([], ranked, RESULT_LIMITS["schema"])
+            result.query_items = self._fuse([], lexical["queries"], RESULT_LIMITS["queries"])
+            result.observation_items = self._fuse([], lexical["observations"], RESULT_LIMITS["observations"])
+            return result
+
+        # --- Vector candidates (one embedding, all collections) ---
+        vector = self.store.search_all(
+            query=search_text,
+            limits={c: limit * CANDIDATE_MULTIPLIER for c, limit in RESULT_LIMITS.items()},
         )
 
-        # --- Convert distances to similarity scores (ChromaDB returns distances) ---
-        # Cosine distance: 0 = identical, 2 = opposite. Convert to 0-1 similarity.
-        def distance_to_score(distance: float) -> float:
-            return max(0, 1 - (distance / 2))
+        # --- Fuse both rankings per collection ---
+        result.schema_items = self._fuse(vector.get("schema", []), lexical["schema"], RESULT_LIMITS["schema"])
+        result.query_items = self._fuse(vector.get("queries", []), lexical["queries"], RESULT_LIMITS["queries"])
+        result.observation_items = self._fuse(
+            vector.get("observations", []), lexical["observations"], RESULT_LIMITS["observations"]
+        )
 
-        # --- Process schema results ---
-        for item in raw_results.get("schema", []):
-            result.schema_items.append({
-                "text": item.get("text", ""),
-                "metadata": item.get("metadata", {}),
-                "score": distance_to_score(item.get("distance", 2)),
-            })
+        return result
+
+    def _fuse(self, vector_items: list[dict], lexical_items: list[dict], limit: int) -> list[dict]:
+        """
+        Merge vector and BM25 rankings with reciprocal rank fusion.
+
+        Each item keeps a 0-1 'score' for display: cosine similarity if
+        the vector search found it, otherwise BM25 relative to the best
+        lexical hit.
+
+        Returns:
+            Up to `limit` items as {text, metadata, score}, best first
+        """
+        fused: dict[str, dict] = {}
 
-        # --- Process query results ---
-        for item in raw_results.get("queries", []):
-            result.query_items.append({
+        for rank, item in enumerate(vector_items):
+            fused[item["id"]] = {
                 "text": item.get("text", ""),
                 "metadata": item.get("metadata", {}),
                 "score": distance_to_score(item.get("distance", 2)),
-            })
+                "rrf": 1 / (RRF_K + rank + 1),
+            }
 
-        # --- Process observation results ---
-        for item in raw_results.get("observations", []):
-            result.observation_items.append({
+        top_lexical = max((item["score"] for item in lexical_items), default=0) or 1.0
+        for rank, item in enumerate(lexical_items):
+            entry = fused.setdefault(item["id"], {
                 "text": item.get("text", ""),
                 "metadata": item.get("metadata", {}),
-                "score": distance_to_score(item.get("distance", 2)),
+                "score": item["score"] / top_lexical if item["score"] else 1.0,
+                "rrf": 0.0,
             })
+            entry["rrf"] += 1 / (RRF_K + rank + 1)
 
-        return result
+        ranked = sorted(fused.values(), key=lambda entry: entry["rrf"], reverse=True)[:limit]
+        return [{"text": e["text"], "metadata": e["metadata"], "score": e["score"]} for e in ranked]
 
     def format_for_prompt(self, result: RetrievalResult) -> str:
         """
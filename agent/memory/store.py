@@ -1,21 +1,38 @@
 """
-store.py - ChromaDB vector storage for RAG
+store.py - Vector storage for RAG
 
-Manages persistent storage of embeddings with metadata.
+Manages persistent storage of embeddings with metadata, in ChromaDB or
+the in-process NumPy store (config: vector_store = "chroma" | "numpy").
 Organizes items into collections by type (schema, queries, observations).
+Each collection records the embedding model and dimension it was built
+with, so vectors from different backends are never mixed.
 """
 
-import chromadb
-from chromadb.config import Settings
+import hashlib
+import json
+import math
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 from datetime import datetime
 
-from .embedder import Embedder
+import numpy as np
+
+from ..config import get_setting
+from .embedder import EMBEDDING_DIMENSIONS, EMBEDDING_MODEL, Embedder
+from .lexical import LexicalIndex
 
 
 # --- Storage location ---
 MEMORY_DIR = Path.home() / ".astroagent" / "memory"
+CHROMA_DIR = MEMORY_DIR / "chroma"
+
+# --- Vector store backends (config: vector_store) ---
+VECTOR_STORES = ("chroma", "numpy")
+DEFAULT_VECTOR_STORE = "chroma"
 
 # --- Collection names for different content types ---
 COLLECTIONS = {
@@ -24,10 +41,51 @@ COLLECTIONS = {
     "observations": "observations", # Insights and patterns learned
 }
 
+# --- Items per Chroma upsert call when writing in bulk ---
+UPSERT_BATCH_SIZE = 1000
+
+# --- Lifecycle of learned items (config: memory_dedup_threshold, memory_ttl_days, memory_max_items) ---
+LIFECYCLE_COLLECTIONS = ("queries", "observations")
+DEFAULT_DEDUP_THRESHOLD = 0.95   # Cosine similarity above which a new item merges into an old one
+DEFAULT_TTL_DAYS = 90            # Unused items expire; each doubling of hits extends this by one TTL
+DEFAULT_MAX_ITEMS = 2000         # Per collection; lowest-retention items are evicted beyond this
+RECENCY_HALF_LIFE_DAYS = 30      # Retention halves for every 30 days since last use
+
+# --- Warehouse fingerprint the schema collection was last synced at ---
+SCHEMA_SYNC_PATH = MEMORY_DIR / "schema_sync.json"
+
+# --- Token rewritten on every write, so other instances and processes notice changes ---
+STORE_VERSION_PATH = MEMORY_DIR / "store_version"
+
+
+def item_fingerprint(text: str) -> str:
+    """Hash of an item's embedded text (name, columns/types, sample)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def open_client(backend: str):
+    """
+    Open the persistent client for a vector store backend.
+
+    Both expose get/create/delete_collection and Chroma's collection API.
+    """
+    if backend == "numpy":
+        from .numpy_store import NumpyClient
+        return NumpyClient()
+    if backend == "chroma":
+        # --- Import here: chromadb is slow to import and unused in numpy mode ---
+        import chromadb
+        from chromadb.config import Settings
+        return chromadb.PersistentClient(
+            path=str(CHROMA_DIR),
+            settings=Settings(anonymized_telemetry=False),
+        )
+    raise ValueError(f"Unknown vector_store: {backend}. Use one of: {', '.join(VECTOR_STORES)}")
+
 
 class MemoryStore:
     """
-    Vector store backed by ChromaDB.
+    Vector store backed by ChromaDB or NumPy matrices.
 
     Provides:
     - Persistent storage of embeddings
@@ -39,22 +97,31 @@ class MemoryStore:
         # --- Ensure storage directory exists ---
         MEMORY_DIR.mkdir(parents=True, exist_ok=True)
 
-        # --- Initialize ChromaDB with persistent storage ---
-        self.client = chromadb.PersistentClient(
-            path=str(MEMORY_DIR / "chroma"),
-            settings=Settings(anonymized_telemetry=False),
-        )
+        # --- Initialize the persistent vector store ---
+        self.backend = get_setting("vector_store", DEFAULT_VECTOR_STORE)
+        self.client = open_client(self.backend)
 
         # --- Initialize embedder for adding new items ---
         self.embedder = Embedder()
 
+        # --- Store version last seen (see _sync) ---
+        self._seen_version = self._read_version()
+
         # --- Get or create collections ---
+        # Collections remember which embedding model filled them; one built
+        # by another backend is left untouched and skipped (see self.mismatched)
         self.collections = {}
+        self.mismatched: dict[str, str] = {}
         for key, name in COLLECTIONS.items():
-            self.collections[key] = self.client.get_or_create_collection(
-                name=name,
-                metadata={"hnsw:space": "cosine"},  # Use cosine similarity
-            )
+            self.collections[key] = self._open_collection(key, name)
+
+        # --- Cached item counts, kept current on writes and re-read when the store version changes ---
+        self._counts_lock = threading.Lock()
+        self._counts = {key: coll.count() for key, coll in self.collections.items()}
+
+        # --- BM25 index over the same documents, built on first use ---
+        self._lexical: Optional[LexicalIndex] = None
+        self._lexical_lock = threading.Lock()
 
     # =========================================================================
     # SCHEMA INDEXING
@@ -72,24 +139,24 @@ class MemoryStore:
             columns: List of column dicts with 'name' and 'type'
             sample_data: Optional sample rows as string
         """
+        self._add_item("schema", *self._table_item(table_name, columns, sample_data))
+
+    def _table_item(self, table_name: str, columns: list[dict], sample_data: str = None) -> tuple[str, str, dict]:
+        """Build (id, text, metadata) for a table entry."""
         # --- Build text representation of table ---
         col_descriptions = ", ".join([f"{c['name']} ({c['type']})" for c in columns])
         text = f"Table: {table_name}\nColumns: {col_descriptions}"
         if sample_data:
             text += f"\nSample data:\n{sample_data}"
 
-        # --- Store with metadata ---
-        self._add_item(
-            collection="schema",
-            item_id=f"table_{table_name}",
-            text=text,
-            metadata={
-                "type": "table",
-                "table_name": table_name,
-                "column_names": ",".join([c["name"] for c in columns]),
-                "indexed_at": datetime.now().isoformat(),
-            },
-        )
+        metadata = {
+            "type": "table",
+            "table_name": table_name,
+            "column_names": ",".join([c["name"] for c in columns]),
+            "fingerprint": item_fingerprint(text),
+            "indexed_at": datetime.now().isoformat(),
+        }
+        return f"table_{table_name}", text, metadata
 
     def index_column(self, table_name: str, column_name: str, column_type: str, sample_values: list = None):
         """
@@ -103,23 +170,30 @@ class MemoryStore:
             column_type: Data type
             sample_values: Optional sample values
         """
+        self._add_item("schema", *self._column_item(table_name, column_name, column_type, sample_values))
+
+    def _column_item(
+        self,
+        table_name: str,
+        column_name: str,
+        column_type: str,
+        sample_values: list = None,
+    ) -> tuple[str, str, dict]:
+        """Build (id, text, metadata) for a column entry."""
         # --- Build column-specific text ---
         text = f"Column: {table_name}.{column_name} (type: {column_type})"
         if sample_values:
             text += f"\nSample values: {', '.join(str(v) for v in sample_values[:5])}"
 
-        self._add_item(
-            collection="schema",
-            item_id=f"col_{table_name}_{column_name}",
-            text=text,
-            metadata={
-                "type": "column",
-                "table_name": table_name,
-                "column_name": column_name,
-                "column_type": column_type,
-                "indexed_at": datetime.now().isoformat(),
-            },
-        )
+        metadata = {
+            "type": "column",
+            "table_name": table_name,
+            "column_name": column_name,
+            "column_type": column_type,
+            "fingerprint": item_fingerprint(text),
+            "indexed_at": datetime.now().isoformat(),
+        }
+        return f"col_{table_name}_{column_name}", text, metadata
 
     # =========================================================================
     # QUERY HISTORY INDEXING
@@ -143,25 +217,31 @@ class MemoryStore:
             result_summary: Brief summary of the result
             session_id: Optional session identifier
         """
+        return self._add_or_merge("queries", *self._query_item(question, sql, result_summary, session_id))
+
+    def _query_item(
+        self,
+        question: str,
+        sql: str,
+        result_summary: str,
+        session_id: str = None,
+    ) -> tuple[str, str, dict]:
+        """Build (id, text, metadata) for a query history entry."""
         # --- Combine question and SQL for richer embedding ---
         text = f"Question: {question}\nSQL: {sql}\nResult: {result_summary}"
 
         # --- Generate unique ID from timestamp ---
         item_id = f"query_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
 
-        self._add_item(
-            collection="queries",
-            item_id=item_id,
-            text=text,
-            metadata={
-                "type": "query",
-                "question": question,
-                "sql": sql,
-                "result_summary": result_summary[:500],  # Truncate long results
-                "session_id": session_id or "",
-                "indexed_at": datetime.now().isoformat(),
-            },
-        )
+        metadata = {
+            "type": "query",
+            "question": question,
+            "sql": sql,
+            "result_summary": result_summary[:500],  # Truncate long results
+            "session_id": session_id or "",
+            "indexed_at": datetime.now().isoformat(),
+        }
+        return item_id, text, metadata
 
     # =========================================================================
     # OBSERVATION INDEXING
@@ -176,19 +256,221 @@ class MemoryStore:
             topic: Optional topic/category
             session_id: Optional session identifier
         """
+        return self._add_or_merge("observations", *self._observation_item(observation, topic, session_id))
+
+    def _observation_item(self, observation: str, topic: str = None, session_id: str = None) -> tuple[str, str, dict]:
+        """Build (id, text, metadata) for an observation entry."""
         item_id = f"obs_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
 
-        self._add_item(
-            collection="observations",
-            item_id=item_id,
-            text=observation,
-            metadata={
-                "type": "observation",
-                "topic": topic or "",
-                "session_id": session_id or "",
-                "indexed_at": datetime.now().isoformat(),
-            },
+        metadata = {
+            "type": "observation",
+            "topic": topic or "",
+            "session_id": session_id or "",
+            "indexed_at": datetime.now().isoformat(),
+        }
+        return item_id, observation, metadata
+
+    def index_learned_batch(self, entries: list[dict]) -> list[str]:
+        """
+        Index several past queries/observations with one embedding call.
+
+        Args:
+            entries: Dicts with "kind" ("query" or "observation") and the
+                     keyword arguments of index_query / index_observation
+
+        Returns:
+            Ids the entries were stored (or merged) under, in order
+        """
+        built = []
+        for entry in entries:
+            kwargs = entry.get("args", {})
+            if entry.get("kind") == "query":
+                built.append(("queries", self._query_item(**kwargs)))
+            else:
+                built.append(("observations", self._observation_item(**kwargs)))
+        if not built:
+            return []
+
+        embeddings = self.embedder.embed_batch([text for _, (_, text, _) in built])
+        return [
+            self._add_or_merge(collection, item_id, text, metadata, embedding=embedding)
+            for (collection, (item_id, text, metadata)), embedding in zip(built, embeddings)
+        ]
+
+    # =========================================================================
+    # LIFECYCLE (queries + observations)
+    # =========================================================================
+
+    def _add_or_merge(
+        self,
+        collection: str,
+        item_id: str,
+        text: str,
+        metadata: dict,
+        embedding: list[float] = None,
+    ) -> str:
+        """
+        Add a learned item, merging it into a near-duplicate if one exists.
+
+        A merge keeps the existing id and creation time, takes the new
+        text/metadata (the latest answer wins), and bumps hit_count and
+        last_used. Evicts by retention if the collection is over its cap.
+
+        Returns:
+            The id the item was stored under
+        """
+        self._sync()
+        self._check_writable(collection)
+        coll = self.collections[collection]
+        if embedding is None:
+            embedding = self.embedder.embed(text)
+
+        now = datetime.now().isoformat()
+        metadata = {**metadata, "hit_count": 1, "created_at": now, "last_used": now}
+
+        # --- Dedup-on-write against the nearest existing item ---
+        if self._counts[collection] > 0:
+            nearest = coll.query(query_embeddings=[embedding], n_results=1, include=["metadatas", "distances"])
+            if nearest["ids"] and nearest["ids"][0]:
+                similarity = 1 - nearest["distances"][0][0]
+                if similarity >= get_setting("memory_dedup_threshold", DEFAULT_DEDUP_THRESHOLD):
+                    existing = nearest["metadatas"][0][0] or {}
+                    item_id = nearest["ids"][0][0]
+                    metadata["hit_count"] = int(existing.get("hit_count", 1)) + 1
+                    metadata["created_at"] = existing.get("created_at") or existing.get("indexed_at") or now
+
+        coll.upsert(ids=[item_id], embeddings=[embedding], documents=[text], metadatas=[metadata])
+        self._refresh_count(collection)
+        self._lexical_add(collection, [item_id], [text], [metadata])
+
+        if self._counts[collection] > get_setting("memory_max_items", DEFAULT_MAX_ITEMS):
+            self._evict(collection)
+        return item_id
+
+    def compact(self) -> dict[str, dict]:
+        """
+        Compact the learned-item collections.
+
+        Per collection: drop expired items, merge near-duplicate clusters
+        into their most recently used member (summing hit counts), then
+        evict down to the size cap.
+
+        Returns:
+            Dict of collection -> {"expired", "merged", "evicted", "remaining"}
+        """
+        self._sync()
+        report = {}
+        threshold = get_setting("memory_dedup_threshold", DEFAULT_DEDUP_THRESHOLD)
+
+        for collection in LIFECYCLE_COLLECTIONS:
+            counts = {"expired": 0, "merged": 0, "evicted": 0}
+            if self._counts[collection] == 0 or collection in self.mismatched:
+                report[collection] = {**counts, "remaining": self._counts[collection]}
+                continue
+
+            coll = self.collections[collection]
+            data = coll.get(include=["embeddings", "documents", "metadatas"])
+            ids = list(data["ids"])
+            metadatas = [dict(m or {}) for m in data["metadatas"]]
+            now = datetime.now()
+
+            # --- TTL ---
+            expired = [i for i, meta in zip(ids, metadatas) if self._is_expired(meta, now)]
+            expired_set = set(expired)
+
+            # --- Merge near-duplicates, newest member of each cluster survives ---
+            live = [k for k in range(len(ids)) if ids[k] not in expired_set]
+            live.sort(key=lambda k: self._age_days(metadatas[k], now))
+            vectors = np.asarray([data["embeddings"][k] for k in live], dtype=np.float32)
+            if len(vectors):
+                vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            similarities = vectors @ vectors.T if len(vectors) else np.zeros((0, 0))
+
+            absorbed = np.zeros(len(live), dtype=bool)
+            merged_ids, updated = [], []
+            for a in range(len(live)):
+                if absorbed[a]:
+                    continue
+                duplicates = np.where((similarities[a] >= threshold) & ~absorbed)[0]
+                duplicates = duplicates[duplicates != a]
+                if not len(duplicates):
+                    continue
+                absorbed[duplicates] = True
+                keep = live[a]
+                hits = sum(int(metadatas[live[d]].get("hit_count", 1)) for d in duplicates)
+                metadatas[keep]["hit_count"] = int(metadatas[keep].get("hit_count", 1)) + hits
+                merged_ids.extend(ids[live[d]] for d in duplicates)
+                updated.append(keep)
+
+            if updated:
+                coll.upsert(
+                    ids=[ids[k] for k in updated],
+                    embeddings=[list(data["embeddings"][k]) for k in updated],
+                    documents=[data["documents"][k] for k in updated],
+                    metadatas=[metadatas[k] for k in updated],
+                )
+                self._lexical_add(
+                    collection, [ids[k] for k in updated], [data["documents"][k] for k in updated],
+                    [metadatas[k] for k in updated],
+                )
+
+            self._delete(collection, expired + merged_ids)
+            counts["expired"] = len(expired)
+            counts["merged"] = len(merged_ids)
+            counts["evicted"] = self._evict(collection)
+            report[collection] = {**counts, "remaining": self._counts[collection]}
+
+        return report
+
+    def _evict(self, collection: str) -> int:
+        """Delete the lowest-retention items beyond the size cap. Returns the number removed."""
+        max_items = get_setting("memory_max_items", DEFAULT_MAX_ITEMS)
+        excess = self._counts[collection] - max_items
+        if excess <= 0:
+            return 0
+
+        data = self.collections[collection].get(include=["metadatas"])
+        now = datetime.now()
+        ranked = sorted(
+            zip(data["ids"], data["metadatas"]),
+            key=lambda pair: self._retention(pair[1] or {}, now),
         )
+        victims = [item_id for item_id, _ in ranked[:excess]]
+        self._delete(collection, victims)
+        return len(victims)
+
+    def _delete(self, collection: str, ids: list[str]):
+        """Delete items from a collection and its lexical mirror."""
+        if not ids:
+            return
+        coll = self.collections[collection]
+        for start in range(0, len(ids), UPSERT_BATCH_SIZE):
+            coll.delete(ids=ids[start:start + UPSERT_BATCH_SIZE])
+        self._refresh_count(collection)
+        if self._lexical is not None:
+            self._lexical.remove(collection, ids)
+
+    @staticmethod
+    def _age_days(metadata: dict, now: datetime) -> float:
+        """Days since the item was last used (or indexed, for older items)."""
+        stamp = metadata.get("last_used") or metadata.get("indexed_at")
+        try:
+            return max(0.0, (now - datetime.fromisoformat(stamp)).total_seconds() / 86400)
+        except (TypeError, ValueError):
+            return 0.0
+
+    def _retention(self, metadata: dict, now: datetime) -> float:
+        """Usage- and recency-weighted value of keeping an item (higher = keep)."""
+        hits = max(1, int(metadata.get("hit_count", 1)))
+        return (1 + math.log(hits)) * 0.5 ** (self._age_days(metadata, now) / RECENCY_HALF_LIFE_DAYS)
+
+    def _is_expired(self, metadata: dict, now: datetime) -> bool:
+        """Past the TTL, which stretches with each doubling of hit_count."""
+        ttl_days = get_setting("memory_ttl_days", DEFAULT_TTL_DAYS)
+        if not ttl_days:
+            return False
+        hits = max(1, int(metadata.get("hit_count", 1)))
+        return self._age_days(metadata, now) > ttl_days * (1 + math.log2(hits))
 
     # =========================================================================
     # RETRIEVAL
@@ -215,19 +497,46 @@ class MemoryStore:
         """
         if collection not in self.collections:
             raise ValueError(f"Unknown collection: {collection}")
+        self._sync()
 
-        coll = self.collections[collection]
-
-        # --- Skip if collection is empty ---
-        if coll.count() == 0:
+        # --- Skip if collection is empty (or holds another model's vectors) ---
+        if self._counts[collection] == 0 or collection in self.mismatched:
             return []
 
         # --- Embed query and search ---
         query_embedding = self.embedder.embed(query)
+        return self.search_by_embedding(query_embedding, collection, n_results, where)
+
+    def search_by_embedding(
+        self,
+        embedding: list[float],
+        collection: str,
+        n_results: int = 5,
+        where: dict = None,
+    ) -> list[dict]:
+        """
+        Search a collection with an already computed query embedding.
+
+        Args:
+            embedding: Query vector from self.embedder
+            collection: Which collection to search ('schema', 'queries', 'observations')
+            n_results: Maximum results to return
+            where: Optional metadata filter
+
+        Returns:
+            List of dicts with 'id', 'text', 'metadata', and 'distance' keys
+        """
+        if collection not in self.collections:
+            raise ValueError(f"Unknown collection: {collection}")
+
+        coll = self.collections[collection]
+        count = self._counts[collection]
+        if count == 0 or collection in self.mismatched:
+            return []
 
         results = coll.query(
-            query_embeddings=[query_embedding],
-            n_results=min(n_results, coll.count()),
+            query_embeddings=[embedding],
+            n_results=min(n_results, count),
             where=where,
             include=["documents", "metadatas", "distances"],
         )
@@ -237,6 +546,7 @@ class MemoryStore:
         if results["documents"] and results["documents"][0]:
             for i, doc in enumerate(results["documents"][0]):
                 items.append({
+                    "id": results["ids"][0][i],
                     "text": doc,
                     "metadata": results["metadatas"][0][i] if results["metadatas"] else {},
                     "distance": results["distances"][0][i] if results["distances"] else 0,
@@ -248,6 +558,9 @@ class MemoryStore:
         """
         Search all collections and return combined results.
 
+        The query is embedded once and the non-empty collections are
+        searched concurrently with the same vector.
+
         Args:
             query: The search query text
             limits: Dict of collection -> max results (default: schema=3, queries=3, observations=2)
@@ -256,18 +569,63 @@ class MemoryStore:
             Dict mapping collection names to their results
         """
         limits = limits or {"schema": 3, "queries": 3, "observations": 2}
+        self._sync()
+
+        results = {collection: [] for collection in limits if collection in self.collections}
+        targets = {
+            c: limit for c, limit in limits.items()
+            if c in results and self._counts[c] > 0 and c not in self.mismatched
+        }
+        if not targets:
+            return results
 
-        results = {}
-        for collection, limit in limits.items():
-            if collection in self.collections:
-                results[collection] = self.search(query, collection, n_results=limit)
+        # --- One embedding call, then fan out ---
+        query_embedding = self.embedder.embed(query)
+        with ThreadPoolExecutor(max_workers=len(targets), thread_name_prefix="rag") as pool:
+            futures = {
+                collection: pool.submit(self.search_by_embedding, query_embedding, collection, limit)
+                for collection, limit in targets.items()
+            }
+            for collection, future in futures.items():
+                results[collection] = future.result()
 
         return results
 
+    @property
+    def lexical(self) -> LexicalIndex:
+        """BM25 index over all collections, rebuilt when the store changed elsewhere."""
+        self._sync()
+        with self._lexical_lock:
+            if self._lexical is None:
+                index = LexicalIndex()
+                for key, coll in self.collections.items():
+                    if self._counts[key] == 0 or key in self.mismatched:
+                        continue
+                    data = coll.get(include=["documents", "metadatas"])
+                    index.add(key, data["ids"], data["documents"], data["metadatas"])
+                self._lexical = index
+            return self._lexical
+
+    def search_lexical(self, query: str, collection: str, n_results: int = 5) -> list[dict]:
+        """
+        BM25 search of a collection (no embedding call).
+
+        Returns:
+            List of dicts with 'id', 'text', 'metadata' and 'score' keys
+        """
+        if collection not in self.collections:
+            raise ValueError(f"Unknown collection: {collection}")
+        return self.lexical.search(query, collection, n_results)
+
     # =========================================================================
     # INTERNAL HELPERS
     # =========================================================================
 
+    def _lexical_add(self, collection: str, ids: list[str], texts: list[str], metadatas: list[dict]):
+        """Mirror a write into the BM25 index if it has been built."""
+        if self._lexical is not None:
+            self._lexical.add(collection, ids, texts, metadatas)
+
     def _add_item(self, collection: str, item_id: str, text: str, metadata: dict):
         """
         Add or update an item in a collection.
@@ -278,6 +636,8 @@ class MemoryStore:
             text: Text content to embed
             metadata: Associated metadata
         """
+        self._sync()
+        self._check_writable(collection)
         coll = self.collections[collection]
 
         # --- Generate embedding ---
@@ -290,6 +650,135 @@ class MemoryStore:
             documents=[text],
             metadatas=[metadata],
         )
+        self._refresh_count(collection)
+        self._lexical_add(collection, [item_id], [text], [metadata])
+
+    def _add_items(
+        self,
+        collection: str,
+        items: list[tuple[str, str, dict]],
+        progress: Optional[Callable[[str, int, int], None]] = None,
+    ):
+        """
+        Add or update many items: batched embedding, then bulk upserts.
+
+        Args:
+            collection: Target collection name
+            items: List of (item_id, text, metadata)
+            progress: Optional callback(stage, done, total)
+        """
+        if not items:
+            return
+
+        self._sync()
+        self._check_writable(collection)
+        coll = self.collections[collection]
+        ids = [item[0] for item in items]
+        texts = [item[1] for item in items]
+        metadatas = [item[2] for item in items]
+
+        # --- Embed everything (chunked + concurrent inside embed_batch) ---
+        embed_progress = (lambda done, total: progress("embedding", done, total)) if progress else None
+        embeddings = self.embedder.embed_batch(texts, progress=embed_progress)
+
+        # --- Upsert in large batches ---
+        for start in range(0, len(items), UPSERT_BATCH_SIZE):
+            end = start + UPSERT_BATCH_SIZE
+            coll.upsert(
+                ids=ids[start:end],
+                embeddings=embeddings[start:end],
+                documents=texts[start:end],
+                metadatas=metadatas[start:end],
+            )
+            if progress:
+                progress("storing", min(end, len(items)), len(items))
+
+        self._refresh_count(collection)
+        self._lexical_add(collection, ids, texts, metadatas)
+
+    def _refresh_count(self, collection: str):
+        """Re-read a collection's count after a write (an upsert may replace an item)."""
+        with self._counts_lock:
+            self._counts[collection] = self.collections[collection].count()
+        self._bump_version()
+
+    # =========================================================================
+    # STORE VERSION (writes made through other instances or processes)
+    # =========================================================================
+
+    @staticmethod
+    def _read_version() -> str:
+        try:
+            return STORE_VERSION_PATH.read_text()
+        except FileNotFoundError:
+            return ""
+
+    def _bump_version(self):
+        """Record a write by this instance."""
+        # --- If someone else wrote since our last sync, stay stale so _sync reloads ---
+        stale = self._read_version() != self._seen_version
+        token = uuid.uuid4().hex
+        tmp_path = STORE_VERSION_PATH.with_name(f"store_version.{token}.tmp")
+        tmp_path.write_text(token)
+        os.replace(tmp_path, STORE_VERSION_PATH)
+        self._seen_version = "" if stale else token
+
+    def invalidate(self):
+        """Mark the store as changed out of band (e.g. /rag migrate); every instance reloads."""
+        self._seen_version = ""
+        self._bump_version()
+
+    def _sync(self):
+        """Reload collections and counts if the store changed since this instance last looked."""
+        version = self._read_version()
+        if version == self._seen_version:
+            return
+        with self._counts_lock:
+            self._seen_version = version
+            self.mismatched = {}
+            for key, name in COLLECTIONS.items():
+                self.collections[key] = self._open_collection(key, name)
+            self._counts = {key: coll.count() for key, coll in self.collections.items()}
+        # --- Rebuilt from the store on next use ---
+        with self._lexical_lock:
+            self._lexical = None
+
+    def _collection_metadata(self) -> dict:
+        return {
+            "hnsw:space": "cosine",  # Use cosine similarity
+            "embedding_model": self.embedder.model,
+            "embedding_dimensions": self.embedder.dimensions,
+        }
+
+    def _open_collection(self, key: str, name: str):
+        """Open a collection, checking it was built with the current embedding model."""
+        try:
+            coll = self.client.get_collection(name=name)
+        except Exception:
+            return self.client.create_collection(name=name, metadata=self._collection_metadata())
+
+        meta = coll.metadata or {}
+        # --- Collections from before backends were pluggable hold OpenAI vectors ---
+        model = meta.get("embedding_model", EMBEDDING_MODEL)
+        dimensions = meta.get("embedding_dimensions", EMBEDDING_DIMENSIONS)
+        if model == self.embedder.model and dimensions == self.embedder.dimensions:
+            return coll
+
+        if coll.count() == 0:
+            # --- Empty: rebuild it for the current model ---
+            self.client.delete_collection(name)
+            return self.client.create_collection(name=name, metadata=self._collection_metadata())
+
+        self.mismatched[key] = f"{model} ({dimensions} dims)"
+        return coll
+
+    def _check_writable(self, collection: str):
+        if collection in self.mismatched:
+            raise ValueError(
+                f"Collection '{collection}' holds {self.mismatched[collection]} vectors but the embedding "
+                f"backend is {self.embedder.model} ({self.embedder.dimensions} dims). "
+                f"Switch embedding_backend back or run /rag clear."
+            )
 
     def clear_collection(self, collection: str):
         """Clear all items from a collection."""
@@ -298,59 +787,162 @@ class MemoryStore:
             self.client.delete_collection(COLLECTIONS[collection])
             self.collections[collection] = self.client.create_collection(
                 name=COLLECTIONS[collection],
-                metadata={"hnsw:space": "cosine"},
+                metadata=self._collection_metadata(),
             )
+            self.mismatched.pop(collection, None)
+            if self._lexical is not None:
+                self._lexical.clear(collection)
+            if collection == "schema":
+                SCHEMA_SYNC_PATH.unlink(missing_ok=True)
+            with self._counts_lock:
+                self._counts[collection] = 0
+            self._bump_version()
 
     def get_stats(self) -> dict:
-        """Get item counts for all collections."""
+        """Get item counts for all collections (cached; re-read only after a write elsewhere)."""
+        self._sync()
+        with self._counts_lock:
+            return dict(self._counts)
+
+    def index_schema_from_db(self, progress: Optional[Callable[[str, int, int], None]] = None):
+        """
+        Index database schema from DuckDB.
+
+        Pulls table and column info from one catalog snapshot, samples
+        every table on a single cursor, then embeds and stores all
+        entries in bulk.
+
+        Args:
+            progress: Optional callback(stage, done, total) for display
+
+        Returns:
+            Number of tables indexed
+        """
+        items, fingerprint = self._build_schema_items(progress)
+        self._add_items("schema", items, progress=progress)
+        self._save_schema_sync(fingerprint)
+        return sum(1 for _, _, meta in items if meta["type"] == "table")
+
+    def sync_schema_from_db(self, progress: Optional[Callable[[str, int, int], None]] = None) -> dict:
+        """
+        Bring the schema collection up to date with the live catalog.
+
+        Compares each item's fingerprint with the index and only embeds
+        tables/columns that are new or changed; items for dropped tables
+        and columns are deleted.
+
+        Args:
+            progress: Optional callback(stage, done, total) for display
+
+        Returns:
+            Dict with counts: added, updated, deleted, unchanged
+        """
+        self._sync()
+        items, fingerprint = self._build_schema_items(progress)
+        coll = self.collections["schema"]
+
+        # --- Current index: id -> fingerprint ---
+        indexed = {}
+        if self._counts["schema"] > 0:
+            existing = coll.get(include=["metadatas"])
+            indexed = {
+                item_id: (meta or {}).get("fingerprint")
+                for item_id, meta in zip(existing["ids"], existing["metadatas"])
+            }
+
+        live_ids = {item_id for item_id, _, _ in items}
+        changed = [item for item in items if indexed.get(item[0]) != item[2]["fingerprint"]]
+        dropped = [item_id for item_id in indexed if item_id not in live_ids]
+        added = sum(1 for item_id, _, _ in changed if item_id not in indexed)
+
+        self._add_items("schema", changed, progress=progress)
+        self._delete("schema", dropped)
+
+        self._save_schema_sync(fingerprint)
         return {
-            name: self.collections[name].count()
-            for name in self.collections
+            "added": added,
+            "updated": len(changed) - added,
+            "deleted": len(dropped),
+            "unchanged": len(items) - len(changed),
         }
 
-    def index_schema_from_db(self):
+    def is_schema_stale(self) -> bool:
+        """Whether the warehouse changed since the schema was last indexed or synced."""
+        # --- Import here to avoid circular dependency ---
+        from ..sandbox.connection_pool import warehouse_fingerprint
+
+        try:
+            synced = json.loads(SCHEMA_SYNC_PATH.read_text()).get("fingerprint")
+        except (FileNotFoundError, json.JSONDecodeError):
+            synced = None
+        return synced != warehouse_fingerprint()
+
+    def _save_schema_sync(self, fingerprint: str):
+        try:
+            SCHEMA_SYNC_PATH.write_text(json.dumps({
+                "fingerprint": fingerprint,
+                "synced_at": datetime.now().isoformat(),
+            }))
+        except OSError:
+            pass
+
+    def _build_schema_items(
+        self,
+        progress: Optional[Callable[[str, int, int], None]] = None,
+    ) -> tuple[list[tuple[str, str, dict]], str]:
         """
-        Index database schema from DuckDB.
+        Build (id, text, metadata) for every table and column in the warehouse.
 
-        Pulls table and column info from the schema module
-        and indexes it for semantic retrieval.
+        Returns:
+            (items, warehouse fingerprint of the catalog snapshot)
         """
         # --- Import here to avoid circular dependency ---
-        from ..schema import get_tables, get_columns, get_sample_data
+        from ..schema import get_catalog, get_sample_data_many
+
+        catalog = get_catalog()
+        tables = catalog.get_tables()  # Returns list of {"schema", "table", "type", "estimated_rows"}
 
-        tables = get_tables()  # Returns list of {"schema", "table", "type"}
-        indexed_count = 0
+        # --- Get sample data ---
+        if progress:
+            progress("sampling", 0, len(tables))
+        samples = get_sample_data_many([(t["schema"], t["table"]) for t in tables], limit=3)
 
+        items = []
         for table_info in tables:
             schema_name = table_info["schema"]
             table_name = table_info["table"]
             full_name = f"{schema_name}.{table_name}"
 
             # --- Get column info ---
-            columns = get_columns(schema_name, table_name)  # Returns list of {"name", "type", "nullable"}
+            columns = catalog.get_columns(schema_name, table_name)  # Returns list of {"name", "type", "nullable"}
             col_list = [{"name": c["name"], "type": c["type"]} for c in columns]
 
-            # --- Get sample data ---
-            try:
-                sample_records = get_sample_data(schema_name, table_name, limit=3)
-                sample = str(sample_records) if sample_records else None
-            except Exception:
-                sample = None
+            sample_records = samples.get((schema_name, table_name))
+            sample = str(sample_records) if sample_records else None
 
-            # --- Index the table ---
-            self.index_table(full_name, col_list, sample)
-            indexed_count += 1
+            # --- Table entry ---
+            items.append(self._table_item(full_name, col_list, sample))
 
-            # --- Index individual columns for fine-grained retrieval ---
+            # --- Individual columns for fine-grained retrieval ---
             for col in columns:
-                self.index_column(
-                    table_name=full_name,
-                    column_name=col["name"],
-                    column_type=col["type"],
-                )
+                items.append(self._column_item(full_name, col["name"], col["type"]))
 
-        return indexed_count
+        return items, catalog.fingerprint
 
     def is_schema_indexed(self) -> bool:
         """Check if schema has been indexed."""
-        return self.collections["schema"].count() > 0
+        return self.get_stats()["schema"] > 0
+
+
+# Module-level store shared by /rag, the retriever and the background indexer
+_store: Optional[MemoryStore] = None
+_store_lock = threading.Lock()
+
+
+def get_memory_store() -> MemoryStore:
+    """Get the process-wide MemoryStore, opening it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MemoryStore()
+        return _store
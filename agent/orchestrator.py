@@ -12,17 +12,30 @@ This module manages the flow between:
 The key architectural guarantee is that final answers can ONLY come
 through the submit_result tool, ensuring all data originates from
 real database execution, not LLM generation.
+
+The loop itself is asyncio-based (AsyncOrchestrator): LLM calls use
+AsyncOpenAI, while blocking work - DuckDB queries, sandbox code, RAG
+retrieval - runs on executors off the event loop. Orchestrator is the
+synchronous wrapper the CLI uses.
 """
 
+import asyncio
+import atexit
+import functools
 import json
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 from typing import Generator
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 from typing import Optional
-from .config import get_api_key
+from .config import get_api_key, get_setting
 from .settings import AgentSettings, OutputMode
 from .session import SessionManager
-from .memory import ContextRetriever  # --- RAG: Import retriever ---
+from .history import HistoryCompactor
+from .memory import ContextRetriever, RetrievalCache  # --- RAG: Import retriever ---
+from .memory.retriever import extract_tables
+from .memory.indexer import BackgroundIndexer, get_background_indexer
 from .theme import console, print_thinking, print_error, print_warning, print_divider, tool_status, print_tool_call, print_tool_result_preview
 from .display import display_submit_result
 
@@ -41,7 +54,7 @@ from .tools.output.send_message import SEND_MESSAGE_TOOL, send_message
 from .display import display_observation
 
 
-class Orchestrator:
+class AsyncOrchestrator:
     """
     Manages the agent loop: question → reasoning → tools → answer submission.
 
@@ -51,8 +64,11 @@ class Orchestrator:
     3. The submit_result tool produces the final output to the user
     4. The LLM cannot directly output data values
 
+    One instance serves one conversation; several can run concurrently on
+    the same event loop.
+
     Attributes:
-        client: OpenAI API client
+        client: Async OpenAI API client
         model: Model identifier to use
         tools: List of tool definitions for function calling
         conversation_history: Message history for context
@@ -84,6 +100,15 @@ class Orchestrator:
         "send_message": send_message,
     }
 
+    # Internal tools that only read state - safe to start before their turn
+    READ_ONLY_TOOLS = frozenset({
+        "run_sql",
+        "run_python",
+        "inspect_schema",
+        "inspect_platform",
+        "read_context",
+    })
+
     def __init__(self, settings: Optional[AgentSettings] = None, session_manager: Optional[SessionManager] = None):
         """
         Initialize the orchestrator.
@@ -96,21 +121,44 @@ class Orchestrator:
         if not api_key:
             raise ValueError("OpenAI API key not configured. Run 'astro config' first.")
 
-        self.client = OpenAI(api_key=api_key)
+        self.client = AsyncOpenAI(api_key=api_key)
         self.settings = settings or AgentSettings()
         self.session_manager = session_manager or SessionManager(self.settings.model)
 
         # --- RAG: Initialize context retriever ---
         self._retriever: Optional[ContextRetriever] = None
         self._current_question: str = ""  # Track for indexing after success
+        self.retrieval_cache = RetrievalCache()  # Retrieval runs once per question/topic
+        self.history_compactor = HistoryCompactor()  # Bounds the history sent per call
+
+        # --- Streaming: read-only tool calls started while the response streams, by call id ---
+        self._tool_executor: Optional[ThreadPoolExecutor] = None
+        self._started_tools: dict[str, asyncio.Future] = {}
 
     @property
     def retriever(self) -> ContextRetriever:
         """Lazy-load retriever to avoid startup delay if not needed."""
         if self._retriever is None:
             self._retriever = ContextRetriever()
+            # --- Start indexing early so leftovers from the last run are picked up ---
+            get_background_indexer(self._retriever.store)
         return self._retriever
 
+    @property
+    def indexer(self) -> BackgroundIndexer:
+        """Background indexer for answers (shares the retriever's store)."""
+        return get_background_indexer(self.retriever.store)
+
+    @property
+    def tool_executor(self) -> ThreadPoolExecutor:
+        """Bounded pool for tool execution (DuckDB and sandbox work) off the event loop."""
+        if self._tool_executor is None:
+            self._tool_executor = ThreadPoolExecutor(
+                max_workers=max(1, get_setting("max_parallel_tools", 4)),
+                thread_name_prefix="tool",
+            )
+        return self._tool_executor
+
     @property
     def conversation_history(self) -> list:
         """Get conversation history from session manager."""
@@ -238,7 +286,7 @@ Format results for human readability using f-strings.
 NEVER write data values in your text responses. ALWAYS use submit_result to deliver answers.
 After exploring with run_sql, you MUST call submit_result - do not summarize findings in text."""
 
-    def process_question(self, question: str) -> None:
+    async def process_question(self, question: str) -> None:
         """
         Process a user question through the agent loop.
 
@@ -253,19 +301,33 @@ After exploring with run_sql, you MUST call submit_result - do not summarize fin
         """
         # --- RAG: Track question for indexing after successful answer ---
         self._current_question = question
+        self.retrieval_cache.reset(question)
+        self._discard_started_tools()
 
         self.conversation_history.append({
             "role": "user",
             "content": question
         })
 
+        try:
+            await self._run_agent_loop()
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            # Ctrl+C (delivered as task cancellation by the runner): keep
+            # history valid for the next question, then let the REPL
+            # report the cancellation
+            self._discard_started_tools()
+            self._close_pending_tool_calls("Cancelled by user.")
+            raise
+
+    async def _run_agent_loop(self) -> None:
+        """Call the LLM and execute tools until an answer is submitted."""
         # Agent loop: keep going until we get a final answer
         while True:
-            response = self._call_llm()
+            response = await self._call_llm()
 
             # Check if the LLM wants to call tools
             if response.choices[0].message.tool_calls:
-                should_continue = self._handle_tool_calls(
+                should_continue = await self._handle_tool_calls(
                     response.choices[0].message
                 )
                 if not should_continue:
@@ -275,7 +337,8 @@ After exploring with run_sql, you MUST call submit_result - do not summarize fin
                 # No tool calls - LLM is just responding with text
                 # This shouldn't contain data, just reasoning
                 assistant_message = response.choices[0].message.content
-                if assistant_message:
+                # Streamed text was already printed as it arrived
+                if assistant_message and not getattr(response.choices[0].message, "streamed", False):
                     console.print(f"\n[thinking]{assistant_message}[/thinking]\n")
 
                 self.conversation_history.append({
@@ -306,7 +369,7 @@ After exploring with run_sql, you MUST call submit_result - do not summarize fin
 
         return filtered
 
-    def _call_llm(self):
+    async def _call_llm(self):
         """
         Make an API call to the LLM with current context and tools.
 
@@ -318,31 +381,27 @@ After exploring with run_sql, you MUST call submit_result - do not summarize fin
             pct = self.session_manager.current_session.get_context_usage_percent()
             print_warning(f"Context usage at {pct:.0f}% - consider starting a new session")
 
-        # Build system prompt with current mode instruction
-        system_prompt = self._build_system_prompt() + self.settings.get_mode_instruction()
+        # Static system prompt: with the tool definitions it forms a prefix
+        # that is byte-identical across calls, so the provider can cache it
+        system_prompt = self._build_system_prompt()
 
-        # --- RAG: Retrieve relevant context for current question ---
-        rag_context = ""
-        if self._current_question:
-            try:
-                result = self.retriever.retrieve_with_scores(self._current_question)
-                if result.total_items > 0:
-                    rag_context = self.retriever.format_for_prompt(result)
-                    system_prompt += f"\n\n{rag_context}"
-                    # --- RAG: Log with summary ---
-                    console.print(f"[dim]  ~ RAG: {result.summary()}[/dim]")
-                    # --- RAG: Verbose mode shows full debug ---
-                    if self.settings.rag_verbose:
-                        console.print(f"[dim]{self.retriever.format_debug(result)}[/dim]")
-                else:
-                    console.print("[dim]  ~ RAG: no relevant context found[/dim]")
-            except Exception as e:
-                console.print(f"[dim]  ~ RAG: failed ({type(e).__name__})[/dim]")
+        # --- RAG: Retrieve relevant context for current question (blocking store I/O) ---
+        rag_context = await asyncio.get_running_loop().run_in_executor(None, self._get_rag_context)
+
+        # Per-question parts (mode instruction, RAG context) change often,
+        # so they go in their own message just before the latest user turn
+        turn_context = "\n\n".join(
+            part for part in (self.settings.get_mode_instruction().strip(), rag_context) if part
+        )
 
+        # Older questions are sent compacted; the stored history is unchanged
+        history = self.history_compactor.compact(self.conversation_history)
         messages = [
             {"role": "system", "content": system_prompt},
-            *self.conversation_history
+            *history
         ]
+        if turn_context:
+            messages.insert(self._latest_user_index(messages), {"role": "system", "content": turn_context})
 
         # Verbose mode: print full prompt
         if self.settings.verbose:
@@ -350,8 +409,19 @@ After exploring with run_sql, you MUST call submit_result - do not summarize fin
             console.print("[dim]SYSTEM PROMPT:[/dim]")
             console.print(f"[dim]{system_prompt}[/dim]")
             console.print("[dim]" + "-" * 60 + "[/dim]")
-            console.print(f"[dim]MESSAGES: {len(self.conversation_history)}[/dim]")
-            for msg in self.conversation_history:
+            if turn_context:
+                console.print("[dim]TURN CONTEXT:[/dim]")
+                console.print(f"[dim]{turn_context}[/dim]")
+                console.print("[dim]" + "-" * 60 + "[/dim]")
+            stats = self.history_compactor.last_stats
+            if stats:
+                console.print(
+                    f"[dim]HISTORY: ~{stats['compacted_tokens']:,} tokens "
+                    f"(~{stats['original_tokens']:,} before compaction, "
+                    f"{stats['dropped_questions']} old question(s) dropped)[/dim]"
+                )
+            console.print(f"[dim]MESSAGES: {len(history)}[/dim]")
+            for msg in history:
                 role = msg.get("role", "?")
                 content = msg.get("content") or ""
                 preview = content[:200] if len(content) > 200 else content
@@ -362,28 +432,218 @@ After exploring with run_sql, you MUST call submit_result - do not summarize fin
         # Get tools filtered by output mode
         tools = self._get_filtered_tools()
 
-        response = self.client.chat.completions.create(
+        if self.settings.stream:
+            response = await self._stream_completion(messages, tools)
+        else:
+            response = await self.client.chat.completions.create(
+                model=self.settings.model,
+                messages=messages,
+                tools=tools,
+                tool_choice="auto",
+            )
+
+        # Track token usage (cached = prompt tokens served from the prefix cache)
+        if response.usage:
+            details = getattr(response.usage, "prompt_tokens_details", None)
+            self.session_manager.update_tokens(
+                response.usage.prompt_tokens,
+                response.usage.completion_tokens,
+                getattr(details, "cached_tokens", None) or 0,
+            )
+
+        return response
+
+    @staticmethod
+    def _latest_user_index(messages: list) -> int:
+        """Position of the last user message (end of list if there is none)."""
+        for i in range(len(messages) - 1, -1, -1):
+            if messages[i].get("role") == "user":
+                return i
+        return len(messages)
+
+    async def _stream_completion(self, messages: list, tools: list):
+        """
+        Stream a completion, printing text as it arrives.
+
+        Tool call deltas are assembled by index. A call's arguments are
+        complete once the next index starts (or the stream ends); read-only
+        calls are started on the tool executor at that point, so they run
+        while the rest of the response is still streaming.
+
+        Returns:
+            Response-shaped object (choices[0].message, usage) that the
+            agent loop handles like a regular ChatCompletion
+        """
+        self._discard_started_tools()
+
+        stream = await self.client.chat.completions.create(
             model=self.settings.model,
             messages=messages,
             tools=tools,
             tool_choice="auto",
+            stream=True,
+            stream_options={"include_usage": True},
         )
 
-        # Track token usage
-        if response.usage:
-            self.session_manager.update_tokens(
-                response.usage.prompt_tokens,
-                response.usage.completion_tokens
+        content_parts = []
+        calls: dict[int, dict] = {}  # index -> {"id", "name", "arguments"}
+        next_to_start = 0
+        usage = None
+
+        try:
+            async for chunk in stream:
+                # Usage arrives on a final chunk with no choices
+                if chunk.usage:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    if not content_parts:
+                        console.print()
+                    content_parts.append(delta.content)
+                    console.print(delta.content, style="thinking", end="", markup=False, highlight=False)
+
+                for tc in delta.tool_calls or []:
+                    call = calls.setdefault(tc.index, {"id": "", "name": "", "arguments": ""})
+                    if tc.id:
+                        call["id"] = tc.id
+                    if tc.function:
+                        call["name"] += tc.function.name or ""
+                        call["arguments"] += tc.function.arguments or ""
+                    # Every call before this index has all its arguments
+                    next_to_start = self._start_ready_tools(calls, tc.index, next_to_start)
+        finally:
+            await stream.close()
+
+        if content_parts:
+            console.print("\n")
+        if calls:
+            self._start_ready_tools(calls, max(calls) + 1, next_to_start)
+
+        tool_calls = [
+            SimpleNamespace(
+                id=call["id"],
+                type="function",
+                function=SimpleNamespace(name=call["name"], arguments=call["arguments"]),
             )
+            for _, call in sorted(calls.items())
+        ]
+        message = SimpleNamespace(
+            role="assistant",
+            content="".join(content_parts) or None,
+            tool_calls=tool_calls or None,
+            streamed=bool(content_parts),
+        )
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
 
-        return response
+    def _start_ready_tools(self, calls: dict, ready: int, start: int) -> int:
+        """
+        Start complete read-only calls with index in [start, ready), in order.
+
+        Stops at the first call that is not read-only (or has bad arguments):
+        later calls may depend on its effect, so they wait for the loop.
+
+        Returns:
+            Index of the first call not yet started
+        """
+        for index in range(start, ready):
+            call = calls.get(index)
+            if call is None or not self._start_tool(call["id"], call["name"], call["arguments"]):
+                return index
+        return max(start, ready)
+
+    def _start_tool(self, tool_call_id: str, tool_name: str, arguments: str) -> bool:
+        """Submit a read-only tool call to the executor. Returns False if it can't run early."""
+        if tool_call_id in self._started_tools:
+            return True
+        if tool_name not in self.READ_ONLY_TOOLS:
+            return False
+        try:
+            tool_args = json.loads(arguments or "{}")
+        except json.JSONDecodeError:
+            return False
+        handler = self.TOOL_HANDLERS[tool_name]
+        self._started_tools[tool_call_id] = self._in_executor(handler, tool_args)
+        return True
+
+    async def _run_tool(self, tool_call_id: str, handler, tool_args: dict):
+        """Result of a tool call, from its early start if there was one."""
+        future = self._started_tools.pop(tool_call_id, None)
+        if future is None:
+            future = self._in_executor(handler, tool_args)
+        return await future
+
+    def _in_executor(self, handler, tool_args: dict) -> asyncio.Future:
+        """Run a tool handler on the tool executor."""
+        return asyncio.get_running_loop().run_in_executor(
+            self.tool_executor, functools.partial(handler, **tool_args)
+        )
+
+    def _discard_started_tools(self) -> None:
+        """Forget early-started calls whose results will not be used."""
+        for future in self._started_tools.values():
+            future.cancel()
+        self._started_tools.clear()
 
-    def _handle_tool_calls(self, assistant_message) -> bool:
+    def _get_rag_context(self) -> str:
+        """
+        Retrieved context for the current question, formatted for the prompt.
+
+        Served from the per-question retrieval cache; the store is only
+        searched at the start of a question and after new tables were touched.
+        """
+        if not self._current_question:
+            return ""
+
+        cache = self.retrieval_cache
+        result = cache.get()
+        if result is not None:
+            if self.settings.rag_verbose:
+                stats = cache.stats()
+                console.print(f"[dim]  ~ RAG: reused ({stats['hits']} hits, {stats['misses']} misses)[/dim]")
+            return self.retriever.format_for_prompt(result) if result.total_items > 0 else ""
+
+        try:
+            result = self.retriever.retrieve_with_scores(cache.question, cache.search_text())
+        except Exception as e:
+            console.print(f"[dim]  ~ RAG: failed ({type(e).__name__})[/dim]")
+            return ""
+
+        cache.put(result)
+        if result.total_items == 0:
+            console.print("[dim]  ~ RAG: no relevant context found[/dim]")
+            return ""
+
+        # --- RAG: Log with summary ---
+        console.print(f"[dim]  ~ RAG: {result.summary()}[/dim]")
+        # --- RAG: Verbose mode shows full debug ---
+        if self.settings.rag_verbose:
+            console.print(f"[dim]{self.retriever.format_debug(result)}[/dim]")
+        return self.retriever.format_for_prompt(result)
+
+    def _note_touched_tables(self, tool_name: str, args: dict) -> None:
+        """Tell the retrieval cache which tables a tool call touched."""
+        if tool_name == "run_sql":
+            tables = extract_tables(args.get("sql", ""))
+        elif tool_name == "run_python":
+            tables = set()
+            for sql in (args.get("queries") or {}).values():
+                tables |= extract_tables(sql)
+        elif tool_name == "inspect_schema" and args.get("table"):
+            table = args["table"]
+            tables = {f"{args['schema']}.{table}".lower() if args.get("schema") else table.lower()}
+        else:
+            return
+        self.retrieval_cache.note_tables(tables)
+
+    async def _handle_tool_calls(self, assistant_message) -> bool:
         """
         Execute tool calls from the LLM response.
 
         For internal tools (run_sql, run_python, inspect_schema):
-            - Execute the tool
+            - Execute the tool (consecutive read-only calls run concurrently)
             - Return results to the LLM for further reasoning
             - Return True to continue the loop
 
@@ -415,8 +675,19 @@ After exploring with run_sql, you MUST call submit_result - do not summarize fin
             ]
         })
 
+        # Read-only calls are started in runs on the tool executor; the
+        # loop below still records results in the original call order
+        calls = {
+            i: {"id": tc.id, "name": tc.function.name, "arguments": tc.function.arguments}
+            for i, tc in enumerate(assistant_message.tool_calls)
+        }
+        next_to_start = 0
+
         # Process each tool call
-        for tool_call in assistant_message.tool_calls:
+        for index, tool_call in enumerate(assistant_message.tool_calls):
+            if index >= next_to_start:
+                next_to_start = self._start_ready_tools(calls, len(calls), index)
+
             tool_name = tool_call.function.name
             tool_args = json.loads(tool_call.function.arguments)
 
@@ -435,40 +706,40 @@ After exploring with run_sql, you MUST call submit_result - do not summarize fin
                 with tool_status(tool_name, args_summary):
                     if tool_name in ("submit_result", "submit_observation"):
                         # Final answer - execute with spinner
-                        output = handler(**tool_args)
+                        output = await self._run_tool(tool_call.id, handler, tool_args)
 
                 # Display result outside spinner
                 if tool_name == "submit_result":
                     display_submit_result(output)
                     self._add_tool_result(tool_call.id, "Result displayed to user.")
-                    # --- RAG: Index successful query for future retrieval ---
+                    # --- RAG: Queue successful query for background indexing ---
                     if output.success and self._current_question:
                         try:
                             sql = list(output.sql_queries.values())[0] if output.sql_queries else ""
                             result_summary = str(output.result)[:200]
                             session_id = self.session_manager.current_session.id if self.session_manager.current_session else None
-                            self.retriever.index_successful_query(
+                            self.indexer.enqueue_query(
                                 question=self._current_question,
                                 sql=sql,
                                 result_summary=result_summary,
                                 session_id=session_id,
                             )
-                            console.print("[dim]  ~ RAG: indexed query[/dim]")
+                            console.print("[dim]  ~ RAG: queued query for indexing[/dim]")
                         except Exception:
                             pass
                     return False
                 elif tool_name == "submit_observation":
                     display_observation(output)
                     self._add_tool_result(tool_call.id, "Observation displayed to user.")
-                    # --- RAG: Index observation for future retrieval ---
+                    # --- RAG: Queue observation for background indexing ---
                     if self._current_question:
                         try:
                             session_id = self.session_manager.current_session.id if self.session_manager.current_session else None
-                            self.retriever.index_observation(
+                            self.indexer.enqueue_observation(
                                 observation=output.observation,
                                 session_id=session_id,
                             )
-                            console.print("[dim]  ~ RAG: indexed observation[/dim]")
+                            console.print("[dim]  ~ RAG: queued observation for indexing[/dim]")
                         except Exception:
                             pass
                     return False
@@ -479,11 +750,12 @@ After exploring with run_sql, you MUST call submit_result - do not summarize fin
                 else:
                     # Internal tool - execute and show preview
                     with tool_status(tool_name, args_summary):
-                        result = handler(**tool_args)
+                        result = await self._run_tool(tool_call.id, handler, tool_args)
 
                     # Show a preview of internal tool results
                     print_tool_result_preview(tool_name, result)
                     self._add_tool_result(tool_call.id, result)
+                    self._note_touched_tables(tool_name, tool_args)
 
             except Exception as e:
                 # Feed error back to LLM so it can fix
@@ -507,6 +779,29 @@ After exploring with run_sql, you MUST call submit_result - do not summarize fin
             "content": result
         })
 
+    def _close_pending_tool_calls(self, result: str) -> None:
+        """
+        Answer any tool calls in the last assistant message that have no result yet.
+
+        The API rejects a history where an assistant tool call is not
+        followed by its tool result, which happens if a question is
+        interrupted mid-turn.
+
+        Args:
+            result: Content to record for each unanswered tool call
+        """
+        history = self.conversation_history
+        for i in range(len(history) - 1, -1, -1):
+            message = history[i]
+            if message.get("role") == "assistant":
+                if not message.get("tool_calls"):
+                    return
+                answered = {m.get("tool_call_id") for m in history[i + 1:] if m.get("role") == "tool"}
+                for tool_call in message["tool_calls"]:
+                    if tool_call["id"] not in answered:
+                        self._add_tool_result(tool_call["id"], result)
+                return
+
     def clear_history(self) -> None:
         """Clear conversation history for a fresh start."""
         self.session_manager.clear_history()
@@ -575,3 +870,57 @@ After exploring with run_sql, you MUST call submit_result - do not summarize fin
             return obs
 
         return ""
+
+
+class Orchestrator:
+    """
+    Synchronous wrapper around AsyncOrchestrator.
+
+    Runs each question to completion on a persistent event loop, so the
+    async client's connections are reused between questions. Ctrl+C
+    cancels the running question and surfaces as KeyboardInterrupt.
+    """
+
+    def __init__(self, settings: Optional[AgentSettings] = None, session_manager: Optional[SessionManager] = None):
+        """
+        Initialize the orchestrator.
+
+        Args:
+            settings: Agent settings for model and output mode
+            session_manager: Session manager for conversation tracking
+        """
+        self.core = AsyncOrchestrator(settings=settings, session_manager=session_manager)
+        self._runner = asyncio.Runner()
+        atexit.register(self._runner.close)
+
+    @property
+    def settings(self) -> AgentSettings:
+        return self.core.settings
+
+    @property
+    def session_manager(self) -> SessionManager:
+        return self.core.session_manager
+
+    @property
+    def retrieval_cache(self) -> RetrievalCache:
+        return self.core.retrieval_cache
+
+    @property
+    def retriever(self) -> ContextRetriever:
+        return self.core.retriever
+
+    @property
+    def conversation_history(self) -> list:
+        return self.core.conversation_history
+
+    @conversation_history.setter
+    def conversation_history(self, value: list):
+        self.core.conversation_history = value
+
+    def process_question(self, question: str) -> None:
+        """Process a user question through the agent loop (blocks until done)."""
+        self._runner.run(self.core.process_question(question))
+
+    def clear_history(self) -> None:
+        """Clear conversation history for a fresh start."""
+        self.core.clear_history()
@@ -1,2 +1,4 @@
+from .connection_pool import ConnectionPool, get_pool
+from .result_cache import ResultCache, get_result_cache
 from .sql_executor import SQLExecutor
 from .python_executor import PythonExecutor
@@ -0,0 +1,248 @@
+"""
+connection_pool.py
+
+Process-wide DuckDB connection shared by the sandbox, schema module and tools.
+
+Opening the warehouse costs a file open, a catalog load and a cold buffer
+cache. Instead of paying that on every query, we keep one read-only
+connection and hand out cursors from it. DuckDB cursors are independent
+connections to the same database instance, so they are safe to use from
+separate threads while sharing the warm buffer cache.
+
+The read-only connection holds a shared lock on the warehouse file, which
+makes writers in other processes (dbt run, ingestion DAG) fail. So the
+connection is closed once no cursor has been open for a short while, and
+reopened by the next cursor request.
+
+If the warehouse file changes on disk, the next cursor request waits for
+cursors still in use, closes the old connection and opens a new one.
+While any connection to the file is open, duckdb.connect() hands back the
+same (stale) database instance, so the old one must be closed first. The
+same fingerprint is used by caches to invalidate stale entries.
+"""
+
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+import duckdb
+
+from ..config import get_setting
+
+WAREHOUSE_PATH = Path(__file__).parent.parent.parent / "warehouse" / "data.duckdb"
+
+# Where DuckDB spills when a query exceeds memory_limit (config: duckdb_temp_directory)
+DEFAULT_TEMP_DIRECTORY = Path.home() / ".astroagent" / "cache" / "duckdb_tmp"
+
+# Seconds without an open cursor before the connection is closed, releasing
+# the warehouse file lock for writers (config: duckdb_idle_seconds)
+DEFAULT_IDLE_SECONDS = 2.0
+
+
+def duckdb_config() -> dict:
+    """
+    Resource caps for the shared connection, read from config.json.
+
+    Keys:
+        duckdb_memory_limit: e.g. "4GB" (DuckDB default: 80% of RAM)
+        duckdb_threads: worker threads per query (DuckDB default: all cores)
+        duckdb_temp_directory: spill location for larger-than-memory queries
+    """
+    config = {
+        "temp_directory": str(get_setting("duckdb_temp_directory", DEFAULT_TEMP_DIRECTORY)),
+    }
+    memory_limit = get_setting("duckdb_memory_limit")
+    if memory_limit:
+        config["memory_limit"] = str(memory_limit)
+    threads = get_setting("duckdb_threads")
+    if threads:
+        config["threads"] = int(threads)
+    return config
+
+
+def warehouse_fingerprint(path: Path = WAREHOUSE_PATH) -> str:
+    """
+    Cheap version identifier for the warehouse file.
+
+    Built from mtime and size of the database file and its write-ahead
+    log, so any rebuild or checkpoint produces a new value.
+
+    Returns:
+        Fingerprint string, or "missing" if the file does not exist.
+    """
+    path = Path(path)
+    parts = []
+    for candidate in (path, path.with_name(path.name + ".wal")):
+        try:
+            stat = candidate.stat()
+        except FileNotFoundError:
+            continue
+        parts.append(f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+    return "_".join(parts) if parts else "missing"
+
+
+class ConnectionPool:
+    """
+    Hands out cursors over a single read-only DuckDB connection.
+
+    Usage:
+        with get_pool().cursor() as cur:
+            df = cur.execute("SELECT 1").fetchdf()
+    """
+
+    def __init__(self, warehouse_path: Path = WAREHOUSE_PATH, idle_seconds: float = None):
+        self.warehouse_path = Path(warehouse_path)
+        if idle_seconds is None:
+            idle_seconds = get_setting("duckdb_idle_seconds", DEFAULT_IDLE_SECONDS)
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self._conn: Optional[duckdb.DuckDBPyConnection] = None
+        self._fingerprint: Optional[str] = None
+        self._leases = 0  # Cursors handed out and not yet closed
+        self._held = threading.local()  # Cursors open in the current thread
+        self._idle_timer: Optional[threading.Timer] = None
+        self._running: set = set()
+        self._interrupts = 0
+
+    def fingerprint(self) -> str:
+        """Current fingerprint of the warehouse file (see warehouse_fingerprint)."""
+        return warehouse_fingerprint(self.warehouse_path)
+
+    @contextmanager
+    def cursor(self):
+        """
+        Get a new cursor on the shared connection.
+
+        Use it as a context manager: the cursor is closed on exit, and the
+        shared connection once no cursor has been open for idle_seconds.
+        """
+        conn = self._acquire()
+        try:
+            cur = conn.cursor()
+        except BaseException:
+            self._release()
+            raise
+        try:
+            with cur:
+                yield cur
+        finally:
+            self._release()
+
+    def _acquire(self) -> duckdb.DuckDBPyConnection:
+        """Take a lease on the shared connection, (re)opening it if needed."""
+        fingerprint = self.fingerprint()
+        held = getattr(self._held, "count", 0)
+        with self._released:
+            self._cancel_idle_timer()
+            if self._conn is not None and fingerprint != self._fingerprint and not held:
+                # --- File changed: wait for in-flight cursors, then close the stale instance ---
+                while self._leases:
+                    self._released.wait()
+                if fingerprint != self._fingerprint:
+                    self._close_connection()
+
+            if self._conn is None:
+                config = duckdb_config()
+                Path(config["temp_directory"]).mkdir(parents=True, exist_ok=True)
+                self._conn = duckdb.connect(str(self.warehouse_path), read_only=True, config=config)
+                self._fingerprint = fingerprint
+
+            self._leases += 1
+            self._held.count = held + 1
+            return self._conn
+
+    def _release(self) -> None:
+        """Return a lease; the last one starts the idle countdown."""
+        self._held.count -= 1
+        with self._released:
+            self._leases -= 1
+            if self._leases:
+                return
+            self._released.notify_all()
+            if self.idle_seconds <= 0:
+                self._close_connection()
+            else:
+                timer = threading.Timer(self.idle_seconds, lambda: self._close_if_idle(timer))
+                timer.daemon = True
+                self._idle_timer = timer
+                timer.start()
+
+    def _close_if_idle(self, timer: threading.Timer) -> None:
+        """Idle countdown finished; a cursor taken since then cancels it."""
+        with self._lock:
+            if not self._leases and self._idle_timer is timer:
+                self._idle_timer = None
+                self._close_connection()
+
+    def _cancel_idle_timer(self) -> None:
+        """Caller holds the lock."""
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+    def _close_connection(self) -> None:
+        """Close the shared connection, releasing the file lock. Caller holds the lock."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+            self._fingerprint = None
+
+    @contextmanager
+    def running(self, cursor: duckdb.DuckDBPyConnection):
+        """
+        Register a cursor as executing so interrupt_all() can cancel it.
+
+        Usage:
+            with pool.cursor() as cur, pool.running(cur):
+                cur.execute(sql).fetchdf()
+        """
+        with self._lock:
+            self._running.add(cursor)
+        try:
+            yield cursor
+        finally:
+            with self._lock:
+                self._running.discard(cursor)
+
+    def interrupt_all(self) -> int:
+        """
+        Interrupt every query currently executing on a pooled cursor.
+
+        Used when the user presses Ctrl+C in the REPL.
+
+        Returns:
+            Number of queries interrupted
+        """
+        with self._lock:
+            cursors = list(self._running)
+            self._interrupts += 1
+        for cursor in cursors:
+            cursor.interrupt()
+        return len(cursors)
+
+    @property
+    def interrupt_count(self) -> int:
+        """How many times interrupt_all() has been called (to tell user cancels from timeouts)."""
+        return self._interrupts
+
+    def close(self) -> None:
+        """Close the shared connection now, releasing the warehouse file."""
+        with self._lock:
+            self._cancel_idle_timer()
+            self._close_connection()
+
+
+# Module-level pool shared across the process
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Get the process-wide connection pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool()
+        return _pool
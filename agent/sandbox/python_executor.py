@@ -1,12 +1,100 @@
+import ast
+import hashlib
+import threading
 import pandas as pd
 import numpy as np
+from collections import OrderedDict
+from types import CodeType
 from typing import Any
 import traceback
 
+# Compiled code objects kept by source hash (replays, retries, saved questions)
+CODE_CACHE_SIZE = 256
+
+# Names the sandbox never provides; rejected up front with a clear message
+FORBIDDEN_NAMES = {
+    "__import__", "__builtins__", "breakpoint", "compile", "delattr", "eval",
+    "exec", "exit", "getattr", "globals", "input", "locals", "open", "quit",
+    "setattr", "vars",
+}
+
+_code_cache: OrderedDict[str, CodeType] = OrderedDict()
+_code_cache_lock = threading.Lock()
+
+
+def validate_code(code: str) -> tuple[ast.Module, str]:
+    """
+    Parse sandbox code and reject disallowed constructs.
+
+    Runs before any data is loaded so invalid code fails fast.
+
+    Rejects:
+        - imports (pd and np are pre-loaded)
+        - dunder attribute access (e.g. __class__, __subclasses__)
+        - references to FORBIDDEN_NAMES
+        - code that never assigns 'result'
+
+    Returns:
+        (tree, error) - error is None if the code is allowed
+    """
+    try:
+        tree = ast.parse(code, filename="<sandbox>", mode="exec")
+    except SyntaxError as e:
+        return None, f"SyntaxError: {e.msg} (line {e.lineno})"
+
+    assigns_result = False
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            return None, f"Imports are not allowed (line {node.lineno}): pd and np are already available"
+        if isinstance(node, ast.Attribute) and node.attr.startswith("__"):
+            return None, f"Access to '{node.attr}' is not allowed (line {node.lineno})"
+        if isinstance(node, ast.Name):
+            if node.id in FORBIDDEN_NAMES:
+                return None, f"Use of '{node.id}' is not allowed (line {node.lineno})"
+            if node.id == "result" and isinstance(node.ctx, ast.Store):
+                assigns_result = True
+
+    if not assigns_result:
+        return None, "Code must define a 'result' variable"
+
+    return tree, None
+
+
+def compile_code(code: str) -> tuple[CodeType, str]:
+    """
+    Validate and compile sandbox code, reusing cached code objects.
+
+    Returns:
+        (code_object, error) - error is None on success
+    """
+    key = hashlib.sha256(code.encode()).hexdigest()
+
+    with _code_cache_lock:
+        compiled = _code_cache.get(key)
+        if compiled is not None:
+            _code_cache.move_to_end(key)
+            return compiled, None
+
+    tree, error = validate_code(code)
+    if error:
+        return None, error
+    compiled = compile(tree, "<sandbox>", "exec")
+
+    with _code_cache_lock:
+        _code_cache[key] = compiled
+        while len(_code_cache) > CODE_CACHE_SIZE:
+            _code_cache.popitem(last=False)
+
+    return compiled, None
+
 
 class PythonExecutor:
     """
     Executes Python code on dataframes in a restricted environment.
+
+    Runs in-process by default. When `python_workers` is set in config.json,
+    code is sent to the warm worker process pool instead (see worker_pool.py),
+    which adds CPU/memory limits and a hard kill on timeout.
     """
 
     ALLOWED_MODULES = {
@@ -16,6 +104,24 @@ class PythonExecutor:
         "numpy": np,
     }
 
+    def __init__(self, use_workers: bool = True):
+        """
+        Args:
+            use_workers: Allow the worker pool if configured. Workers
+                         themselves pass False to run jobs in-process.
+        """
+        self.use_workers = use_workers
+
+    def validate(self, code: str) -> tuple[bool, str]:
+        """
+        Check code against the sandbox rules without running it.
+
+        Call before running input SQL so bad code fails before data loads.
+        Returns (is_valid, error_message).
+        """
+        _, error = compile_code(code)
+        return error is None, error
+
     def execute(
         self,
         code: str,
@@ -26,18 +132,30 @@ class PythonExecutor:
 
         Args:
             code: Python code to execute (should define a 'result' variable)
-            dataframes: Dict mapping names to DataFrames (e.g., {"df1": df1, "df2": df2})
+            dataframes: Dict mapping names to DataFrames (e.g., {"df1": df1, "df2": df2}).
+                        Passed through as-is, so Arrow-backed frames are not copied.
 
         Returns:
             (result, error) - result is the value of 'result' variable, error is None on success
         """
+        compiled, error = compile_code(code)
+        if error:
+            return None, error
+
+        if self.use_workers:
+            # --- Import here to avoid loading multiprocessing unless needed ---
+            from .worker_pool import get_worker_pool
+            pool = get_worker_pool()
+            if pool is not None:
+                return pool.execute(code, dataframes)
+
         local_vars = {
             **self.ALLOWED_MODULES,
             **dataframes,
         }
 
         try:
-            exec(code, {"__builtins__": self._safe_builtins()}, local_vars)
+            exec(compiled, {"__builtins__": self._safe_builtins()}, local_vars)
 
             if "result" not in local_vars:
                 return None, "Code must define a 'result' variable"
@@ -0,0 +1,358 @@
+"""
+result_cache.py
+
+Content-addressed cache for SQL query results.
+
+The agent re-runs the same exploration queries (row counts, DESCRIBE,
+top-N by revenue) many times per session and across sessions. Results are
+keyed by normalized SQL text plus the warehouse fingerprint, kept in an
+in-memory LRU and persisted as Parquet under ~/.astroagent/cache/results/
+by a background writer, so caching never delays the query that produced
+the result.
+
+A dbt or ingestion rebuild changes the warehouse fingerprint, so stale
+entries are never served; the first lookup after a rebuild also drops the
+old entries from memory and disk.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import duckdb
+import pandas as pd
+
+from ..config import get_setting
+
+CACHE_DIR = Path.home() / ".astroagent" / "cache" / "results"
+
+# Byte budgets (config: result_cache_memory_mb, result_cache_disk_mb)
+DEFAULT_MEMORY_BUDGET_MB = 256
+DEFAULT_DISK_BUDGET_MB = 1024
+
+# Results larger than this are not cached at all (config: result_cache_max_entry_mb)
+DEFAULT_MAX_ENTRY_MB = 64
+
+# Rows of object columns measured to estimate a result's size
+SIZE_SAMPLE_ROWS = 1000
+
+# Queries whose result changes between runs are never cached
+NON_DETERMINISTIC = re.compile(
+    r"\b(random|uuid|gen_random_uuid|setseed|now|today"
+    r"|current_timestamp|current_date|current_time|current_localtimestamp"
+    r"|localtimestamp|localtime|get_current_timestamp|get_current_time)\b"
+)
+
+# Queries reading files outside the warehouse: the files can change without
+# changing the warehouse fingerprint (read_csv_auto(...), FROM 'data.parquet')
+EXTERNAL_READS = re.compile(
+    r"\b(read_csv\w*|read_parquet|parquet_scan|read_json\w*|read_ndjson\w*|read_text|read_blob|read_xlsx|glob)\s*\("
+    r"|'[^']*\.(csv|tsv|txt|parquet|json|jsonl|ndjson|xlsx)(\.gz|\.zst)?'",
+    re.IGNORECASE,
+)
+
+
+def estimate_bytes(df: pd.DataFrame) -> int:
+    """
+    Approximate in-memory size of a DataFrame.
+
+    Object columns (strings) are measured on a sample and extrapolated, as
+    measuring every value (memory_usage(deep=True)) is slow on large results.
+    """
+    nbytes = int(df.memory_usage(index=True, deep=False).sum())
+    objects = df.select_dtypes(include="object")
+    if len(objects.columns) and len(df):
+        sample = objects.head(SIZE_SAMPLE_ROWS)
+        shallow = sample.memory_usage(index=False, deep=False).sum()
+        deep = sample.memory_usage(index=False, deep=True).sum()
+        nbytes += int((deep - shallow) / len(sample) * len(df))
+    return nbytes
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Normalize SQL text for cache keys.
+
+    Collapses whitespace, lowercases and drops trailing semicolons outside
+    of quoted strings and identifiers, so formatting differences map to the
+    same entry while literal values stay distinct.
+    """
+    out = []
+    quote = None
+    pending_space = False
+
+    for ch in sql.strip().rstrip(";").strip():
+        if quote:
+            out.append(ch)
+            if ch == quote:
+                quote = None
+            continue
+
+        if ch.isspace():
+            pending_space = True
+            continue
+
+        if pending_space and out:
+            out.append(" ")
+        pending_space = False
+
+        if ch in ("'", '"'):
+            quote = ch
+            out.append(ch)
+        else:
+            out.append(ch.lower())
+
+    return "".join(out)
+
+
+class ResultCache:
+    """
+    Two-level (memory + Parquet on disk) LRU cache of query results.
+
+    Thread-safe: concurrent input queries from execute_many share it.
+    Parquet files are written by a single background thread.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = CACHE_DIR,
+        memory_budget_mb: int = None,
+        disk_budget_mb: int = None,
+        max_entry_mb: int = None,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.memory_budget = (memory_budget_mb or get_setting("result_cache_memory_mb", DEFAULT_MEMORY_BUDGET_MB)) * 1024 * 1024
+        self.disk_budget = (disk_budget_mb or get_setting("result_cache_disk_mb", DEFAULT_DISK_BUDGET_MB)) * 1024 * 1024
+        self.max_entry_bytes = (max_entry_mb or get_setting("result_cache_max_entry_mb", DEFAULT_MAX_ENTRY_MB)) * 1024 * 1024
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[pd.DataFrame, int]] = OrderedDict()
+        self._memory_bytes = 0
+        self._fingerprint: Optional[str] = None
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="result-cache")
+
+        # --- Stats reported by /status ---
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # =========================================================================
+    # PUBLIC API
+    # =========================================================================
+
+    @staticmethod
+    def is_cacheable(sql: str) -> bool:
+        """Whether a query's result is stable enough to cache."""
+        return not (NON_DETERMINISTIC.search(normalize_sql(sql)) or EXTERNAL_READS.search(sql))
+
+    def get(
+        self,
+        sql: str,
+        fingerprint: str,
+        variant: str = "",
+        result_format: str = "pandas",
+    ) -> Optional[pd.DataFrame]:
+        """
+        Look up a cached result.
+
+        Args:
+            sql: The query text
+            fingerprint: Current warehouse fingerprint
+            variant: Distinguishes different result shapes for the same SQL
+            result_format: "pandas" or "arrow" - entries are kept per format
+
+        Returns:
+            A copy of the cached DataFrame, or None on a miss
+        """
+        key = self._key(sql, variant, result_format)
+
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0].copy()
+
+        # --- Fall back to disk (outside the lock, reads can be slow) ---
+        path = self._path(fingerprint, key)
+        df = self._read_parquet(path, result_format)
+        if df is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, df)
+        return df.copy()
+
+    def put(
+        self,
+        sql: str,
+        fingerprint: str,
+        df: pd.DataFrame,
+        variant: str = "",
+        result_format: str = "pandas",
+    ) -> None:
+        """
+        Store a query result in memory, and on disk in the background.
+
+        Results over max_entry_bytes are not stored.
+
+        Args:
+            sql: The query text
+            fingerprint: Warehouse fingerprint the result was computed against
+            df: The result DataFrame (a copy is stored)
+            variant: Distinguishes different result shapes for the same SQL
+            result_format: "pandas" or "arrow" - entries are kept per format
+        """
+        nbytes = estimate_bytes(df)
+        if nbytes > self.max_entry_bytes:
+            return
+
+        key = self._key(sql, variant, result_format)
+        df = df.copy()
+
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            self._remember(key, df, nbytes)
+
+        self._writer.submit(self._persist, fingerprint, key, df)
+
+    def clear(self) -> None:
+        """Drop every cached result from memory and disk."""
+        with self._lock:
+            self._entries.clear()
+            self._memory_bytes = 0
+            self._fingerprint = None
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current memory footprint."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups * 100) if lookups else 0.0,
+                "entries": len(self._entries),
+                "memory_mb": self._memory_bytes / (1024 * 1024),
+            }
+
+    # =========================================================================
+    # INTERNAL HELPERS
+    # =========================================================================
+
+    def _key(self, sql: str, variant: str, result_format: str) -> str:
+        """Content hash of the normalized query (plus result variant and format)."""
+        return hashlib.sha256(f"{result_format}:{variant}\n{normalize_sql(sql)}".encode()).hexdigest()
+
+    def _path(self, fingerprint: str, key: str) -> Path:
+        return self.cache_dir / fingerprint / f"{key}.parquet"
+
+    def _check_fingerprint(self, fingerprint: str) -> None:
+        """Invalidate everything cached against an older warehouse. Caller holds the lock."""
+        if fingerprint == self._fingerprint:
+            return
+
+        self._entries.clear()
+        self._memory_bytes = 0
+        self._fingerprint = fingerprint
+
+        if self.cache_dir.exists():
+            for child in self.cache_dir.iterdir():
+                if child.is_dir() and child.name != fingerprint:
+                    shutil.rmtree(child, ignore_errors=True)
+
+    def _remember(self, key: str, df: pd.DataFrame, nbytes: int = None) -> None:
+        """Insert into the memory LRU, evicting by byte budget. Caller holds the lock."""
+        if nbytes is None:
+            nbytes = estimate_bytes(df)
+        if nbytes > self.memory_budget:
+            return  # Too big to keep in memory; disk copy still serves it
+
+        if key in self._entries:
+            self._memory_bytes -= self._entries.pop(key)[1]
+
+        self._entries[key] = (df, nbytes)
+        self._memory_bytes += nbytes
+
+        while self._memory_bytes > self.memory_budget and self._entries:
+            _, (_, evicted_bytes) = self._entries.popitem(last=False)
+            self._memory_bytes -= evicted_bytes
+
+    def _read_parquet(self, path: Path, result_format: str) -> Optional[pd.DataFrame]:
+        """Load a cached result from disk, touching it for LRU ordering."""
+        if not path.exists():
+            return None
+        # --- Import here to avoid circular dependency ---
+        from .sql_executor import fetch_result
+
+        try:
+            with duckdb.connect() as conn:
+                result = conn.execute("SELECT * FROM read_parquet(?)", [str(path)])
+                df = fetch_result(result, result_format)
+            os.utime(path)
+            return df
+        except Exception:
+            return None
+
+    def _persist(self, fingerprint: str, key: str, df: pd.DataFrame) -> None:
+        """Write one result to disk (writer thread), unless the cache moved on since."""
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                return
+        self._write_parquet(self._path(fingerprint, key), df)
+        self._evict_disk(fingerprint)
+
+    def _write_parquet(self, path: Path, df: pd.DataFrame) -> None:
+        """Persist a result as Parquet (atomically); failures only skip the disk tier."""
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f".{uuid.uuid4().hex}.tmp")
+            with duckdb.connect() as conn:
+                conn.register("cached_result", df)
+                conn.execute(f"COPY cached_result TO '{tmp_path}' (FORMAT parquet)")
+            os.replace(tmp_path, path)
+        except Exception:
+            pass
+
+    def _evict_disk(self, fingerprint: str) -> None:
+        """Delete least recently used Parquet files until under the disk budget."""
+        directory = self.cache_dir / fingerprint
+        try:
+            files = [(p, p.stat()) for p in directory.glob("*.parquet")]
+        except FileNotFoundError:
+            return
+
+        total = sum(stat.st_size for _, stat in files)
+        for path, stat in sorted(files, key=lambda item: item[1].st_mtime):
+            if total <= self.disk_budget:
+                break
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+
+
+# Module-level cache shared across the process
+_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Get the process-wide result cache, creating it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache()
+        return _cache
@@ -1,28 +1,355 @@
-import duckdb
+import re
+import threading
+import time
 import pandas as pd
-from pathlib import Path
-from typing import Any
+import pyarrow as pa
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
 
-WAREHOUSE_PATH = Path(__file__).parent.parent.parent / "warehouse" / "data.duckdb"
+from ..config import get_setting
+from .connection_pool import WAREHOUSE_PATH, get_pool
+from .result_cache import get_result_cache
+
+# Max input queries run at once by execute_many (config: max_parallel_queries)
+DEFAULT_MAX_PARALLEL_QUERIES = 4
+
+# Per-query deadline before the query is interrupted (config: query_timeout_seconds)
+DEFAULT_QUERY_TIMEOUT_SECONDS = 60
+
+# How query results are materialized:
+#   pandas - fetchdf(), NumPy-backed columns (strings become Python objects)
+#   arrow  - fetch_arrow_table() wrapped as Arrow-backed pandas (pd.ArrowDtype),
+#            no per-value conversion, far less memory for string-heavy tables
+RESULT_FORMATS = ("pandas", "arrow")
+
+# Start of the error returned when a query hits its deadline
+TIMEOUT_ERROR = "Query timed out"
+
+# Counting the total rows of a truncated preview stops after this many rows
+# (config: preview_count_limit) or this many seconds (config: preview_count_timeout_seconds)
+DEFAULT_PREVIEW_COUNT_LIMIT = 1_000_000
+DEFAULT_PREVIEW_COUNT_TIMEOUT_SECONDS = 5
+
+# Statements that can be wrapped as a subquery (for LIMIT pushdown / COUNT)
+WRAPPABLE_SQL = re.compile(r"^\s*\(?\s*(select|with|from|values|table)\b", re.IGNORECASE)
+
+
+def fetch_result(result, result_format: str = "pandas") -> pd.DataFrame:
+    """
+    Materialize a DuckDB result in the requested format.
+
+    Args:
+        result: An executed DuckDB connection/cursor or relation
+        result_format: One of RESULT_FORMATS
+
+    Returns:
+        DataFrame (Arrow-backed for "arrow")
+    """
+    if result_format == "arrow":
+        return result.fetch_arrow_table().to_pandas(types_mapper=pd.ArrowDtype)
+    if result_format == "pandas":
+        return result.fetchdf()
+    raise ValueError(f"Unknown result format: {result_format}. Use one of: {', '.join(RESULT_FORMATS)}")
+
+
+def fetch_head(result, max_rows: int, result_format: str = "pandas") -> pd.DataFrame:
+    """
+    Stream at most max_rows rows of a DuckDB result.
+
+    Reads chunks until enough rows arrived, so the rest of the result is
+    never materialized. "pandas" uses fetch_df_chunk so columns get the
+    same dtypes as fetchdf() (DECIMAL as float64, DATE as datetime64).
+
+    Args:
+        result: An executed DuckDB connection/cursor
+        max_rows: Maximum rows to return
+        result_format: One of RESULT_FORMATS
+    """
+    if result_format == "pandas":
+        chunks = []
+        rows = 0
+        while True:
+            chunk = result.fetch_df_chunk()
+            chunks.append(chunk)
+            rows += len(chunk)
+            if chunk.empty or rows >= max_rows:
+                break
+        # Keep one (possibly empty) chunk so the columns survive
+        chunks = [chunk for chunk in chunks if not chunk.empty] or chunks[:1]
+        df = chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+        return df.head(max_rows)
+
+    reader = result.fetch_record_batch(max_rows)
+    batches = []
+    rows = 0
+    for batch in reader:
+        batches.append(batch)
+        rows += batch.num_rows
+        if rows >= max_rows:
+            break
+
+    table = pa.Table.from_batches(batches, schema=reader.schema).slice(0, max_rows)
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def strip_statement(sql: str) -> str:
+    """Drop surrounding whitespace and trailing semicolons from a statement."""
+    return sql.strip().rstrip(";").rstrip()
 
 
 class SQLExecutor:
-    def __init__(self):
+    def __init__(self, max_workers: int = None, use_cache: bool = None, timeout: float = None):
         self.warehouse_path = WAREHOUSE_PATH
+        self.pool = get_pool()
+        self.max_workers = max_workers or get_setting("max_parallel_queries", DEFAULT_MAX_PARALLEL_QUERIES)
+        self.timeout = timeout or get_setting("query_timeout_seconds", DEFAULT_QUERY_TIMEOUT_SECONDS)
+        if use_cache is None:
+            use_cache = get_setting("result_cache", True)
+        self.cache = get_result_cache() if use_cache else None
 
-    def execute(self, sql: str) -> tuple[pd.DataFrame, str]:
+    def execute(self, sql: str, result_format: str = "pandas") -> tuple[pd.DataFrame, str]:
         """
         Execute SQL and return (dataframe, error).
         If successful, error is None.
         If failed, dataframe is None and error contains the message.
+
+        Results are served from the result cache when the same query has
+        already run against the current warehouse version.
+
+        The query is interrupted if it runs past self.timeout; the error
+        goes back to the LLM so it can rewrite the query. If the user
+        cancels (pool.interrupt_all() on Ctrl+C), KeyboardInterrupt is
+        raised instead so the whole question stops.
+
+        Args:
+            sql: The query to run
+            result_format: "pandas" (default) or "arrow" for Arrow-backed columns
+        """
+        return self._execute_cached(
+            sql,
+            result_format,
+            fetch=lambda conn: fetch_result(conn.execute(sql), result_format),
+        )
+
+    def execute_preview(
+        self,
+        sql: str,
+        max_rows: int,
+        result_format: str = "pandas"
+    ) -> tuple[pd.DataFrame, int, bool, str]:
+        """
+        Execute SQL but fetch only the first max_rows + 1 rows.
+
+        SELECT-like queries are wrapped so DuckDB can push the LIMIT down;
+        anything else is streamed and abandoned after enough rows. The
+        extra row tells whether the result was truncated, and only then
+        are the rows counted, up to preview_count_limit rows and within
+        preview_count_timeout_seconds.
+
+        Args:
+            sql: The query to run
+            max_rows: Rows to keep for display
+            result_format: "pandas" (default) or "arrow"
+
+        Returns:
+            (dataframe, total_rows, exact, error) - dataframe holds at most
+            max_rows + 1 rows; total_rows is the row count, or a lower bound
+            when exact is False (None if it could not be counted)
+        """
+        statement = strip_statement(sql)
+        limit = max_rows + 1
+        variant = f"preview:{limit}"
+
+        df, error = None, None
+        wrappable = bool(WRAPPABLE_SQL.match(statement))
+        if wrappable:
+            wrapped = f"SELECT * FROM (\n{statement}\n) AS preview LIMIT {limit}"
+            df, error = self._execute_cached(
+                sql,
+                result_format,
+                fetch=lambda conn: fetch_head(conn.execute(wrapped), limit, result_format),
+                variant=variant,
+            )
+            if error and (error.startswith(TIMEOUT_ERROR) or not self._wrapping_failed(statement, wrapped)):
+                return None, None, False, error
+            wrappable = df is not None
+
+        if df is None:
+            # Not wrappable (DESCRIBE, SHOW, ...) or wrapping broke it: stream as-is
+            df, error = self._execute_cached(
+                sql,
+                result_format,
+                fetch=lambda conn: fetch_head(conn.execute(sql), limit, result_format),
+                variant=f"{variant}:raw",
+            )
+            if error:
+                return None, None, False, error
+
+        if len(df) <= max_rows:
+            return df, len(df), True, None
+
+        if not wrappable:
+            return df, limit, False, None
+        total_rows, exact = self._count_rows(sql, statement, limit)
+        return df, total_rows, exact, None
+
+    def _wrapping_failed(self, statement: str, wrapped: str) -> bool:
+        """
+        Whether a wrapped query failed because of the wrapping.
+
+        Both are only planned (EXPLAIN), not run: the wrapping is to blame
+        if the statement plans on its own but not wrapped. Errors raised
+        while running (and timeouts) are real and returned as they are.
+        """
+        valid, _ = self.validate_sql(statement)
+        if not valid:
+            return False
+        wrapped_valid, _ = self.validate_sql(wrapped)
+        return not wrapped_valid
+
+    def _count_rows(self, sql: str, statement: str, at_least: int) -> tuple[int, bool]:
+        """
+        Count a truncated preview's rows, bounded in rows and time.
+
+        Returns:
+            (total_rows, exact) - at_least (not exact) if counting hit its
+            row limit, timed out or failed
         """
+        count_limit = get_setting("preview_count_limit", DEFAULT_PREVIEW_COUNT_LIMIT)
+        timeout = min(self.timeout, get_setting("preview_count_timeout_seconds", DEFAULT_PREVIEW_COUNT_TIMEOUT_SECONDS))
+        count_sql = f"SELECT COUNT(*) FROM (SELECT 1 FROM (\n{statement}\n) AS counted LIMIT {count_limit + 1})"
+
+        count_df, error = self._execute_cached(
+            sql,
+            "pandas",
+            fetch=lambda conn: conn.execute(count_sql).fetchdf(),
+            variant=f"count:{count_limit}",
+            timeout=timeout,
+        )
+        if error:
+            return at_least, False
+        total_rows = int(count_df.iloc[0, 0])
+        if total_rows > count_limit:
+            return count_limit, False
+        return total_rows, True
+
+    def _execute_cached(
+        self,
+        sql: str,
+        result_format: str,
+        fetch: Callable,
+        variant: str = "",
+        timeout: float = None
+    ) -> tuple[pd.DataFrame, str]:
+        """
+        Serve a query from the result cache, or run it and cache the result.
+
+        Args:
+            sql: Query text the cache entry is keyed on
+            result_format: One of RESULT_FORMATS
+            fetch: Callable taking a cursor and returning the DataFrame
+            variant: Cache key variant for alternative result shapes
+            timeout: Deadline in seconds (default self.timeout)
+        """
+        if result_format not in RESULT_FORMATS:
+            return None, f"Unknown result format: {result_format}. Use one of: {', '.join(RESULT_FORMATS)}"
+
+        cacheable = self.cache is not None and self.cache.is_cacheable(sql)
+        if cacheable:
+            fingerprint = self.pool.fingerprint()
+            cached = self.cache.get(sql, fingerprint, variant=variant, result_format=result_format)
+            if cached is not None:
+                return cached, None
+
+        result, error = self._run(fetch, timeout)
+        if error:
+            return None, error
+
+        # Skip caching if the warehouse was rebuilt while the query ran
+        if cacheable and self.pool.fingerprint() == fingerprint:
+            self.cache.put(sql, fingerprint, result, variant=variant, result_format=result_format)
+
+        return result, None
+
+    def _run(self, fetch: Callable, timeout: float = None) -> tuple[pd.DataFrame, str]:
+        """Run fetch(cursor) on a pooled cursor under a deadline (default: the configured one)."""
+        timeout = timeout or self.timeout
+        interrupts_before = self.pool.interrupt_count
+        timed_out = threading.Event()
+
         try:
-            with duckdb.connect(str(self.warehouse_path), read_only=True) as conn:
-                result = conn.execute(sql).fetchdf()
-                return result, None
+            with self.pool.cursor() as conn, self.pool.running(conn):
+                def on_deadline():
+                    timed_out.set()
+                    conn.interrupt()
+
+                timer = threading.Timer(timeout, on_deadline)
+                timer.daemon = True
+                timer.start()
+                try:
+                    return fetch(conn), None
+                finally:
+                    timer.cancel()
         except Exception as e:
+            if timed_out.is_set():
+                return None, (
+                    f"{TIMEOUT_ERROR} after {timeout:g}s and was cancelled. "
+                    "Rewrite it to do less work: filter or aggregate earlier, avoid cross joins, or add a LIMIT."
+                )
+            if self.pool.interrupt_count != interrupts_before:
+                raise KeyboardInterrupt("Query cancelled by user") from e
             return None, str(e)
 
+    def execute_many(
+        self,
+        queries: dict[str, str],
+        result_format: str = "pandas"
+    ) -> tuple[dict[str, pd.DataFrame], dict[str, float], tuple[str, str]]:
+        """
+        Execute several named queries concurrently, each on its own cursor.
+
+        Args:
+            queries: Map of names to SQL queries
+            result_format: "pandas" or "arrow" (see RESULT_FORMATS)
+
+        Returns:
+            (dataframes, timings, failure) - timings are seconds per name,
+            failure is (name, error) for the first failed query in input
+            order, or None if every query succeeded.
+        """
+        def timed(sql: str) -> tuple[pd.DataFrame, str, float]:
+            start = time.perf_counter()
+            df, error = self.execute(sql, result_format)
+            return df, error, time.perf_counter() - start
+
+        if len(queries) <= 1:
+            outcomes = {name: timed(sql) for name, sql in queries.items()}
+        else:
+            workers = max(1, min(self.max_workers, len(queries)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sql") as pool:
+                futures = {name: pool.submit(timed, sql) for name, sql in queries.items()}
+                try:
+                    outcomes = {name: future.result() for name, future in futures.items()}
+                except KeyboardInterrupt:
+                    # Stop queued queries and cancel running ones, otherwise
+                    # leaving the pool would wait for them to finish
+                    for future in futures.values():
+                        future.cancel()
+                    self.pool.interrupt_all()
+                    raise
+
+        dataframes = {}
+        timings = {}
+        failure = None
+        for name, (df, error, elapsed) in outcomes.items():
+            timings[name] = elapsed
+            if error:
+                failure = failure or (name, error)
+            else:
+                dataframes[name] = df
+
+        return dataframes, timings, failure
+
     def execute_to_dict(self, sql: str) -> tuple[list[dict], str]:
         """Execute SQL and return results as list of dicts."""
         df, error = self.execute(sql)
@@ -36,7 +363,7 @@ class SQLExecutor:
         Returns (is_valid, error_message).
         """
         try:
-            with duckdb.connect(str(self.warehouse_path), read_only=True) as conn:
+            with self.pool.cursor() as conn:
                 conn.execute(f"EXPLAIN {sql}")
                 return True, None
         except Exception as e:
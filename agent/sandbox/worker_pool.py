@@ -0,0 +1,321 @@
+"""
+worker_pool.py
+
+Optional pool of warm worker processes for running sandboxed Python.
+
+By default PythonExecutor runs LLM code with exec() inside the CLI
+process. With `python_workers` set in config.json, code runs in
+pre-started worker processes instead:
+
+- Workers import pandas, numpy and pyarrow once at startup
+- DataFrames are written as Arrow IPC files on a RAM-backed temp dir
+  (/dev/shm when available) and memory-mapped by the worker, not pickled
+- Each job runs under RLIMIT_CPU and the worker under RLIMIT_AS
+- A job that exceeds its wall-clock timeout gets its worker killed and
+  replaced, so a runaway loop never blocks the REPL
+
+Several workers let concurrent callers (parallel tool calls) use more
+than one core.
+"""
+
+import atexit
+import multiprocessing
+import os
+import queue
+import shutil
+import signal
+import tempfile
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from ..config import get_setting
+
+# Defaults (config: python_workers, python_timeout_seconds, python_cpu_seconds, python_memory_mb)
+DEFAULT_TIMEOUT_SECONDS = 60
+DEFAULT_CPU_SECONDS = 60
+DEFAULT_MEMORY_MB = 4096
+
+PRELOAD_MODULES = ["pandas", "numpy", "pyarrow"]
+
+
+# =============================================================================
+# WORKER SIDE
+# =============================================================================
+
+def _apply_memory_limit(memory_mb: int) -> None:
+    """Cap the worker's address space."""
+    if resource is None or not memory_mb:
+        return
+    limit = memory_mb * 1024 * 1024
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ValueError, OSError):
+        pass  # Unsupported on this platform (e.g. macOS)
+
+
+def _apply_cpu_limit(cpu_seconds: int) -> None:
+    """Allow the next job cpu_seconds of CPU time beyond what was used so far."""
+    if resource is None or not cpu_seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = used + cpu_seconds
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    try:
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    except (ValueError, OSError):
+        pass
+
+
+def _load_frames(frames: dict) -> dict[str, pd.DataFrame]:
+    """Rebuild DataFrames from memory-mapped Arrow IPC files (or pickled fallbacks)."""
+    dataframes = {}
+    for name, frame in frames.items():
+        if "pickled" in frame:
+            dataframes[name] = frame["pickled"]
+            continue
+        table = pa.ipc.open_file(pa.memory_map(frame["path"], "r")).read_all()
+        if frame["arrow"]:
+            dataframes[name] = table.to_pandas(types_mapper=pd.ArrowDtype)
+        else:
+            dataframes[name] = table.to_pandas()
+    return dataframes
+
+
+def _worker_main(conn, memory_mb: int, cpu_seconds: int) -> None:
+    """Worker loop: receive a job, run it with PythonExecutor, send (result, error)."""
+    # --- Import here so the heavy imports happen once per worker ---
+    import numpy  # noqa: F401
+    from .python_executor import PythonExecutor
+
+    # Ctrl+C reaches the whole process group; the parent decides what to kill
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _apply_memory_limit(memory_mb)
+    executor = PythonExecutor(use_workers=False)
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if job is None:
+            return
+
+        _apply_cpu_limit(cpu_seconds)
+        try:
+            dataframes = _load_frames(job["frames"])
+            result, error = executor.execute(job["code"], dataframes)
+        except MemoryError:
+            result, error = None, "MemoryError: worker exceeded its memory limit"
+        except Exception as e:
+            result, error = None, f"{type(e).__name__}: {e}"
+
+        try:
+            conn.send((result, error))
+        except Exception as e:
+            # Result could not be pickled - report it instead of dying
+            conn.send((None, f"Result could not be returned from worker: {type(e).__name__}: {e}"))
+
+
+# =============================================================================
+# PARENT SIDE
+# =============================================================================
+
+class _Worker:
+    """A worker process and the parent's end of its pipe."""
+
+    def __init__(self, ctx, memory_mb: int, cpu_seconds: int):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, memory_mb, cpu_seconds),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class PythonWorkerPool:
+    """
+    Fixed-size pool of warm sandbox worker processes.
+
+    Usage:
+        result, error = get_worker_pool().execute(code, {"orders": df})
+    """
+
+    def __init__(
+        self,
+        size: int,
+        timeout: float = None,
+        cpu_seconds: int = None,
+        memory_mb: int = None,
+    ):
+        self.size = max(1, size)
+        self.timeout = timeout or get_setting("python_timeout_seconds", DEFAULT_TIMEOUT_SECONDS)
+        self.cpu_seconds = cpu_seconds or get_setting("python_cpu_seconds", DEFAULT_CPU_SECONDS)
+        self.memory_mb = memory_mb or get_setting("python_memory_mb", DEFAULT_MEMORY_MB)
+
+        # forkserver forks workers from a clean server that has pandas preloaded
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            self._ctx = multiprocessing.get_context("forkserver")
+            self._ctx.set_forkserver_preload(PRELOAD_MODULES)
+        else:
+            self._ctx = multiprocessing.get_context("spawn")
+
+        # RAM-backed directory for Arrow hand-off files
+        base = "/dev/shm" if os.path.isdir("/dev/shm") else None
+        self._frame_dir = Path(tempfile.mkdtemp(prefix="astro-frames-", dir=base))
+
+        self._idle: queue.Queue[_Worker] = queue.Queue()
+        self._workers: list[_Worker] = []
+        self._lock = threading.Lock()
+        for _ in range(self.size):
+            self._spawn()
+
+    def _spawn(self) -> None:
+        """Start a worker and make it available."""
+        worker = _Worker(self._ctx, self.memory_mb, self.cpu_seconds)
+        with self._lock:
+            self._workers.append(worker)
+        self._idle.put(worker)
+
+    def _retire(self, worker: _Worker) -> None:
+        """Kill a worker and start a replacement."""
+        worker.kill()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+        self._spawn()
+
+    def _write_frames(self, dataframes: dict[str, pd.DataFrame]) -> tuple[dict, list[Path]]:
+        """Write each DataFrame as an Arrow IPC file for the worker to memory-map."""
+        frames = {}
+        paths = []
+        for name, df in dataframes.items():
+            try:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+            except (pa.ArrowException, TypeError, ValueError):
+                # Mixed-type object columns can't become Arrow; pickle instead
+                frames[name] = {"pickled": df}
+                continue
+
+            path = self._frame_dir / f"{uuid.uuid4().hex}.arrow"
+            with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            paths.append(path)
+            frames[name] = {
+                "path": str(path),
+                "arrow": any(isinstance(dtype, pd.ArrowDtype) for dtype in df.dtypes),
+            }
+        return frames, paths
+
+    def execute(self, code: str, dataframes: dict[str, pd.DataFrame]) -> tuple[Any, str]:
+        """
+        Run code in a worker process.
+
+        Blocks until a worker is free. Same contract as PythonExecutor.execute.
+
+        Returns:
+            (result, error) - error is None on success
+        """
+        frames, paths = self._write_frames(dataframes)
+        worker = self._idle.get()
+        try:
+            try:
+                worker.conn.send({"code": code, "frames": frames})
+            except (BrokenPipeError, OSError) as e:
+                self._retire(worker)
+                worker = None
+                return None, f"WorkerError: could not reach sandbox worker ({e}), please retry."
+
+            if not worker.conn.poll(self.timeout):
+                self._retire(worker)
+                worker = None
+                return None, (
+                    f"TimeoutError: code ran longer than {self.timeout:g}s and the worker was killed. "
+                    "Use vectorized pandas operations instead of Python loops or apply()."
+                )
+
+            try:
+                result, error = worker.conn.recv()
+            except (EOFError, OSError):
+                exitcode = worker.process.exitcode
+                self._retire(worker)
+                worker = None
+                return None, (
+                    f"WorkerError: sandbox worker exited (code {exitcode}), "
+                    f"most likely after exceeding its CPU ({self.cpu_seconds}s) or memory ({self.memory_mb} MB) limit."
+                )
+
+            self._idle.put(worker)
+            worker = None
+            return result, error
+
+        except KeyboardInterrupt:
+            # Ctrl+C: the job can't be cancelled inside the worker, so replace it
+            if worker is not None:
+                self._retire(worker)
+                worker = None
+            raise
+
+        finally:
+            if worker is not None:
+                self._idle.put(worker)
+            for path in paths:
+                path.unlink(missing_ok=True)
+
+    def shutdown(self) -> None:
+        """Stop all workers and remove hand-off files."""
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except (OSError, BrokenPipeError):
+                pass
+            worker.process.join(timeout=1)
+            if worker.process.is_alive():
+                worker.kill()
+        shutil.rmtree(self._frame_dir, ignore_errors=True)
+
+
+# Module-level pool shared across the process
+_pool: Optional[PythonWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool() -> Optional[PythonWorkerPool]:
+    """
+    Get the process-wide worker pool.
+
+    Returns:
+        The pool, or None if `python_workers` is not configured (in-process mode)
+    """
+    global _pool
+    size = int(get_setting("python_workers", 0) or 0)
+    if size <= 0:
+        return None
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = PythonWorkerPool(size)
+            atexit.register(_pool.shutdown)
+        return _pool
@@ -1,55 +1,189 @@
-import duckdb
+"""
+schema.py
+
+DuckDB introspection for the agent: schemas, tables, columns, samples.
+
+Catalog metadata comes from a CatalogSnapshot loaded with two bulk
+queries (tables and columns) on one cursor, instead of a round-trip per
+schema and table. The snapshot is cached in memory and on disk, keyed on
+the warehouse fingerprint, so it is rebuilt only after the warehouse
+changes.
+"""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
 from pathlib import Path
-from typing import Any
+from typing import Any, Optional
+
+import duckdb
+
+from .sandbox.connection_pool import WAREHOUSE_PATH, get_pool, warehouse_fingerprint
+
+CATALOG_CACHE_PATH = Path.home() / ".astroagent" / "cache" / "catalog.json"
 
-WAREHOUSE_PATH = Path(__file__).parent.parent / "warehouse" / "data.duckdb"
+EXCLUDED_SCHEMAS = ("information_schema", "pg_catalog")
+
+# Parallel COUNT(*) queries for exact row counts
+ROW_COUNT_WORKERS = 4
 
 
 def get_connection() -> duckdb.DuckDBPyConnection:
-    return duckdb.connect(str(WAREHOUSE_PATH), read_only=True)
+    """Get a cursor on the shared read-only warehouse connection."""
+    return get_pool().cursor()
 
 
-def get_all_schemas() -> list[str]:
-    with get_connection() as conn:
-        result = conn.execute("""
-            SELECT schema_name
-            FROM information_schema.schemata
-            WHERE schema_name NOT IN ('information_schema', 'pg_catalog')
+# =============================================================================
+# CATALOG SNAPSHOT
+# =============================================================================
+
+@dataclass
+class CatalogSnapshot:
+    """
+    Point-in-time copy of the warehouse catalog.
+
+    Attributes:
+        fingerprint: Warehouse fingerprint the snapshot was taken at
+        tables: List of {"schema", "table", "type", "estimated_rows", "columns"}
+                where columns is a list of {"name", "type", "nullable"}
+    """
+    fingerprint: str
+    tables: list[dict] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, conn: duckdb.DuckDBPyConnection, fingerprint: str) -> "CatalogSnapshot":
+        """Read all tables, views and columns with two bulk catalog queries."""
+        excluded = ", ".join(f"'{s}'" for s in EXCLUDED_SCHEMAS)
+
+        table_rows = conn.execute(f"""
+            SELECT schema_name, table_name, 'BASE TABLE' AS table_type, estimated_size
+            FROM duckdb_tables()
+            WHERE NOT internal AND database_name = current_database()
+              AND schema_name NOT IN ({excluded})
+            UNION ALL
+            SELECT schema_name, view_name, 'VIEW', NULL
+            FROM duckdb_views()
+            WHERE NOT internal AND database_name = current_database()
+              AND schema_name NOT IN ({excluded})
+            ORDER BY 1, 2
+        """).fetchall()
+
+        column_rows = conn.execute(f"""
+            SELECT schema_name, table_name, column_name, data_type, is_nullable
+            FROM duckdb_columns()
+            WHERE NOT internal AND database_name = current_database()
+              AND schema_name NOT IN ({excluded})
+            ORDER BY schema_name, table_name, column_index
         """).fetchall()
-        return [row[0] for row in result]
 
+        columns: dict[tuple[str, str], list[dict]] = {}
+        for schema, table, name, data_type, nullable in column_rows:
+            columns.setdefault((schema, table), []).append(
+                {"name": name, "type": data_type, "nullable": bool(nullable)}
+            )
 
-def get_tables(schema: str = None) -> list[dict]:
-    with get_connection() as conn:
-        query = """
-            SELECT table_schema, table_name, table_type
-            FROM information_schema.tables
-            WHERE table_schema NOT IN ('information_schema', 'pg_catalog')
-        """
-        if schema:
-            query += f" AND table_schema = '{schema}'"
-        query += " ORDER BY table_schema, table_name"
-
-        result = conn.execute(query).fetchall()
-        return [
-            {"schema": row[0], "table": row[1], "type": row[2]}
-            for row in result
+        tables = [
+            {
+                "schema": schema,
+                "table": table,
+                "type": table_type,
+                "estimated_rows": estimated_rows,
+                "columns": columns.get((schema, table), []),
+            }
+            for schema, table, table_type, estimated_rows in table_rows
         ]
+        return cls(fingerprint=fingerprint, tables=tables)
 
+    def get_schemas(self) -> list[str]:
+        """Schema names that contain at least one table or view."""
+        return sorted({t["schema"] for t in self.tables})
 
-def get_columns(schema: str, table: str) -> list[dict]:
-    with get_connection() as conn:
-        result = conn.execute("""
-            SELECT column_name, data_type, is_nullable
-            FROM information_schema.columns
-            WHERE table_schema = ? AND table_name = ?
-            ORDER BY ordinal_position
-        """, [schema, table]).fetchall()
+    def get_tables(self, schema: str = None) -> list[dict]:
+        """Tables (optionally in one schema) as {"schema", "table", "type", "estimated_rows"}."""
         return [
-            {"name": row[0], "type": row[1], "nullable": row[2] == "YES"}
-            for row in result
+            {k: t[k] for k in ("schema", "table", "type", "estimated_rows")}
+            for t in self.tables
+            if schema is None or t["schema"] == schema
         ]
 
+    def get_columns(self, schema: str, table: str) -> list[dict]:
+        """Columns of a table as {"name", "type", "nullable"}, in ordinal order."""
+        for t in self.tables:
+            if t["schema"] == schema and t["table"] == table:
+                return list(t["columns"])
+        return []
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CatalogSnapshot":
+        return cls(**data)
+
+
+_snapshot: Optional[CatalogSnapshot] = None
+_snapshot_lock = threading.Lock()
+
+
+def get_catalog() -> CatalogSnapshot:
+    """
+    Get the catalog snapshot for the current warehouse version.
+
+    Checks memory, then the on-disk copy, and only queries DuckDB when
+    both are stale.
+    """
+    global _snapshot
+    fingerprint = warehouse_fingerprint(WAREHOUSE_PATH)
+
+    with _snapshot_lock:
+        if _snapshot is not None and _snapshot.fingerprint == fingerprint:
+            return _snapshot
+
+        snapshot = _read_cached_catalog(fingerprint)
+        if snapshot is None:
+            with get_connection() as conn:
+                snapshot = CatalogSnapshot.load(conn, fingerprint)
+            _write_cached_catalog(snapshot)
+
+        _snapshot = snapshot
+        return snapshot
+
+
+def _read_cached_catalog(fingerprint: str) -> Optional[CatalogSnapshot]:
+    """Load the on-disk snapshot if it matches the warehouse fingerprint."""
+    try:
+        data = json.loads(CATALOG_CACHE_PATH.read_text())
+        snapshot = CatalogSnapshot.from_dict(data)
+    except (FileNotFoundError, json.JSONDecodeError, TypeError):
+        return None
+    return snapshot if snapshot.fingerprint == fingerprint else None
+
+
+def _write_cached_catalog(snapshot: CatalogSnapshot) -> None:
+    """Persist the snapshot; failures only cost a reload next process."""
+    try:
+        CATALOG_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        CATALOG_CACHE_PATH.write_text(json.dumps(snapshot.to_dict()))
+    except OSError:
+        pass
+
+
+# =============================================================================
+# INTROSPECTION API
+# =============================================================================
+
+def get_all_schemas() -> list[str]:
+    return get_catalog().get_schemas()
+
+
+def get_tables(schema: str = None) -> list[dict]:
+    return get_catalog().get_tables(schema)
+
+
+def get_columns(schema: str, table: str) -> list[dict]:
+    return get_catalog().get_columns(schema, table)
+
 
 def get_sample_data(schema: str, table: str, limit: int = 5) -> list[dict]:
     with get_connection() as conn:
@@ -59,29 +193,89 @@ def get_sample_data(schema: str, table: str, limit: int = 5) -> list[dict]:
         return result.to_dict(orient="records")
 
 
-def get_row_count(schema: str, table: str) -> int:
+def get_sample_data_many(tables: list[tuple[str, str]], limit: int = 5) -> dict[tuple[str, str], list[dict]]:
+    """
+    Sample rows for several tables on one cursor.
+
+    Tables that fail to sample map to an empty list.
+    """
+    samples = {}
     with get_connection() as conn:
-        result = conn.execute(f"""
-            SELECT COUNT(*) FROM {schema}.{table}
-        """).fetchone()
-        return result[0]
+        for schema, table in tables:
+            try:
+                df = conn.execute(f'SELECT * FROM "{schema}"."{table}" LIMIT {int(limit)}').fetchdf()
+                samples[(schema, table)] = df.to_dict(orient="records")
+            except duckdb.Error:
+                samples[(schema, table)] = []
+    return samples
+
+
+def get_row_count(schema: str, table: str) -> int:
+    return get_exact_row_counts([(schema, table)])[(schema, table)]
+
+
+_row_counts: dict[tuple[str, str], int] = {}
+_row_counts_fingerprint: Optional[str] = None
+_row_counts_lock = threading.Lock()
+
+
+def get_exact_row_counts(tables: list[tuple[str, str]]) -> dict[tuple[str, str], int]:
+    """
+    Exact COUNT(*) for several tables, run in parallel on pooled cursors.
+
+    Counts are memoized until the warehouse fingerprint changes.
+
+    Args:
+        tables: List of (schema, table) pairs
+
+    Returns:
+        Dict mapping (schema, table) to its row count
+    """
+    global _row_counts_fingerprint
+    fingerprint = warehouse_fingerprint(WAREHOUSE_PATH)
+
+    with _row_counts_lock:
+        if fingerprint != _row_counts_fingerprint:
+            _row_counts.clear()
+            _row_counts_fingerprint = fingerprint
+        missing = [t for t in tables if t not in _row_counts]
+
+    def count(schema_table: tuple[str, str]) -> int:
+        schema, table = schema_table
+        with get_connection() as conn:
+            return conn.execute(f'SELECT COUNT(*) FROM "{schema}"."{table}"').fetchone()[0]
+
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(ROW_COUNT_WORKERS, len(missing))) as pool:
+            counted = dict(zip(missing, pool.map(count, missing)))
+        with _row_counts_lock:
+            if fingerprint == _row_counts_fingerprint:
+                _row_counts.update(counted)
+    else:
+        counted = {}
+
+    with _row_counts_lock:
+        return {t: counted[t] if t in counted else _row_counts[t] for t in tables}
 
 
 def get_full_schema_context() -> str:
     """Returns a formatted string of the entire schema for LLM context."""
+    catalog = get_catalog()
     lines = ["# Database Schema\n"]
 
-    for schema in get_all_schemas():
+    for schema in catalog.get_schemas():
         lines.append(f"## Schema: {schema}\n")
 
-        for table_info in get_tables(schema):
+        for table_info in catalog.get_tables(schema):
             table = table_info["table"]
-            row_count = get_row_count(schema, table)
-            lines.append(f"### {schema}.{table} ({row_count:,} rows)\n")
+            if table_info["estimated_rows"] is not None:
+                lines.append(f"### {schema}.{table} (~{table_info['estimated_rows']:,} rows)\n")
+            else:
+                lines.append(f"### {schema}.{table} (view)\n")
             lines.append("| Column | Type | Nullable |")
             lines.append("|--------|------|----------|")
 
-            for col in get_columns(schema, table):
+            for col in catalog.get_columns(schema, table):
                 nullable = "Yes" if col["nullable"] else "No"
                 lines.append(f"| {col['name']} | {col['type']} | {nullable} |")
 
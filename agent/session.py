@@ -41,12 +41,20 @@ class TokenUsage:
     prompt_tokens: int = 0
     completion_tokens: int = 0
     total_tokens: int = 0
+    cached_tokens: int = 0  # Prompt tokens served from the provider's prefix cache
 
-    def update(self, prompt: int, completion: int):
+    def update(self, prompt: int, completion: int, cached: int = 0):
         """Add tokens from an API response."""
         self.prompt_tokens += prompt
         self.completion_tokens += completion
         self.total_tokens += prompt + completion
+        self.cached_tokens += cached
+
+    def cached_percent(self) -> float:
+        """Share of prompt tokens that were cache hits."""
+        if self.prompt_tokens == 0:
+            return 0.0
+        return self.cached_tokens / self.prompt_tokens * 100
 
     def to_dict(self) -> dict:
         return asdict(self)
@@ -87,9 +95,9 @@ class Session:
         if isinstance(self.token_usage, dict):
             self.token_usage = TokenUsage.from_dict(self.token_usage)
 
-    def update_tokens(self, prompt: int, completion: int):
+    def update_tokens(self, prompt: int, completion: int, cached: int = 0):
         """Update token usage from API response."""
-        self.token_usage.update(prompt, completion)
+        self.token_usage.update(prompt, completion, cached)
         self.updated_at = datetime.now().isoformat()
 
     def add_message(self, message: dict):
@@ -324,6 +332,8 @@ class SessionManager:
                 "prompt": self.current_session.token_usage.prompt_tokens,
                 "completion": self.current_session.token_usage.completion_tokens,
                 "total": self.current_session.token_usage.total_tokens,
+                "cached": self.current_session.token_usage.cached_tokens,
+                "cached_percent": round(self.current_session.token_usage.cached_percent(), 1),
             },
             "context": {
                 "limit": self.current_session.context_limit,
@@ -338,10 +348,10 @@ class SessionManager:
         if self.current_session:
             self.current_session.clear_history()
 
-    def update_tokens(self, prompt: int, completion: int):
+    def update_tokens(self, prompt: int, completion: int, cached: int = 0):
         """Update token usage from API response."""
         if self.current_session:
-            self.current_session.update_tokens(prompt, completion)
+            self.current_session.update_tokens(prompt, completion, cached)
 
     def add_message(self, message: dict):
         """Add a message to current session history."""
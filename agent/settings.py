@@ -36,6 +36,7 @@ class AgentSettings:
     output_mode: OutputMode = OutputMode.AUTO
     rag_verbose: bool = False
     verbose: bool = False  # Print full prompts sent to LLM
+    stream: bool = False  # Stream responses and start tools as their calls arrive
 
     def get_allowed_output_tools(self) -> list[str]:
         """Return list of allowed output tools based on current mode."""
@@ -101,7 +102,7 @@ class SlashCommandRegistry:
         self.commands["rag"] = SlashCommand(
             name="rag",
             description="RAG memory management",
-            subcommands=["index", "stats", "clear", "test", "verbose"],
+            subcommands=["index", "sync", "stats", "clear", "compact", "test", "verbose", "migrate"],
         )
 
         self.commands["status"] = SlashCommand(
@@ -122,6 +123,12 @@ class SlashCommandRegistry:
             subcommands=[],
         )
 
+        self.commands["stream"] = SlashCommand(
+            name="stream",
+            description="Toggle streaming responses",
+            subcommands=[],
+        )
+
     def get_completions(self, partial: str) -> list[tuple[str, str]]:
         """
         Get command completions for partial input.
@@ -179,6 +186,8 @@ class SlashCommandRegistry:
             return self._handle_help()
         elif cmd_name == "verbose":
             return self._handle_verbose()
+        elif cmd_name == "stream":
+            return self._handle_stream()
         else:
             return False, f"Unknown command: /{cmd_name}"
 
@@ -251,6 +260,7 @@ class SlashCommandRegistry:
                 + f"\n  Model: {status['model']}"
                 + f"\n  Messages: {status['messages']}"
                 + f"\n  Tokens: {tokens['total']:,} ({tokens['prompt']:,} prompt, {tokens['completion']:,} completion)"
+                + f"\n  Cached: {tokens['cached']:,} prompt tokens ({tokens['cached_percent']}%)"
                 + f"\n  Context: {ctx['used_percent']}% of {ctx['limit']:,}{warning}"
                 + f"\n  Duration: {status['duration']}"
             )
@@ -300,8 +310,8 @@ class SlashCommandRegistry:
     def _handle_rag(self, arg: Optional[str]) -> tuple[bool, str]:
         """Handle /rag command."""
         try:
-            from .memory import MemoryStore, ContextRetriever
-            store = MemoryStore()
+            from .memory import ContextRetriever, get_memory_store
+            store = get_memory_store()
         except Exception as e:
             return False, f"RAG init failed: {e}"
 
@@ -309,13 +319,20 @@ class SlashCommandRegistry:
             # Show stats + verbose status
             stats = store.get_stats()
             verbose_status = "on" if self.settings.rag_verbose else "off"
+            mismatch = "".join(
+                f"  [!] {name} was built with {model}; run /rag clear to rebuild\n"
+                for name, model in store.mismatched.items()
+            )
             return True, (
                 f"RAG Memory:\n"
                 f"  Schema items: {stats['schema']}\n"
                 f"  Query history: {stats['queries']}\n"
                 f"  Observations: {stats['observations']}\n"
+                f"  Embeddings: {store.embedder.model} ({store.embedder.dimensions} dims)\n"
+                f"  Vector store: {store.backend}\n"
+                f"{mismatch}"
                 f"  Verbose mode: {verbose_status}\n\n"
-                f"Commands: /rag index, /rag test <question>, /rag verbose, /rag clear"
+                f"Commands: /rag index, /rag sync, /rag compact, /rag test <question>, /rag verbose, /rag clear, /rag migrate"
             )
 
         # --- Parse subcommand and argument ---
@@ -325,13 +342,59 @@ class SlashCommandRegistry:
 
         if subcmd == "index":
             if store.is_schema_indexed():
-                return True, "Schema already indexed. Use /rag clear first to re-index."
+                return True, "Schema already indexed. Use /rag sync to pick up changes, or /rag clear to re-index."
             try:
-                count = store.index_schema_from_db()
+                from .theme import console
+                with console.status("Indexing schema...", spinner="dots") as status:
+                    count = store.index_schema_from_db(
+                        progress=lambda stage, done, total: status.update(f"Indexing schema · {stage} {done:,}/{total:,}")
+                    )
                 return True, f"Indexed {count} tables"
             except Exception as e:
                 return False, f"Indexing failed: {e}"
 
+        elif subcmd == "sync":
+            try:
+                from .theme import console
+                with console.status("Syncing schema...", spinner="dots") as status:
+                    changes = store.sync_schema_from_db(
+                        progress=lambda stage, done, total: status.update(f"Syncing schema · {stage} {done:,}/{total:,}")
+                    )
+                return True, (
+                    f"Schema synced: {changes['added']} added, {changes['updated']} updated, "
+                    f"{changes['deleted']} deleted, {changes['unchanged']} unchanged"
+                )
+            except Exception as e:
+                return False, f"Sync failed: {e}"
+
+        elif subcmd == "compact":
+            try:
+                report = store.compact()
+            except Exception as e:
+                return False, f"Compaction failed: {e}"
+            lines = [
+                f"  {name}: {r['expired']} expired, {r['merged']} merged, {r['evicted']} evicted, {r['remaining']} remaining"
+                for name, r in report.items()
+            ]
+            return True, "RAG memory compacted:\n" + "\n".join(lines)
+
+        elif subcmd == "migrate":
+            # Copy ChromaDB collections into the NumPy store
+            try:
+                from .memory.numpy_store import migrate_from_chroma
+                from .memory.store import CHROMA_DIR, COLLECTIONS
+                if not CHROMA_DIR.exists():
+                    return False, "No ChromaDB data to migrate."
+                copied = migrate_from_chroma(CHROMA_DIR, list(COLLECTIONS.values()))
+                store.invalidate()
+            except Exception as e:
+                return False, f"Migration failed: {e}"
+            lines = [f"  {name}: {count} items" for name, count in copied.items()]
+            return True, (
+                "Migrated to NumPy store:\n" + "\n".join(lines)
+                + '\n\nSet "vector_store": "numpy" in ~/.astroagent/config.json and restart to use it.'
+            )
+
         elif subcmd == "stats":
             stats = store.get_stats()
             return True, (
@@ -369,7 +432,7 @@ class SlashCommandRegistry:
                 return False, f"Retrieval failed: {e}"
 
         else:
-            return False, f"Unknown rag command: {subcmd}\nAvailable: index, stats, test, verbose, clear"
+            return False, f"Unknown rag command: {subcmd}\nAvailable: index, sync, stats, compact, test, verbose, clear, migrate"
 
     def _handle_status(self) -> tuple[bool, str]:
         """Handle /status command."""
@@ -377,6 +440,7 @@ class SlashCommandRegistry:
             "Settings:",
             f"  Model: {self.settings.model}",
             f"  Output Mode: {self.settings.output_mode.value}",
+            f"  Streaming: {'on' if self.settings.stream else 'off'}",
         ]
 
         if self.session_manager:
@@ -390,9 +454,23 @@ class SlashCommandRegistry:
                     f"  ID: {status['id']}" + (f" ({status['name']})" if status['name'] else ""),
                     f"  Messages: {status['messages']}",
                     f"  Tokens: {status['tokens']['total']:,}",
+                    f"  Cached Prompt Tokens: {status['tokens']['cached']:,} ({status['tokens']['cached_percent']}%)",
                     f"  Context: {ctx['used_percent']}% used{warning}",
                 ])
 
+        try:
+            from .sandbox.result_cache import get_result_cache
+            cache = get_result_cache().stats()
+            lines.extend([
+                "",
+                "Query Cache:",
+                f"  Hits: {cache['hits']:,} ({cache['disk_hits']:,} from disk), Misses: {cache['misses']:,}"
+                + f" ({cache['hit_rate']:.0f}% hit rate)",
+                f"  Memory: {cache['entries']:,} results, {cache['memory_mb']:.1f} MB",
+            ])
+        except Exception:
+            pass  # Cache stats are informational only
+
         return True, "\n".join(lines)
 
     def _handle_verbose(self) -> tuple[bool, str]:
@@ -401,6 +479,12 @@ class SlashCommandRegistry:
         status = "on" if self.settings.verbose else "off"
         return True, f"Verbose mode: {status}"
 
+    def _handle_stream(self) -> tuple[bool, str]:
+        """Handle /stream command."""
+        self.settings.stream = not self.settings.stream
+        status = "on" if self.settings.stream else "off"
+        return True, f"Streaming: {status}"
+
     def _handle_help(self) -> tuple[bool, str]:
         """Handle /help command."""
         lines = ["Available Commands:"]
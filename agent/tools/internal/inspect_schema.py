@@ -24,6 +24,10 @@ INSPECT_SCHEMA_TOOL = {
                 "limit": {
                     "type": "integer",
                     "description": "Number of sample rows to return (default 5)"
+                },
+                "exact": {
+                    "type": "boolean",
+                    "description": "For list_tables: run exact COUNT(*) per table instead of using catalog row estimates (slower, default false)"
                 }
             },
             "required": ["action"]
@@ -36,7 +40,8 @@ def inspect_schema(
     action: str,
     schema: str = None,
     table: str = None,
-    limit: int = 5
+    limit: int = 5,
+    exact: bool = False
 ) -> str:
     """Inspect database schema and return formatted info."""
 
@@ -45,10 +50,23 @@ def inspect_schema(
         if not tables:
             return "No tables found."
 
+        # Catalog estimates are free; exact counts are memoized per warehouse version
+        exact_counts = {}
+        if exact:
+            exact_counts = schema_module.get_exact_row_counts(
+                [(t["schema"], t["table"]) for t in tables]
+            )
+
         lines = ["Tables in database:"]
         for t in tables:
-            row_count = schema_module.get_row_count(t["schema"], t["table"])
-            lines.append(f"  {t['schema']}.{t['table']} ({row_count:,} rows)")
+            key = (t["schema"], t["table"])
+            if key in exact_counts:
+                rows = f"{exact_counts[key]:,} rows"
+            elif t["estimated_rows"] is not None:
+                rows = f"~{t['estimated_rows']:,} rows"
+            else:
+                rows = "view"
+            lines.append(f"  {t['schema']}.{t['table']} ({rows})")
         return "\n".join(lines)
 
     elif action == "get_columns":
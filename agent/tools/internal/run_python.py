@@ -18,6 +18,11 @@ RUN_PYTHON_TOOL = {
                 "code": {
                     "type": "string",
                     "description": "Python code to execute. DO NOT USE IMPORTS - pd (pandas) and np (numpy) are pre-loaded. Query results available as DataFrames. Must define a 'result' variable."
+                },
+                "result_format": {
+                    "type": "string",
+                    "enum": ["pandas", "arrow"],
+                    "description": "How query results are loaded: 'pandas' (default, NumPy-backed) or 'arrow' (pd.ArrowDtype columns, much less memory and faster loading for wide or string-heavy tables)"
                 }
             },
             "required": ["queries", "code"]
@@ -26,17 +31,21 @@ RUN_PYTHON_TOOL = {
 }
 
 
-def run_python(queries: dict[str, str], code: str) -> str:
+def run_python(queries: dict[str, str], code: str, result_format: str = "pandas") -> str:
     """Execute Python code on SQL results."""
     sql_executor = SQLExecutor()
     py_executor = PythonExecutor()
 
-    dataframes = {}
-    for name, sql in queries.items():
-        df, error = sql_executor.execute(sql)
-        if error:
-            return f"ERROR executing SQL for '{name}': {error}"
-        dataframes[name] = df
+    # Reject invalid code before running any SQL
+    is_valid, error = py_executor.validate(code)
+    if not is_valid:
+        return f"ERROR: {error}"
+
+    # Queries run concurrently; report the first failure in input order
+    dataframes, _, failure = sql_executor.execute_many(queries, result_format)
+    if failure:
+        name, error = failure
+        return f"ERROR executing SQL for '{name}': {error}"
 
     result, error = py_executor.execute(code, dataframes)
 
@@ -11,6 +11,11 @@ RUN_SQL_TOOL = {
                 "sql": {
                     "type": "string",
                     "description": "The SQL query to execute"
+                },
+                "result_format": {
+                    "type": "string",
+                    "enum": ["pandas", "arrow"],
+                    "description": "How results are fetched: 'pandas' (default) or 'arrow' (Arrow-backed columns, faster for wide or string-heavy results)"
                 }
             },
             "required": ["sql"]
@@ -21,11 +26,12 @@ RUN_SQL_TOOL = {
 MAX_ROWS_FOR_LLM = 500
 
 
-def run_sql(sql: str) -> str:
+def run_sql(sql: str, result_format: str = "pandas") -> str:
     """Execute SQL and return formatted results for the agent."""
     executor = SQLExecutor()
 
-    df, error = executor.execute(sql)
+    # Only MAX_ROWS_FOR_LLM + 1 rows are fetched; the total is counted (bounded) if needed
+    df, total_rows, exact, error = executor.execute_preview(sql, MAX_ROWS_FOR_LLM, result_format)
 
     if error:
         return f"ERROR: {error}"
@@ -33,11 +39,13 @@ def run_sql(sql: str) -> str:
     if df.empty:
         return "Query returned no results."
 
-    row_count = len(df)
-
-    if row_count > MAX_ROWS_FOR_LLM:
+    if len(df) > MAX_ROWS_FOR_LLM:
         result = df.head(MAX_ROWS_FOR_LLM).to_string(index=False)
-        result += f"\n\n[TRUNCATED: showing {MAX_ROWS_FOR_LLM} of {row_count} rows. Use LIMIT in SQL or filter to see specific data.]"
+        if total_rows is None:
+            total = f"more than {MAX_ROWS_FOR_LLM}"
+        else:
+            total = f"{total_rows:,}" if exact else f"≥ {total_rows:,}"
+        result += f"\n\n[TRUNCATED: showing {MAX_ROWS_FOR_LLM} of {total} rows. Use LIMIT in SQL or filter to see specific data.]"
     else:
         result = df.to_string(index=False)
 
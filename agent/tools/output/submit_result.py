@@ -45,6 +45,11 @@ Use this when you have figured out the correct queries and logic to answer the q
                 "explanation": {
                     "type": "string",
                     "description": "Brief explanation of what this computation does and why it answers the user's question."
+                },
+                "result_format": {
+                    "type": "string",
+                    "enum": ["pandas", "arrow"],
+                    "description": "How inputs are loaded: 'pandas' (default, NumPy-backed) or 'arrow' (pd.ArrowDtype columns, much less memory and faster loading for wide or string-heavy tables)"
                 }
             },
             "required": ["inputs", "function", "explanation"]
@@ -69,6 +74,7 @@ class SubmitResultOutput:
         result: The final computed value (only valid if success=True)
         inputs_used: Dict mapping input names to their DataFrames
         sql_queries: Dict mapping input names to their SQL queries
+        input_timings: Dict mapping input names to query wall time in seconds
         function_code: The Python code that was executed
         explanation: The agent's explanation of what this computes
         error: Error message if success=False
@@ -77,6 +83,7 @@ class SubmitResultOutput:
     result: Any = None
     inputs_used: dict[str, pd.DataFrame] = field(default_factory=dict)
     sql_queries: dict[str, str] = field(default_factory=dict)
+    input_timings: dict[str, float] = field(default_factory=dict)
     function_code: str = None
     explanation: str = None
     error: str = None
@@ -85,13 +92,14 @@ class SubmitResultOutput:
 def submit_result(
     inputs: dict[str, str],
     function: str,
-    explanation: str
+    explanation: str,
+    result_format: str = "pandas"
 ) -> SubmitResultOutput:
     """
     Execute the final computation and return structured output.
 
     This is the ONLY pathway for data to reach the user. The flow is:
-    1. Execute each SQL query in 'inputs' against DuckDB
+    1. Execute the SQL queries in 'inputs' against DuckDB (concurrently)
     2. Pass resulting DataFrames to the Python function
     3. Return the 'result' variable from the function
 
@@ -104,6 +112,8 @@ def submit_result(
         function: Python code with access to inputs as DataFrames.
                   Must define a 'result' variable.
         explanation: Human-readable explanation of the computation.
+        result_format: "pandas" or "arrow" (Arrow-backed DataFrames, no
+                       per-value conversion on fetch).
 
     Returns:
         SubmitResultOutput containing the result or error information.
@@ -111,18 +121,28 @@ def submit_result(
     sql_executor = SQLExecutor()
     py_executor = PythonExecutor()
 
+    # Step 0: Reject invalid code before running any SQL
+    is_valid, error = py_executor.validate(function)
+    if not is_valid:
+        return SubmitResultOutput(
+            success=False,
+            error=f"Function validation error: {error}",
+            sql_queries=inputs,
+            function_code=function,
+            explanation=explanation
+        )
+
     # Step 1: Execute all SQL queries to get real data
-    dataframes = {}
-    for name, sql in inputs.items():
-        df, error = sql_executor.execute(sql)
-        if error:
-            return SubmitResultOutput(
-                success=False,
-                error=f"SQL error for input '{name}': {error}",
-                function_code=function,
-                explanation=explanation
-            )
-        dataframes[name] = df
+    dataframes, timings, failure = sql_executor.execute_many(inputs, result_format)
+    if failure:
+        name, error = failure
+        return SubmitResultOutput(
+            success=False,
+            error=f"SQL error for input '{name}': {error}",
+            input_timings=timings,
+            function_code=function,
+            explanation=explanation
+        )
 
     # Step 2: Apply the function to the real data
     result, error = py_executor.execute(function, dataframes)
@@ -133,6 +153,7 @@ def submit_result(
             error=f"Function execution error: {error}",
             inputs_used=dataframes,
             sql_queries=inputs,
+            input_timings=timings,
             function_code=function,
             explanation=explanation
         )
@@ -143,6 +164,7 @@ def submit_result(
         result=result,
         inputs_used=dataframes,
         sql_queries=inputs,
+        input_timings=timings,
         function_code=function,
         explanation=explanation
     )
@@ -0,0 +1,91 @@
+"""
+Benchmark the two SQLExecutor result formats against the warehouse.
+
+Compares fetchdf() (NumPy-backed pandas) with fetch_arrow_table() wrapped
+as Arrow-backed pandas (pd.ArrowDtype) on fetch time, DataFrame memory and
+a typical sandbox operation. The result cache is bypassed so every run
+hits DuckDB.
+
+Usage:
+    uv run python scripts/benchmark_result_formats.py
+    uv run python scripts/benchmark_result_formats.py "SELECT * FROM marts.fct_orders" --repeat 10
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.sandbox import get_pool
+from agent.sandbox.sql_executor import RESULT_FORMATS, fetch_result
+
+DEFAULT_QUERY = "SELECT * FROM marts.fct_orders"
+
+
+def time_call(fn, repeat: int) -> tuple[float, object]:
+    """Median wall time in milliseconds over `repeat` runs, plus the last return value."""
+    timings = []
+    value = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), value
+
+
+def benchmark(sql: str, repeat: int) -> dict:
+    """Run the query in every result format and collect measurements."""
+    pool = get_pool()
+
+    # Warm the buffer cache so both formats read from memory
+    with pool.cursor() as cur:
+        cur.execute(sql).fetchall()
+
+    results = {}
+    for result_format in RESULT_FORMATS:
+        def fetch():
+            with pool.cursor() as cur:
+                return fetch_result(cur.execute(sql), result_format)
+
+        fetch_ms, df = time_call(fetch, repeat)
+        first_col = df.columns[0]
+        groupby_ms, _ = time_call(lambda: df.groupby(first_col).size(), repeat)
+
+        results[result_format] = {
+            "rows": len(df),
+            "columns": len(df.columns),
+            "fetch_ms": fetch_ms,
+            "memory_mb": df.memory_usage(deep=True).sum() / (1024 * 1024),
+            "groupby_ms": groupby_ms,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare pandas vs Arrow result formats")
+    parser.add_argument("sql", nargs="?", default=DEFAULT_QUERY, help="Query to benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (median reported)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Query: {args.sql}")
+    print("=" * 60)
+
+    results = benchmark(args.sql, args.repeat)
+    first = next(iter(results.values()))
+    print(f"{first['rows']:,} rows x {first['columns']} columns, median of {args.repeat} runs\n")
+
+    print(f"{'format':<10}{'fetch ms':>12}{'memory MB':>12}{'groupby ms':>12}")
+    for result_format, r in results.items():
+        print(f"{result_format:<10}{r['fetch_ms']:>12.1f}{r['memory_mb']:>12.1f}{r['groupby_ms']:>12.1f}")
+
+    pandas, arrow = results["pandas"], results["arrow"]
+    if arrow["fetch_ms"] and arrow["memory_mb"]:
+        print(f"\narrow vs pandas: {pandas['fetch_ms'] / arrow['fetch_ms']:.1f}x fetch speed, "
+              f"{pandas['memory_mb'] / arrow['memory_mb']:.1f}x less memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+test_config.py - Settings are cached but follow edits to config.json
+"""
+
+import json
+
+import pytest
+
+from agent import config
+
+
+@pytest.fixture
+def config_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CONFIG_DIR", tmp_path)
+    monkeypatch.setattr(config, "CONFIG_FILE", tmp_path / "config.json")
+    config._invalidate_config()
+    yield tmp_path / "config.json"
+    config._invalidate_config()
+
+
+def test_setting_is_read_once_until_the_file_changes(config_file, monkeypatch):
+    config_file.write_text(json.dumps({"query_timeout_seconds": 30}))
+    assert config.get_setting("query_timeout_seconds") == 30
+
+    reads = []
+    read_text = type(config_file).read_text
+    monkeypatch.setattr(type(config_file), "read_text", lambda self, *a, **k: reads.append(self) or read_text(self, *a, **k))
+    for _ in range(100):
+        assert config.get_setting("query_timeout_seconds") == 30
+    assert reads == []
+
+
+def test_edits_and_saves_are_picked_up(config_file):
+    assert config.get_setting("result_cache", True) is True
+
+    config.save_config({"result_cache": False})
+    assert config.get_setting("result_cache", True) is False
+
+    # --- Edited by hand (or another process) ---
+    config_file.write_text(json.dumps({"result_cache": True, "python_workers": 2}))
+    assert config.get_setting("python_workers") == 2
+
+    config.clear_config()
+    assert config.get_setting("python_workers") is None
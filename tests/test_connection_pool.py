@@ -0,0 +1,70 @@
+"""
+test_connection_pool.py - Warehouse rewrites by other processes are seen by the pool
+"""
+
+import os
+import subprocess
+import sys
+import textwrap
+
+import duckdb
+import pytest
+
+from agent.sandbox.connection_pool import ConnectionPool
+
+
+def make_warehouse(path, rows: int):
+    with duckdb.connect(str(path)) as conn:
+        conn.execute("CREATE OR REPLACE TABLE t AS SELECT range AS id FROM range(?)", [rows])
+
+
+def run_in_subprocess(code: str):
+    subprocess.run([sys.executable, "-c", textwrap.dedent(code)], check=True, timeout=60)
+
+
+def count_rows(pool: ConnectionPool) -> int:
+    with pool.cursor() as cur:
+        return cur.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+
+
+@pytest.fixture
+def isolated_config(tmp_path, monkeypatch):
+    """Keep DuckDB spill files out of the real home directory."""
+    monkeypatch.setattr("agent.sandbox.connection_pool.duckdb_config", lambda: {"temp_directory": str(tmp_path / "tmp")})
+
+
+def test_writer_in_other_process_can_lock_idle_warehouse(tmp_path, isolated_config):
+    warehouse = tmp_path / "data.duckdb"
+    make_warehouse(warehouse, 3)
+    pool = ConnectionPool(warehouse, idle_seconds=0)
+
+    assert count_rows(pool) == 3
+
+    run_in_subprocess(f"""
+        import duckdb
+        with duckdb.connect({str(warehouse)!r}) as conn:
+            conn.execute("INSERT INTO t SELECT range + 100 FROM range(4)")
+    """)
+
+    assert count_rows(pool) == 7
+    pool.close()
+
+
+def test_replaced_warehouse_file_is_reopened(tmp_path, isolated_config):
+    warehouse = tmp_path / "data.duckdb"
+    make_warehouse(warehouse, 3)
+    pool = ConnectionPool(warehouse, idle_seconds=60)
+
+    assert count_rows(pool) == 3
+
+    # --- Connection is still open (not idle yet) when the file is swapped ---
+    rebuilt = tmp_path / "rebuilt.duckdb"
+    run_in_subprocess(f"""
+        import duckdb
+        with duckdb.connect({str(rebuilt)!r}) as conn:
+            conn.execute("CREATE TABLE t AS SELECT range AS id FROM range(10)")
+    """)
+    os.replace(rebuilt, warehouse)
+
+    assert count_rows(pool) == 10
+    pool.close()
@@ -0,0 +1,37 @@
+"""
+test_retriever.py - Table extraction used to invalidate the retrieval cache
+"""
+
+from agent.memory.retriever import extract_tables
+
+
+def test_from_and_join_targets():
+    sql = "SELECT * FROM marts.orders o JOIN marts.users u ON o.user_id = u.id"
+    assert extract_tables(sql) == {"marts.orders", "marts.users"}
+
+
+def test_extract_from_is_not_a_table():
+    sql = "SELECT EXTRACT(year FROM order_date) AS y, COUNT(*) FROM orders GROUP BY 1"
+    assert extract_tables(sql) == {"orders"}
+
+
+def test_substring_from_is_not_a_table():
+    sql = "SELECT SUBSTRING(name FROM start_pos FOR 3) FROM users"
+    assert extract_tables(sql) == {"users"}
+
+
+def test_trim_from_is_not_a_table():
+    assert extract_tables("SELECT TRIM(BOTH 'x' FROM code) FROM products") == {"products"}
+
+
+def test_subqueries_still_count():
+    sql = """
+        SELECT * FROM (SELECT EXTRACT(month FROM ts) AS m FROM pageviews) AS p
+        WHERE p.m IN (SELECT month FROM calendar)
+    """
+    assert extract_tables(sql) == {"pageviews", "calendar"}
+
+
+def test_strings_and_comments_are_ignored():
+    sql = "SELECT 'from fake' AS note -- join other\nFROM real_table"
+    assert extract_tables(sql) == {"real_table"}
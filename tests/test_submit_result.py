@@ -0,0 +1,51 @@
+"""
+test_submit_result.py - Per-input query timings reach the output
+"""
+
+import duckdb
+import pytest
+
+from agent.sandbox.connection_pool import ConnectionPool
+from agent.tools.output.submit_result import submit_result
+
+
+@pytest.fixture
+def warehouse(tmp_path, monkeypatch):
+    """A small warehouse behind its own pool, with the result cache off."""
+    path = tmp_path / "data.duckdb"
+    with duckdb.connect(str(path)) as conn:
+        conn.execute("CREATE TABLE orders AS SELECT range AS id, range * 10 AS amount FROM range(5)")
+
+    monkeypatch.setattr("agent.sandbox.connection_pool.duckdb_config", lambda: {"temp_directory": str(tmp_path / "tmp")})
+    pool = ConnectionPool(path, idle_seconds=0)
+    monkeypatch.setattr("agent.sandbox.sql_executor.get_pool", lambda: pool)
+    monkeypatch.setattr("agent.sandbox.sql_executor.get_setting", lambda key, default=None: False if key == "result_cache" else default)
+    yield pool
+    pool.close()
+
+
+def test_success_reports_input_timings(warehouse):
+    output = submit_result(
+        inputs={
+            "orders": "SELECT * FROM orders",
+            "total": "SELECT SUM(amount) AS amount FROM orders",
+        },
+        function="result = int(total['amount'].iloc[0])",
+        explanation="Sum of order amounts",
+    )
+
+    assert output.success, output.error
+    assert output.result == 100
+    assert set(output.input_timings) == {"orders", "total"}
+    assert all(seconds >= 0 for seconds in output.input_timings.values())
+
+
+def test_sql_failure_reports_input_timings(warehouse):
+    output = submit_result(
+        inputs={"missing": "SELECT * FROM no_such_table"},
+        function="result = 1",
+        explanation="Fails",
+    )
+
+    assert not output.success
+    assert "missing" in output.input_timings